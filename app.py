@@ -6,31 +6,18 @@ from datetime import datetime, date, timedelta
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import gspread
-from gspread_dataframe import get_as_dataframe
-from google.oauth2.service_account import Credentials
+
+from utils.bootstrap import configurar_pagina, preguicoso
+
+px = preguicoso("plotly.express")
 
 # =========================
 # Setup & Estilo
 # =========================
 
-# Restaura o tema escuro (desfaz config.toml anterior que deixou tudo branco)
-import pathlib
-_cfg_dir = pathlib.Path(".streamlit")
-_cfg_dir.mkdir(exist_ok=True)
-(_cfg_dir / "config.toml").write_text("""
-[theme]
-base = "dark"
-""")
-
-st.set_page_config(
-    page_title="Ebenezér Variedades",
-    page_icon="🛍️",
-    layout="wide",
-    initial_sidebar_state="collapsed",
-)
+# Tema escuro no config.toml (desfaz config.toml anterior que deixou tudo branco) + set_page_config
+configurar_pagina("Ebenezér Variedades", "🛍️", barra_lateral="collapsed")
 
 st.markdown("""
 <style>
@@ -282,20 +269,16 @@ header { visibility: visible !important; height: auto !important; }
 </style>
 """, unsafe_allow_html=True)
 
-# Refresh leve — evita loop de rerun
-if st.session_state.get("_force_refresh", False):
-    st.session_state["_force_refresh"] = False
-    st.cache_data.clear()
-    st.rerun()
-
-
 from utils.sheets import (
-    sheet, carregar_aba, garantir_aba, append_rows,
-    to_num, brl, safe_cost, first_col, fmt_num,
-    norm_tipo_mov, calcular_estoque,
+    sheet, carregar_tipadas, invalidar_aba, relatorio_memoria, garantir_aba, append_rows,
+    estatisticas_coalescencia, selo_dados, resumo_periodo, estatisticas_resumo, resumo_arquivo,
+    to_num, to_num_series, brl, safe_cost, first_col, fmt_num,
+    norm_tipo_mov, calcular_estoque, saldos_estoque, canon_id, canon_ids,
     tg_send, tg_media, gerar_id, parse_date, strip_acc, norm_str,
     ABA_PROD, ABA_VEND, ABA_COMP, ABA_MOVS, ABA_CLIEN, ABA_FIADO, ABA_FPAGT,
 )
+from utils.arquivo import anos_fechados, arquivar_anos_fechados
+from utils.cota import estatisticas_cota
 # Aliases para compatibilidade com código existente
 _to_num = to_num
 _to_float = to_num
@@ -311,9 +294,7 @@ _parse_date_any = parse_date
 _norm_tipo_mov = norm_tipo_mov
 conectar_sheets = sheet
 
-def _canon_id(x):
-    """Extrai apenas dígitos do ID para chave de lookup."""
-    return re.sub(r"[^0-9]", "", str(x or ""))
+_canon_id = canon_id
 
 
 # =========================
@@ -321,32 +302,20 @@ def _canon_id(x):
 # =========================
 ABA_PROD, ABA_VEND, ABA_COMP = "Produtos", "Vendas", "Compras"
 
-try:    prod = carregar_aba(ABA_PROD)
-except: prod = pd.DataFrame()
-try:    vend_raw = carregar_aba(ABA_VEND)
-except: vend_raw = pd.DataFrame()
-try:    comp_raw = carregar_aba(ABA_COMP)
-except: comp_raw = pd.DataFrame()
+# Uma única requisição ao Sheets; frames já com nomes canônicos e tipos (ESQUEMAS)
+try:    _abas = carregar_tipadas([ABA_PROD, ABA_VEND, ABA_COMP], junto=(ABA_MOVS,))
+except: _abas = {}
+prod     = _abas.get(ABA_PROD, pd.DataFrame())
+vend_raw = _abas.get(ABA_VEND, pd.DataFrame())
+comp_raw = _abas.get(ABA_COMP, pd.DataFrame())
 
 # =========================
 # Produtos
 # =========================
 if not prod.empty:
-    ren = {
-        "ID":"ID","Nome":"Nome","Categoria":"Categoria","Unidade":"Unidade","Fornecedor":"Fornecedor",
-        "CustoAtual":"CustoAtual","PreçoVenda":"PrecoVenda","Preço Venda":"PrecoVenda","PrecoVenda":"PrecoVenda",
-        "EstoqueAtual":"EstoqueAtual","EstoqueMin":"EstoqueMin","LeadTimeDias":"LeadTimeDias","Ativo?":"Ativo",
-        "FatorCusto":"FatorCusto"
-    }
-    for k,v in ren.items():
-        if k in prod.columns and v!=k: prod.rename(columns={k:v}, inplace=True)
-    for c in ["ID","Nome","Categoria","Fornecedor","EstoqueAtual","EstoqueMin","CustoAtual","PrecoVenda","Ativo","FatorCusto"]:
-        if c not in prod.columns: prod[c] = None
-    if "FatorCusto" not in prod.columns: prod["FatorCusto"] = 1
-    for c in ["EstoqueAtual","EstoqueMin","CustoAtual","PrecoVenda","FatorCusto"]:
-        prod[c] = pd.to_numeric(prod[c], errors="coerce")
-    prod["KeyID"] = prod["ID"].apply(_canon_id)
-    prod["ValorEstoque"] = prod["CustoAtual"].fillna(0)*prod["EstoqueAtual"].fillna(0)
+    prod["FatorCusto"] = prod["FatorCusto"].where(prod["FatorCusto"] > 0, 1.0)  # vazio = fator 1
+    prod["KeyID"] = canon_ids(prod["ID"])
+    prod["ValorEstoque"] = prod["CustoAtual"] * prod["EstoqueAtual"]
 
 # =========================
 # BARRA DE NAVEGAÇÃO NATIVA
@@ -401,7 +370,7 @@ st.markdown(f"""
         <div class="page-header h1" style="font-family:'Nunito',sans-serif;font-weight:900;font-size:1.9rem;color:#fff;margin:0;">
             🛍️ Ebenezér Variedades
         </div>
-        <div class="subtitle">Painel de acompanhamento do negócio</div>
+        <div class="subtitle">Painel de acompanhamento do negócio · {selo_dados([ABA_PROD, ABA_VEND, ABA_COMP, ABA_MOVS])}</div>
     </div>
     <div class="header-badge">📅 {hoje.strftime('%d/%m/%Y')}</div>
 </div>
@@ -439,78 +408,18 @@ apenas_ativos   = True
 ocultar_zerados = True
 
 # =========================
-# Vendas (período)
+# Vendas (período) — somas do resumo diário (dia × produto × forma)
 # =========================
-def _normalize_vendas_period(v: pd.DataFrame) -> tuple[pd.DataFrame, pd.DataFrame]:
-    if v.empty: return pd.DataFrame(), pd.DataFrame()
-    v = v.copy(); v.columns = [c.strip() for c in v.columns]
-    col_data  = _first_col(v, ["Data"])
-    col_vid   = _first_col(v, ["VendaID","Pedido","Cupom"])
-    col_idp   = _first_col(v, ["IDProduto","ID do Produto","ProdutoID","Produto Id","SKU","COD","Código","Codigo","ID"])
-    col_qtd   = _first_col(v, ["Qtd","Quantidade","Qtde","Qde","QTD"])
-    col_pu    = _first_col(v, ["PrecoUnit","Preço Unitário","PreçoUnitário","Preço","Preco","Preço Unit","Unitário"])
-    col_tot   = _first_col(v, ["TotalLinha","Total","Total da Linha"])
-    col_forma = _first_col(v, ["FormaPagto","Forma Pagamento","FormaPagamento","Pagamento","Forma"])
-    col_obs   = _first_col(v, ["Obs","Observação"])
-    col_desc  = _first_col(v, ["Desconto"])
-    col_totcup= _first_col(v, ["TotalCupom"])
-    col_stat  = _first_col(v, ["CupomStatus","Status"])
-    out = pd.DataFrame({
-        "Data":      v[col_data]  if col_data else None,
-        "VendaID":   v[col_vid]   if col_vid  else "",
-        "IDProduto": v[col_idp]   if col_idp  else None,
-        "Qtd":       v[col_qtd]   if col_qtd  else 0,
-        "PrecoUnit": v[col_pu]    if col_pu   else 0,
-        "TotalLinha":v[col_tot]   if col_tot  else 0,
-        "Forma":     v[col_forma] if col_forma else "",
-        "Obs":       v[col_obs]   if col_obs  else "",
-        "Desconto":  v[col_desc]  if col_desc else 0,
-        "TotalCupom":v[col_totcup] if col_totcup else 0,
-        "Status":    v[col_stat]  if col_stat  else "",
-    })
-    out["Data_d"]    = out["Data"].apply(_parse_date_any)
-    out["QtdNum"]    = out["Qtd"].apply(_to_float)
-    out["TotalNum"]  = out["TotalLinha"].apply(_to_float)
-    out["KeyID"]     = out["IDProduto"].apply(_canon_id)
-    out["DescNum"]   = out["Desconto"].apply(_to_float)
-    out["TotalCupomNum"] = out["TotalCupom"].apply(_to_float)
-
-    mask_periodo = (out["Data_d"] >= dt_ini) & (out["Data_d"] <= dt_fim)
-    if not inclui_estornos:
-        mask_estorno = (
-            out["VendaID"].astype(str).str.upper().str.startswith("CN-") |
-            out["Obs"].astype(str).str.upper().str.contains("ESTORNO", na=False)
-        )
-        mask_periodo = mask_periodo & (~mask_estorno)
-    out_period = out[mask_periodo].copy()
-
-    # Agrupar por cupom
-    if out_period.empty:
-        return out_period, pd.DataFrame()
-    cupom_grp = out_period.groupby("VendaID", as_index=False).agg(
-        Data_d=("Data_d","first"),
-        Forma=("Forma","first"),
-        ReceitaCupom=("TotalNum","sum"),
-        Itens=("QtdNum","sum"),
-    )
-    cupom_grp["VendaID"] = cupom_grp["VendaID"].astype(str)
-    return out_period, cupom_grp
-
-vendas, cupom_grp = _normalize_vendas_period(vend_raw)
+try:    vendas = resumo_periodo(dt_ini, dt_fim, estornos=inclui_estornos)
+except: vendas = pd.DataFrame()
 
 # =========================
 # Compras período
 # =========================
 def _normalize_compras_period(c: pd.DataFrame) -> pd.DataFrame:
     if c.empty: return pd.DataFrame(columns=["Data_d","TotalNum"])
-    c = c.copy(); c.columns = [x.strip() for x in c.columns]
-    col_data = _first_col(c, ["Data"])
-    col_tot  = _first_col(c, ["Total","TotalLinha","Total da Linha","Valor Total"])
-    out = pd.DataFrame({"Data": c[col_data] if col_data else None, "TotalLinha": c[col_tot] if col_tot else 0})
-    out["Data_d"]   = out["Data"].apply(_parse_date_any)
-    out["TotalNum"] = out["TotalLinha"].apply(_to_float)
-    out = out[(out["Data_d"]>=dt_ini) & (out["Data_d"]<=dt_fim)]
-    return out
+    out = pd.DataFrame({"Data_d": c["Data"], "TotalNum": c["Total"]})
+    return out[out["Data_d"].between(pd.Timestamp(dt_ini), pd.Timestamp(dt_fim))]
 
 compras_periodo = _normalize_compras_period(comp_raw)
 
@@ -520,43 +429,16 @@ compras_periodo = _normalize_compras_period(comp_raw)
 def _normalize_compras_all_with_date(c: pd.DataFrame) -> pd.DataFrame:
     if c is None or c.empty:
         return pd.DataFrame(columns=["KeyID", "QtdNum", "CustoNum", "Data_d"])
-    d = c.copy()
-    d.columns = [str(x).strip() for x in d.columns]
-    def _norm(s: str) -> str:
-        s = unicodedata.normalize("NFKD", str(s))
-        s = "".join(ch for ch in s if not unicodedata.combining(ch))
-        s = s.lower().strip()
-        s = re.sub(r"[\s_]+", "", s)
-        return s
-    norm2orig = {_norm(col): col for col in d.columns}
-    def _pick(*aliases):
-        for a in aliases:
-            col = norm2orig.get(_norm(a))
-            if col: return col
-        return None
-    col_idp = _pick("IDProduto", "ID do Produto", "ProdutoID", "Produto Id", "SKU", "COD", "Código", "Codigo", "ID")
-    col_qtd = _pick("Qtd", "Quantidade", "Qtde", "Qde", "QTD")
-    col_cu  = _pick("Custo Unitário", "CustoUnitário", "Custo Unit", "CustoUnit", "Preço de Custo", "PrecoCusto", "Preço Custo", "Custo")
-    col_tot = _pick("Total", "Total da Linha", "TotalLinha", "Valor Total")
-    col_dat = _pick("Data", "Emissao", "Emissão")
-    col_fre = _pick("FreteRateado", "Frete Rateado", "Frete")
-    def to_f(x): return _to_float(x, default=0.0)
+    # c já vem tipada (carregar_tipadas); colunas ausentes na planilha vêm zeradas
     out = pd.DataFrame({
-        "KeyID":   d[col_idp].apply(_canon_id) if col_idp and col_idp in d.columns else pd.Series("", index=d.index),
-        "QtdNum":  d[col_qtd].apply(to_f)      if col_qtd and col_qtd in d.columns else pd.Series(0.0, index=d.index),
-        "Data_d":  d[col_dat].apply(_parse_date_any) if col_dat and col_dat in d.columns else pd.Series(None, index=d.index),
+        "KeyID":    canon_ids(c["IDProduto"]),
+        "QtdNum":   c["Qtd"],
+        "CustoNum": c["CustoUnit"],
+        "Data_d":   c["Data"],
     })
-    if col_cu and col_cu in d.columns:
-        out["CustoNum"] = d[col_cu].apply(to_f)
-    else:
-        out["CustoNum"] = 0.0
-    if col_tot and col_tot in d.columns:
-        total_num = d[col_tot].apply(to_f)
-        mask_fb = (out["CustoNum"] <= 0) & (out["QtdNum"] > 0)
-        out.loc[mask_fb, "CustoNum"] = (total_num[mask_fb] / out.loc[mask_fb, "QtdNum"]).astype(float)
-    if col_fre and col_fre in d.columns:
-        frete = d[col_fre].apply(to_f)
-        out["CustoNum"] = (out["CustoNum"].fillna(0.0) + frete.fillna(0.0)).astype(float)
+    mask_fb = (out["CustoNum"] <= 0) & (out["QtdNum"] > 0)
+    out.loc[mask_fb, "CustoNum"] = c.loc[mask_fb, "Total"] / out.loc[mask_fb, "QtdNum"]
+    out["CustoNum"] = out["CustoNum"] + c["Frete"]
     out = out[(out["KeyID"] != "") & (out["QtdNum"] > 0)]
     out.loc[abs(out["CustoNum"]) > 1e6, "CustoNum"] = 0.0
     return out[["KeyID", "QtdNum", "CustoNum", "Data_d"]]
@@ -564,59 +446,22 @@ def _normalize_compras_all_with_date(c: pd.DataFrame) -> pd.DataFrame:
 c_all = _normalize_compras_all_with_date(comp_raw)
 
 # ── Estoque calculado via MovimentosEstoque (fonte única de verdade) ──
-def _norm_tipo_mov(t: str) -> str:
-    import unicodedata as _ud2, re as _re2
-    raw = str(t or "")
-    low = "".join(ch for ch in _ud2.normalize("NFKD", raw.lower()) if _ud2.category(ch) != "Mn")
-    if "fracion" in low:
-        return "entrada" if "+" in raw else "saida" if "-" in raw else "outro"
-    lowc = _re2.sub(r"[^a-z]","",low)
-    if "contagem" in lowc or "inventario" in lowc: return "ajuste"
-    if "entrada" in lowc or "compra" in lowc or "estorno" in lowc: return "entrada"
-    if "saida"   in lowc or "venda"  in lowc or "baixa"   in lowc: return "saida"
-    if "ajuste"  in lowc: return "ajuste"
-    return "outro"
-
-try:
-    mov_raw = carregar_aba("MovimentosEstoque")
-except:
-    mov_raw = pd.DataFrame()
-
-entradas_mov = pd.Series(dtype=float)
-saidas_mov   = pd.Series(dtype=float)
-ajustes_mov  = pd.Series(dtype=float)
-
-if not mov_raw.empty:
-    dm = mov_raw.copy(); dm.columns = [c.strip() for c in dm.columns]
-    col_mid  = _first_col(dm, ["IDProduto","ProdutoID","ID"])
-    col_mqtd = _first_col(dm, ["Qtd","Quantidade"])
-    col_mtip = _first_col(dm, ["Tipo","tipo"])
-    if col_mid and col_mqtd and col_mtip:
-        dm["_key"]  = dm[col_mid].apply(_canon_id)
-        dm["_qtd"]  = dm[col_mqtd].apply(_to_float)
-        dm["_tipo"] = dm[col_mtip].apply(_norm_tipo_mov)
-        dm = dm[dm["_key"] != ""]
-        entradas_mov = dm[dm["_tipo"]=="entrada"].groupby("_key")["_qtd"].sum()
-        saidas_mov   = dm[dm["_tipo"]=="saida"  ].groupby("_key")["_qtd"].sum()
-        ajustes_mov  = dm[dm["_tipo"]=="ajuste" ].groupby("_key")["_qtd"].sum()
-
-# Monta calc com KeyID como coluna (não como index)
-_rows = []
-_all_keys = set(entradas_mov.index) | set(saidas_mov.index) | set(ajustes_mov.index)
-for _k in _all_keys:
-    _e = float(entradas_mov.get(_k, 0.0))
-    _s = float(saidas_mov.get(_k, 0.0))
-    _a = float(ajustes_mov.get(_k, 0.0))
-    _rows.append({"KeyID": _k, "Entradas": _e, "Saidas": _s, "Ajustes": _a,
-                  "SaldoInicial": 0.0, "EstoqueCalc": _e - _s + _a})
-calc = pd.DataFrame(_rows) if _rows else pd.DataFrame(
-    columns=["KeyID","Entradas","Saidas","Ajustes","SaldoInicial","EstoqueCalc"])
+# calc com KeyID como coluna (não como index)
+_led = saldos_estoque(chave=lambda pid, nome: canon_id(pid))  # checkpoint + movimentos novos
+calc = pd.DataFrame({
+    "KeyID":        _led.index.astype(str),
+    "Entradas":     _led["Entradas"].to_numpy(),
+    "Saidas":       _led["Saidas"].to_numpy(),
+    "Ajustes":      _led["Ajustes"].to_numpy(),
+    "SaldoInicial": 0.0,
+    "EstoqueCalc":  (_led["Entradas"] - _led["Saidas"] + _led["Ajustes"]).to_numpy(),
+})
 
 def _last_cost_per_product(comp_df):
     if comp_df.empty: return pd.Series(dtype=float)
     d = comp_df.copy()
     d["_ord"] = range(len(d))
-    d = d[d["CustoNum"].apply(lambda x: _to_float(x) > 0)]
+    d = d[to_num_series(d["CustoNum"]) > 0]
     if d.empty: return pd.Series(dtype=float)
     d = d.sort_values(["KeyID","Data_d","_ord"]).groupby("KeyID").tail(1)
     return d.set_index("KeyID")["CustoNum"]
@@ -654,27 +499,13 @@ prod_calc["ValorEstoqueCalc"] = prod_calc["CustoAtual"].fillna(0) * prod_calc["E
 # KPIs
 # =========================
 if not vendas.empty:
-    faturamento = cupom_grp["ReceitaCupom"].sum()
-    num_cupons  = cupom_grp["VendaID"].nunique()
-    itens_vendidos = vendas["QtdNum"].sum()
-else:
-    faturamento = 0.0; num_cupons = 0; itens_vendidos = 0.0
-
-if not prod_calc.empty:
-    _custo_ref = prod_calc.set_index("KeyID")["CustoAtual"].astype(float)
-else:
-    _custo_ref = pd.Series(dtype=float)
-
-if not vendas.empty:
-    vv = vendas.copy()
-    vv["KeyID"] = vv["KeyID"].astype(str)
-    vv = vv[vv["KeyID"] != ""]
-    vv["QtdNum"] = vv["QtdNum"].astype(float)
-    vv["_CustoUnit"]  = vv["KeyID"].map(lambda k: float(_custo_ref.get(str(k), 0.0) or 0.0))
-    vv["_CustoLinha"] = vv["QtdNum"] * vv["_CustoUnit"]
-    cogs = float(vv["_CustoLinha"].sum())
+    faturamento    = float(vendas["Bruto"].sum())
+    # linhas sem VendaID contam como um cupom só no período (como no groupby de antes)
+    num_cupons     = int(round(vendas["Cupons"].sum())) + int(vendas["SemVendaID"].sum() > 0)
+    itens_vendidos = float(vendas["Qtd"].sum())
+    cogs           = float(vendas["Custo"].sum())  # Qtd × custo vigente (CustoAtual / última compra)
 else:
-    cogs = 0.0
+    faturamento = 0.0; num_cupons = 0; itens_vendidos = 0.0; cogs = 0.0
 
 lucro_bruto   = max(0.0, faturamento - cogs)
 margem_bruta  = (lucro_bruto / faturamento * 100) if faturamento > 0 else 0.0
@@ -725,13 +556,11 @@ st.markdown('<div class="secao-titulo">📆 Vendas e Compras por dia</div>', uns
 
 def _daily(df_in, date_col, val_col, label):
     if df_in is None or df_in.empty: return pd.DataFrame(columns=["Data","Valor","Tipo"])
-    d = df_in.copy()
-    d[date_col] = d[date_col].apply(_parse_date_any)
-    g = d.groupby(date_col)[val_col].sum().reset_index().rename(columns={date_col:"Data", val_col:"Valor"})
+    g = df_in.groupby(date_col)[val_col].sum().reset_index().rename(columns={date_col:"Data", val_col:"Valor"})
     g["Tipo"] = label
     return g
 
-g_v = _daily(cupom_grp if not vendas.empty else pd.DataFrame(), "Data_d", "ReceitaCupom", "💵 Vendas")
+g_v = _daily(vendas, "Data", "Bruto", "💵 Vendas")
 g_c = _daily(compras_periodo, "Data_d", "TotalNum", "🛒 Compras")
 serie = pd.concat([g_v, g_c], ignore_index=True)
 
@@ -864,6 +693,38 @@ if not prod_calc.empty:
 # =========================
 with st.expander("⚙️ Ferramentas avançadas", expanded=False):
     st.caption("Área técnica — sincronizar custo de produtos na planilha.")
+    _mem = relatorio_memoria()
+    if _mem:
+        st.caption(f"Memória das abas em cache: {sum(m['total_kb'] for m in _mem) / 1024:.1f} MB")
+        st.dataframe(pd.DataFrame(_mem), use_container_width=True, hide_index=True)
+    st.caption("Cota do Google Sheets (contadores desde o início do processo)")
+    st.dataframe(pd.DataFrame([estatisticas_cota()]), use_container_width=True, hide_index=True)
+    _voo = estatisticas_coalescencia()
+    st.caption(f"Leituras de aba coalescidas (single-flight): {_voo['coalescidas']} de "
+               f"{_voo['leituras'] + _voo['coalescidas']} pedidos ({_voo['economia_pct']}%)")
+    _rd = estatisticas_resumo()
+    st.caption(f"Resumo diário de vendas: {_rd['linhas']:,} linhas · {_rd['completos']} recálculos completos · "
+               f"{_rd['incrementais']} incrementais ({_rd['dias_refeitos']} dias refeitos)")
+    st.page_link("pages/08_Monitor_API.py", label="📡 Monitor da API (latência por página/operação)")
+
+    st.caption("Arquivo anual — anos fechados de Vendas e MovimentosEstoque vão para "
+               "Vendas_AAAA / MovimentosEstoque_AAAA (rodar com a loja parada).")
+    _pend = {a: anos_fechados(a) for a in (ABA_VEND, ABA_MOVS)}
+    _pend = {a: anos for a, anos in _pend.items() if anos}
+    if _pend:
+        st.caption("Anos fechados ainda nas abas vivas: "
+                   + " · ".join(f"{a} {', '.join(map(str, anos))}" for a, anos in _pend.items()))
+    if st.button("🗄️ Arquivar anos fechados", disabled=not _pend):
+        try:
+            with st.spinner("Arquivando…"):
+                _feitos = arquivar_anos_fechados()
+            st.success(f"✅ {sum(f['linhas'] for f in _feitos)} linhas arquivadas.")
+            st.dataframe(pd.DataFrame(_feitos), use_container_width=True, hide_index=True)
+        except Exception as e:
+            st.error(f"❌ Falha no arquivamento (rodar de novo continua de onde parou): {e}")
+    _res = resumo_arquivo()
+    if not _res.empty and "Tipo" in _res.columns:
+        st.dataframe(_res[_res["Tipo"].astype(str) == "total"], use_container_width=True, hide_index=True)
     import unicodedata as _ud, re as _re
 
     def _norm2(s):
@@ -900,8 +761,8 @@ with st.expander("⚙️ Ferramentas avançadas", expanded=False):
                 val    = float(_choose_cost_final(keyid)) if keyid else 0.0
                 cell.value = val
             ws.update_cells(cells, value_input_option="USER_ENTERED")
+            invalidar_aba(ABA_PROD)
             st.success("✅ Custos atualizados com sucesso!")
-            st.session_state["_force_refresh"] = True
             st.rerun()
         except Exception as e:
             st.error(f"❌ Falha: {e}")
@@ -0,0 +1,93 @@
+# benchmarks/bench_conversoes.py — conversões célula a célula × vetorizadas
+# -*- coding: utf-8 -*-
+"""
+Confere que as versões vetorizadas dão o MESMO resultado das originais
+e mede o ganho numa coluna grande (padrão: 200 mil linhas).
+
+    python benchmarks/bench_conversoes.py [linhas]
+"""
+from __future__ import annotations
+
+import re
+import sys
+import time
+from datetime import timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.sheets import (  # noqa: E402
+    parse_date, parse_date_series, safe_cost, safe_cost_series, to_num, to_num_series,
+)
+from utils.sheets import _RE_SERIAL, _SERIAL_ZERO  # noqa: E402
+
+# valores que aparecem na planilha (e alguns casos de borda)
+AMOSTRA_NUM = [
+    "", " ", "nan", "None", "0", "1", "12", "-3", "2,5", "1.234,56", "1,234.56", "R$ 10,00",
+    "R$ 1.500,00", "(45,90)", "(R$ 3,00)", "−7", "--5", "1.2.3", "3.", ".5", "-.5",
+    "abc", "5-3", "(", "()", "1e5", "10 un", "R$", "0,0001", "99999999,99", "45.000",
+    12, 3.5, float("nan"), None, True, np.int64(7), np.float64(2.25),
+]
+
+AMOSTRA_DATA = [
+    "", "01/02/2024", "1/2/2024", "31/12/2023", "31/02/2024", "2024-05-07", "2024-5-7",
+    "07/05/24", "07/05/70", "45123", "45123.5", "12345", "ontem", "2024/05/07",
+    "07-05-2024", " 03/04/2025 ", "00/01/2024", None, float("nan"),
+]
+
+
+def _data_celula(v):
+    """Referência do parse_date_series: parse_date + serial do Sheets (que o escalar não lê)."""
+    txt = str(v).strip() if isinstance(v, str) else ""
+    if re.fullmatch(_RE_SERIAL, txt) and 20000 <= float(txt) < 80000:
+        return _SERIAL_ZERO + timedelta(days=int(float(txt)))
+    return parse_date(v)
+
+
+def _tempo(fn, *args) -> tuple[float, object]:
+    t0 = time.perf_counter()
+    r = fn(*args)
+    return time.perf_counter() - t0, r
+
+
+def _conferir(nome: str, lento, rapido, serie: pd.Series) -> None:
+    t_lento, a = _tempo(lambda s: s.apply(lento), serie)
+    t_rapido, b = _tempo(rapido, serie)
+    if a.dtype == object:  # datas: compara objeto a objeto (None/NaT contam como vazio)
+        a, b = (x.map(lambda v: None if v is None or pd.isna(v) else v) for x in (a, b))
+        iguais = a.tolist() == b.tolist()
+        dif = serie[a.ne(b) & ~(a.isna() & b.isna())]
+    else:
+        a = a.astype(float)
+        iguais = np.array_equal(a.to_numpy(), b.to_numpy(), equal_nan=True)
+        dif = serie[~((a == b) | (a.isna() & b.isna()))]
+    if not iguais or not a.index.equals(b.index):
+        raise SystemExit(f"❌ {nome}: resultados diferentes, ex.: {dif.head(10).tolist()}")
+    print(f"{nome:<18} {len(serie):>9,} linhas   .apply {t_lento*1000:9.1f} ms"
+          f"   vetorizado {t_rapido*1000:8.1f} ms   ×{t_lento / max(t_rapido, 1e-9):6.1f}")
+
+
+def main(n: int = 200_000) -> None:
+    rng = np.random.default_rng(0)
+    # colunas reais: poucos valores distintos, muitos repetidos + alguns únicos
+    precos = [f"{v:.2f}".replace(".", ",") for v in rng.uniform(0, 500, n // 20)]
+    base = np.array(AMOSTRA_NUM + precos, dtype=object)
+    serie = pd.Series(base[rng.integers(0, len(base), n)], dtype=object)
+    texto = serie.where(serie.map(type) == str, "").astype(str)
+
+    _conferir("to_num (misto)", to_num, to_num_series, serie)
+    _conferir("to_num (texto)", to_num, to_num_series, texto)
+    _conferir("safe_cost", safe_cost, safe_cost_series, texto)
+
+    # datas: histórico de Vendas tem poucas datas distintas e muitas linhas
+    dias = pd.date_range("2022-01-01", periods=n // 200, freq="D").strftime("%d/%m/%Y").tolist()
+    base_d = np.array(AMOSTRA_DATA + dias, dtype=object)
+    datas = pd.Series(base_d[rng.integers(0, len(base_d), n)], dtype=object)
+    _conferir("parse_date", _data_celula, parse_date_series, datas)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,74 @@
+# benchmarks/bench_estoque.py — razão de estoque vetorizado × laço iterrows antigo
+# -*- coding: utf-8 -*-
+"""
+Confere que calcular_estoque (ledger_estoque) dá o mesmo saldo do laço antigo
+numa amostra e mede o tempo com 1 milhão de movimentos.
+
+    python benchmarks/bench_estoque.py [linhas]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.sheets import calcular_estoque, ledger_estoque, norm_tipo_mov, to_num  # noqa: E402
+
+TIPOS = ["Entrada", "B saída", "saida", "Venda", "Compra", "Ajuste", "Contagem",
+         "Fracionamento +", "Fracionamento -", "Estorno", "Baixa", "ajuste ", "Inventário", "?", ""]
+QTDS  = ["1", "2", "3", "10", "0,5", "1,25", "-2", "", "abc", "(1)"]
+
+
+def _estoque_iterrows(df_mov: pd.DataFrame) -> dict[str, float]:
+    """O laço que existia em calcular_estoque / 00_Vendas._build_catalogo."""
+    saldo: dict[str, float] = {}
+    for _, r in df_mov.iterrows():
+        pid = str(r.get("IDProduto", "")).strip()
+        if not pid:
+            continue
+        tipo = norm_tipo_mov(r.get("Tipo", ""))
+        qtd  = to_num(r.get("Qtd", 0))
+        cur  = saldo.get(pid, 0.0)
+        if tipo == "entrada":
+            saldo[pid] = cur + qtd
+        elif tipo == "saida":
+            saldo[pid] = cur - qtd
+        elif tipo == "ajuste":
+            saldo[pid] = cur + qtd
+    return saldo
+
+
+def _movimentos(n: int, rng) -> pd.DataFrame:
+    ids = np.array([str(i) for i in range(1, 3001)] + ["", " 42 "], dtype=object)
+    return pd.DataFrame({
+        "Data": "01/01/2025",
+        "IDProduto": ids[rng.integers(0, len(ids), n)],
+        "Produto": "x",
+        "Tipo": np.array(TIPOS, dtype=object)[rng.integers(0, len(TIPOS), n)],
+        "Qtd": np.array(QTDS, dtype=object)[rng.integers(0, len(QTDS), n)],
+    })
+
+
+def main(n: int = 1_000_000) -> None:
+    rng = np.random.default_rng(0)
+
+    amostra = _movimentos(50_000, rng)
+    t0 = time.perf_counter(); antigo = _estoque_iterrows(amostra); t_antigo = time.perf_counter() - t0
+    t0 = time.perf_counter(); novo = calcular_estoque(amostra); t_novo = time.perf_counter() - t0
+    if antigo != novo or list(antigo) != list(novo):
+        raise SystemExit("❌ calcular_estoque difere do laço iterrows")
+    print(f"{len(amostra):>9,} movimentos   iterrows {t_antigo*1000:9.1f} ms"
+          f"   vetorizado {t_novo*1000:7.1f} ms   ×{t_antigo / max(t_novo, 1e-9):6.1f}")
+
+    grande = _movimentos(n, rng)
+    t0 = time.perf_counter(); led = ledger_estoque(grande); t = time.perf_counter() - t0
+    print(f"{n:>9,} movimentos   ledger_estoque {t*1000:7.1f} ms   ({len(led):,} produtos)")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
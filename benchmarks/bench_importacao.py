@@ -0,0 +1,89 @@
+# benchmarks/bench_importacao.py — orçamento de tempo de import por página (cold start)
+# -*- coding: utf-8 -*-
+"""
+Para cada página (app.py + pages/*.py) roda os imports de nível de módulo num
+interpretador novo com `python -X importtime` e soma o tempo cumulativo dos
+módulos de topo. Também mede o que ficou adiado com preguicoso("...") — custo
+que só aparece no primeiro uso, depois da primeira pintura.
+
+    python benchmarks/bench_importacao.py [orcamento_ms]
+
+Sai com código 1 se alguma página passar do orçamento (padrão 1500 ms).
+"""
+from __future__ import annotations
+
+import ast
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+RAIZ = Path(__file__).resolve().parents[1]
+ORCAMENTO_MS = 1500.0
+
+_RE_LINHA = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def _imports_da_pagina(arq: Path) -> tuple[list[str], list[str]]:
+    """(comandos import de nível de módulo, módulos adiados via preguicoso)."""
+    arvore = ast.parse(arq.read_text(encoding="utf-8"))
+    imports, adiados = [], []
+    for no in arvore.body:
+        if isinstance(no, (ast.Import, ast.ImportFrom)):
+            if isinstance(no, ast.ImportFrom) and no.module == "__future__":
+                continue
+            imports.append(ast.unparse(no))
+    for no in ast.walk(arvore):
+        if (isinstance(no, ast.Call) and isinstance(no.func, ast.Name) and no.func.id == "preguicoso"
+                and no.args and isinstance(no.args[0], ast.Constant)):
+            adiados.append(no.args[0].value)
+    return imports, adiados
+
+
+def _importtime(codigo: str) -> list[tuple[float, str]]:
+    """[(ms cumulativo, módulo)] dos imports de topo de `codigo` num interpretador novo."""
+    r = subprocess.run([sys.executable, "-X", "importtime", "-c", codigo],
+                       cwd=RAIZ, capture_output=True, text=True)
+    if r.returncode != 0:
+        raise RuntimeError(r.stderr.strip().splitlines()[-1] if r.stderr.strip() else "falhou")
+    topo = []
+    for linha in r.stderr.splitlines():
+        m = _RE_LINHA.match(linha)
+        if m and len(m.group(3)) == 1:  # sem recuo extra = importado direto pelo código
+            topo.append((int(m.group(2)) / 1000, m.group(4)))
+    return topo
+
+
+_PARTIDA: set[str] = set()  # módulos que o interpretador já importa sozinho (site, encodings…)
+
+
+def _medir(codigo: str) -> tuple[float, list[tuple[float, str]]]:
+    """ms totais dos imports de topo + [(ms, módulo)] dos mais caros."""
+    if not _PARTIDA:
+        _PARTIDA.update(m for _, m in _importtime("pass"))
+    topo = [(ms, m) for ms, m in _importtime(codigo) if m not in _PARTIDA]
+    return sum(ms for ms, _ in topo), sorted(topo, reverse=True)[:3]
+
+
+def main(orcamento: float = ORCAMENTO_MS) -> None:
+    paginas = [RAIZ / "app.py"] + sorted((RAIZ / "pages").glob("*.py"))
+    estourou = False
+    for arq in paginas:
+        imports, adiados = _imports_da_pagina(arq)
+        try:
+            total, caros = _medir("\n".join(imports))
+        except RuntimeError as e:
+            print(f"{arq.name:<38} ❌ {e}")
+            estourou = True
+            continue
+        adiado = _medir("\n".join(f"import {m}" for m in adiados))[0] if adiados else 0.0
+        marca = "✅" if total <= orcamento else "❌"
+        estourou |= total > orcamento
+        print(f"{arq.name:<38} {marca} {total:8.1f} ms   adiado {adiado:7.1f} ms   "
+              + ", ".join(f"{m} {ms:.0f}" for ms, m in caros))
+    if estourou:
+        raise SystemExit(f"❌ página acima do orçamento de {orcamento:.0f} ms")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else ORCAMENTO_MS)
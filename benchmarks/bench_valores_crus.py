@@ -0,0 +1,90 @@
+# benchmarks/bench_valores_crus.py — leitura formatada × sem formatação (UNFORMATTED_VALUE)
+# -*- coding: utf-8 -*-
+"""
+Monta as abas com esquema (Vendas, Compras, MovimentosEstoque, Produtos) nos dois
+formatos que a API devolve — textos formatados pt-BR ("1.234,56", "14/04/2026") e
+valores sem formatação (números, datas como serial) — e:
+
+  1. confere que o frame tipado montado direto dos valores é o MESMO do _tipar
+     sobre os textos, e que o frame cru (shim) lê igual nas páginas (to_num);
+  2. mede json.loads + frame cru + frame tipado em cada modo.
+
+    python benchmarks/bench_valores_crus.py [linhas]    # padrão: 60 mil por aba
+"""
+from __future__ import annotations
+
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.sheets import (  # noqa: E402
+    COLS, DATA, ESQUEMAS, NUMERO, _df_de_crus, _df_de_valores, _tipada_de, _tipar, mapear_colunas,
+    to_num_series,
+)
+
+SERIAL_2023 = 44927  # 01/01/2023
+
+
+def _br(v: float) -> str:
+    """Formato "#.##0,00" da planilha: 1453 → "1.453,00"."""
+    return f"{v:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".")
+
+
+def _aba(nome: str, n: int, rng) -> tuple[list[list], list[list]]:
+    """(matriz formatada, matriz sem formatação) com os tipos do esquema em cada coluna."""
+    tipos = {c: ESQUEMAS[nome][canon][0] for canon, c in mapear_colunas(nome, COLS[nome]).items()}
+    fmt, cru = [], []
+    for c in COLS[nome]:
+        t = tipos.get(c)
+        if t == DATA:
+            dias = rng.integers(0, 3 * 365, n) + SERIAL_2023  # o app grava só a data
+            cru.append(dias.tolist())
+            fmt.append(pd.to_datetime(dias, unit="D", origin="1899-12-30").strftime("%d/%m/%Y").tolist())
+        elif t == NUMERO:
+            v = np.round(rng.uniform(0, 2500, n), 2) if rng.random() < 0.5 else rng.integers(1, 12, n)
+            cru.append(v.tolist())
+            fmt.append([_br(float(x)) for x in v])
+        else:
+            txt = [f"{c[:3]}-{int(i)}" for i in rng.integers(0, max(2, n // 20), n)]
+            cru.append(txt)
+            fmt.append(txt)
+    return [COLS[nome]] + [list(r) for r in zip(*fmt)], [COLS[nome]] + [list(r) for r in zip(*cru)]
+
+
+def _medir(corpo: bytes, montar) -> tuple[float, dict]:
+    t0 = time.perf_counter()
+    out = {vr["range"]: montar(vr["range"], vr["values"]) for vr in json.loads(corpo)["valueRanges"]}
+    return time.perf_counter() - t0, out
+
+
+def main(n: int = 60_000) -> None:
+    rng = np.random.default_rng(0)
+    abas = {nome: _aba(nome, n if nome != "Produtos" else max(1, n // 40), rng) for nome in ESQUEMAS}
+    corpo_fmt = json.dumps({"valueRanges": [{"range": k, "values": f} for k, (f, _) in abas.items()]}).encode()
+    corpo_cru = json.dumps({"valueRanges": [{"range": k, "values": c} for k, (_, c) in abas.items()]}).encode()
+    print(f"{sum(len(f) - 1 for f, _ in abas.values()):,} linhas   resposta formatada "
+          f"{len(corpo_fmt) / 2**20:.1f} MB   sem formatação {len(corpo_cru) / 2**20:.1f} MB")
+
+    t_fmt, fmt = _medir(corpo_fmt, lambda k, v: (lambda df: (df, _tipar(k, df)))(_df_de_valores(k, v)))
+    t_cru, cru = _medir(corpo_cru, lambda k, v: (lambda df: (df, _tipada_de(df)))(_df_de_crus(k, v)))
+    print(f"formatado       json + frame cru + tipado  {t_fmt * 1000:8.1f} ms")
+    print(f"sem formatação  json + frame cru + tipado  {t_cru * 1000:8.1f} ms   ({t_fmt / t_cru:.1f}x)")
+
+    for nome in ESQUEMAS:
+        (a, ta), (b, tb) = fmt[nome], cru[nome]
+        pd.testing.assert_frame_equal(ta.astype({c: "datetime64[ns]" for c in ta.select_dtypes("datetime")}),
+                                      tb, check_categorical=False)
+        for c in a.columns:
+            if not a[c].equals(b[c]):
+                pd.testing.assert_series_equal(to_num_series(a[c]), to_num_series(b[c]))
+    print("✅ frames tipados iguais; frame cru lê igual nas páginas")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 60_000)
@@ -0,0 +1,180 @@
+# benchmarks/bench_xlsx.py — releitura completa: export XLSX × API de valores
+# -*- coding: utf-8 -*-
+"""
+Monta uma planilha sintética do tamanho de alguns anos de loja (Vendas,
+MovimentosEstoque, Compras, Produtos, Fiado…), grava como XLSX em memória e:
+
+  1. confere que o caminho XLSX dá as MESMAS abas tipadas (ESQUEMAS) que a
+     matriz de textos formatados que a API devolveria;
+  2. mede o trabalho local de cada caminho — json.loads + _df_de_valores da
+     resposta da API × openpyxl (read_only) + _df_de_valores — e o tamanho
+     do que viaja pela rede.
+
+    python benchmarks/bench_xlsx.py [escala]          # 1.0 ≈ 60 mil vendas
+    python benchmarks/bench_xlsx.py --ao-vivo         # planilha dos secrets
+
+--ao-vivo mede a rede de verdade: values_get aba a aba, values_batch_get e
+exportar_xlsx + leitura (precisa de .streamlit/secrets.toml).
+"""
+from __future__ import annotations
+
+import io
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.sheets import COLS, ESQUEMAS, _df_de_valores, _tipar  # noqa: E402
+from utils.xlsx import ler_xlsx  # noqa: E402
+
+LINHAS = {  # escala 1.0
+    "Vendas": 60_000, "MovimentosEstoque": 90_000, "Compras": 5_000, "Produtos": 1_500,
+    "Clientes": 500, "Fiado": 3_000, "Fiado_Pagamentos": 1_500,
+}
+FORMAS = ["Dinheiro", "Pix", "Cartão Débito", "Cartão Crédito", "Fiado"]
+TIPOS = ["B entrada", "B saída", "Ajuste", "saida", "entrada"]
+
+
+def _br(v: float) -> str:
+    """Número como o Sheets (pt-BR) mostra numa célula sem formato fixo."""
+    return f"{v:,.2f}".replace(",", "_").replace(".", ",").replace("_", ".").rstrip("0").rstrip(",")
+
+
+def _colunas(nome: str, n: int, rng) -> dict[str, list]:
+    """Valores tipados (o que vai para o XLSX) por coluna do cabeçalho da aba."""
+    base = datetime(2023, 1, 1)
+    datas = [base + timedelta(days=int(d)) for d in rng.integers(0, 3 * 365, n)]
+    pids = [f"P{int(i):04d}" for i in rng.integers(0, 1500, n)]
+    qtd = [float(q) for q in rng.integers(1, 12, n)]
+    preco = [float(p) for p in np.round(rng.uniform(1, 250, n), 2)]
+    txt = [f"obs {int(i)}" if i % 7 == 0 else None for i in rng.integers(0, 1000, n)]
+    cols: dict[str, list] = {}
+    for c in COLS[nome]:
+        lc = c.lower()
+        if "data" in lc or "vencimento" in lc:
+            cols[c] = datas
+        elif lc in ("idproduto", "id") and nome != "Produtos":
+            cols[c] = pids if lc == "idproduto" else [f"{nome[:2].upper()}-{i}" for i in range(n)]
+        elif lc == "id":
+            cols[c] = [f"P{i:04d}" for i in range(n)]
+        elif lc in ("qtd", "estoquemin", "leadtimedias"):
+            cols[c] = qtd
+        elif any(k in lc for k in ("preco", "preço", "total", "custo", "valor", "desconto", "frete")):
+            cols[c] = preco
+        elif "forma" in lc:
+            cols[c] = [FORMAS[int(i)] for i in rng.integers(0, len(FORMAS), n)]
+        elif lc == "tipo":
+            cols[c] = [TIPOS[int(i)] for i in rng.integers(0, len(TIPOS), n)]
+        elif lc == "vendaid":
+            cols[c] = [f"V-{int(i)}" for i in rng.integers(0, n // 2, n)]
+        else:
+            cols[c] = txt
+    return cols
+
+
+def _texto_api(v) -> str:
+    if v is None:
+        return ""
+    if isinstance(v, datetime):
+        return v.strftime("%d/%m/%Y")
+    if isinstance(v, float):
+        return _br(v)
+    return str(v)
+
+
+def _planilha(escala: float, rng) -> tuple[bytes, dict[str, list[list[str]]]]:
+    """(XLSX em bytes, {aba: matriz de textos que a API devolveria})."""
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    api: dict[str, list[list[str]]] = {}
+    for nome, n in LINHAS.items():
+        n = max(1, int(n * escala))
+        cols = _colunas(nome, n, rng)
+        ws = wb.create_sheet(nome)
+        ws.append(COLS[nome])
+        matriz = [list(COLS[nome])]
+        for linha in zip(*cols.values()):
+            ws.append(list(linha))
+            r = [_texto_api(v) for v in linha]
+            while r and r[-1] == "":
+                r.pop()
+            matriz.append(r)
+        api[nome] = matriz
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue(), api
+
+
+def _conferir(api: dict, xlsx: dict) -> None:
+    for nome in api:
+        a, b = _df_de_valores(nome, api[nome]), _df_de_valores(nome, xlsx[nome])
+        if list(a.columns) != list(b.columns) or not a.index.equals(b.index):
+            raise SystemExit(f"❌ {nome}: colunas/linhas diferentes")
+        if nome in ESQUEMAS:
+            pd.testing.assert_frame_equal(_tipar(nome, a), _tipar(nome, b), check_categorical=False)
+    print(f"✅ caminho XLSX = caminho API nas abas tipadas ({', '.join(n for n in api if n in ESQUEMAS)})")
+
+
+def offline(escala: float = 1.0) -> None:
+    rng = np.random.default_rng(0)
+    conteudo, api = _planilha(escala, rng)
+    corpo = json.dumps({"valueRanges": [{"values": m} for m in api.values()]}, ensure_ascii=False).encode("utf-8")
+    total = sum(len(m) - 1 for m in api.values())
+    print(f"{total:,} linhas em {len(api)} abas   resposta da API {len(corpo) / 2**20:6.1f} MB"
+          f"   XLSX {len(conteudo) / 2**20:6.1f} MB")
+
+    t0 = time.perf_counter()
+    lote = json.loads(corpo)["valueRanges"]
+    dfs_api = {n: _df_de_valores(n, vr["values"]) for n, vr in zip(api, lote)}
+    t_api = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    matrizes = ler_xlsx(conteudo)
+    t_ler = time.perf_counter() - t0
+    dfs_xlsx = {n: _df_de_valores(n, matrizes[n]) for n in api}
+    t_xlsx = time.perf_counter() - t0
+
+    print(f"API  json.loads + DataFrames        {t_api * 1000:9.1f} ms")
+    print(f"XLSX openpyxl read_only + DataFrames {t_xlsx * 1000:8.1f} ms   (openpyxl {t_ler * 1000:.0f} ms)")
+    assert set(dfs_api) == set(dfs_xlsx)
+    _conferir(api, matrizes)
+
+
+def ao_vivo() -> None:
+    from utils.sheets import _intervalo_aba, exportar_xlsx, sheet
+
+    sh = sheet()
+    nomes = [w.title for w in sh.worksheets()]
+    t0 = time.perf_counter()
+    for n in nomes:
+        sh.values_get(_intervalo_aba(n))
+    t_uma = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    sh.values_batch_get([_intervalo_aba(n) for n in nomes])
+    t_lote = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    conteudo = exportar_xlsx()
+    t_export = time.perf_counter() - t0
+    matrizes = ler_xlsx(conteudo)
+    for n, m in matrizes.items():
+        _df_de_valores(n, m)
+    t_xlsx = time.perf_counter() - t0
+    print(f"{len(nomes)} abas")
+    print(f"values_get aba a aba        {t_uma:7.2f} s")
+    print(f"values_batch_get            {t_lote:7.2f} s")
+    print(f"export XLSX + leitura       {t_xlsx:7.2f} s   (download {t_export:.2f} s, {len(conteudo) / 2**20:.1f} MB)")
+    print("→ SHEETS_XLSX_ABAS nos secrets liga o export quando o lote tiver pelo menos N abas inteiras")
+
+
+if __name__ == "__main__":
+    if "--ao-vivo" in sys.argv:
+        ao_vivo()
+    else:
+        offline(float(sys.argv[1]) if len(sys.argv) > 1 else 1.0)
@@ -8,14 +8,15 @@ from typing import Optional
 import pandas as pd
 import streamlit as st
 import gspread
-from gspread_dataframe import get_as_dataframe
-from google.oauth2.service_account import Credentials
-import plotly.express as px
+
+from utils.bootstrap import configurar_pagina, preguicoso
+
+px = preguicoso("plotly.express")
 
 # =========================
 # Config
 # =========================
-st.set_page_config(page_title="Fiado", page_icon="💳", layout="wide")
+configurar_pagina("Fiado", "💳")
 
 st.markdown("""
 <style>
@@ -180,8 +181,8 @@ PALETTE    = ["#636EFA","#EF553B","#00CC96","#AB63FA","#FFA15A","#19D3F3","#FF66
 # Helpers
 from utils.sheets import (
     sheet, carregar_aba, garantir_aba, append_rows,
-    to_num, brl, safe_cost, first_col, fmt_num,
-    norm_tipo_mov, calcular_estoque, tg_send, tg_media, gerar_id, parse_date,
+    to_num, to_num_series, brl, safe_cost, first_col, fmt_num,
+    norm_tipo_mov, calcular_estoque, tg_send, tg_media, gerar_id, parse_date, parse_date_series,
 )
 _to_num = to_num; _to_float = to_num; _brl = brl; _fmt_brl = brl
 _first_col = first_col; _fmt_num = fmt_num; _parse_date_any = parse_date
@@ -194,14 +195,10 @@ def _canon_id(x):
 def conectar_sheets(): return sheet()
 
 
-@st.cache_data(ttl=30, show_spinner=False)
 def load_df(aba):
-    sh = conectar_sheets()
-    try: ws = sh.worksheet(aba)
-    except gspread.WorksheetNotFound:
+    df = carregar_aba(aba)
+    if df.columns.empty:
         st.error(f"🛑 Aba '{aba}' não encontrada."); st.stop()
-    df = get_as_dataframe(ws, evaluate_formulas=True, dtype=str, header=0).dropna(how="all")
-    df.columns = [c.strip() for c in df.columns]
     base = {ABA_FIADO: COLS_FIADO, ABA_PAGT: COLS_PAGT}[aba]
     for c in base:
         if c not in df.columns: df[c] = ""
@@ -213,13 +210,13 @@ def load_df(aba):
 df_fiado = load_df(ABA_FIADO)
 df_pagt  = load_df(ABA_PAGT)
 
-df_fiado["ValorNum"]    = df_fiado["Valor"].apply(_to_float)
-df_fiado["ValorPagoNum"]= df_fiado["ValorPago"].apply(_to_float)
-df_fiado["Data_d"]      = df_fiado["Data"].apply(_to_date)
-df_fiado["Venc_d"]      = df_fiado["Vencimento"].apply(_to_date)
+df_fiado["ValorNum"]    = to_num_series(df_fiado["Valor"])
+df_fiado["ValorPagoNum"]= to_num_series(df_fiado["ValorPago"])
+df_fiado["Data_d"]      = parse_date_series(df_fiado["Data"])
+df_fiado["Venc_d"]      = parse_date_series(df_fiado["Vencimento"])
 df_fiado["Status_norm"] = df_fiado["Status"].astype(str).str.strip().str.lower()
-df_pagt["TotalPagoNum"] = df_pagt["TotalPago"].apply(_to_float)
-df_pagt["DataPag_d"]    = df_pagt["DataPagamento"].apply(_to_date)
+df_pagt["TotalPagoNum"] = to_num_series(df_pagt["TotalPago"])
+df_pagt["DataPag_d"]    = parse_date_series(df_pagt["DataPagamento"])
 
 hoje = date.today()
 
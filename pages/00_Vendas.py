@@ -8,40 +8,17 @@ from typing import Any, Dict, List, Tuple
 
 import gspread
 import pandas as pd
-import requests
 import streamlit as st
-from google.oauth2.service_account import Credentials
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
+
+from utils.bootstrap import configurar_pagina
 
 # ──────────────────────────────────────────────
 #  CONFIG & TEMA
 # ──────────────────────────────────────────────
-import pathlib
-_cfg = pathlib.Path(".streamlit"); _cfg.mkdir(exist_ok=True)
-(_cfg / "config.toml").write_text('[theme]\nbase = "dark"\n')
-
-st.set_page_config(page_title="Vendas", page_icon="🧾", layout="wide",
-                   initial_sidebar_state="collapsed")
+configurar_pagina("Vendas", "🧾", barra_lateral="collapsed", estilo_base=True)
 
 st.markdown("""
 <style>
-@import url('https://fonts.googleapis.com/css2?family=Nunito:wght@400;600;700;800;900&family=DM+Sans:wght@300;400;500&display=swap');
-html, body, [class*="css"] { font-family: 'DM Sans', sans-serif; }
-
-.page-header {
-    background: linear-gradient(135deg, #1a1a2e 0%, #16213e 60%, #0f3460 100%);
-    border-radius: 20px; padding: 24px 32px; margin-bottom: 24px;
-    display: flex; align-items: center; justify-content: space-between;
-    box-shadow: 0 8px 32px rgba(15,52,96,0.25);
-}
-.page-header h1 { font-family:'Nunito',sans-serif; font-weight:900; font-size:1.7rem; color:#fff; margin:0; }
-.page-header .sub { font-size:0.82rem; color:rgba(255,255,255,0.5); margin-top:4px; }
-.header-badge {
-    background:rgba(255,255,255,0.1); border:1px solid rgba(255,255,255,0.2);
-    border-radius:50px; padding:8px 18px; color:#fff; font-size:0.82rem;
-    font-weight:600; backdrop-filter:blur(10px);
-}
-
 /* Seção título */
 .sec-titulo {
     font-family:'Nunito',sans-serif; font-weight:800; font-size:1.05rem;
@@ -130,11 +107,12 @@ div[data-testid="stNumberInput"] input { border-radius:10px !important; }
 #  CONEXÃO / HELPERS  (centralizados em utils/sheets.py)
 # ──────────────────────────────────────────────
 from utils.sheets import (
-    sheet, carregar_aba, garantir_aba, append_rows,
-    to_num, brl, safe_cost, first_col, fmt_num,
-    norm_tipo_mov, calcular_estoque, tg_send, tg_media, gerar_id, parse_date,
-    ABA_PROD, ABA_VEND, ABA_COMP, ABA_MOVS, ABA_CLIEN, ABA_FIADO, ABA_FPAGT,
+    sheet, carregar_aba, carregar_tipada, garantir_aba, append_rows, cache_por_aba, selo_dados, ja_gravado,
+    to_num, to_num_series, brl, safe_cost, first_col, fmt_num,
+    norm_tipo_mov, calcular_estoque, saldos_estoque, tg_send, tg_media, gerar_id, parse_date,
+    ABA_PROD, ABA_VEND, ABA_COMP, ABA_MOVS, ABA_CLIEN, ABA_FIADO, ABA_FPAGT, COLS,
 )
+from utils.outbox import enfileirar, enfileirar_telegram, painel_fila
 # Aliases de compatibilidade
 _to_num = to_num; _to_float = to_num; _brl = brl; _fmt_brl = brl
 _first_col = first_col; _fmt_num = fmt_num; _parse_date_any = parse_date
@@ -175,14 +153,13 @@ def _carregar_clientes():
 def _ensure_cliente(nome):
     nome = _norm_cli(nome)
     if not nome: return
-    sh = conectar_sheets()
-    ws = _garantir_aba(sh, ABA_CLIENTES, ["Cliente","Telefone","Obs"])
     try: dfc = carregar_aba(ABA_CLIENTES)
     except: dfc = pd.DataFrame(columns=["Cliente","Telefone","Obs"])
     if not dfc.empty:
         col = "Cliente" if "Cliente" in dfc.columns else dfc.columns[0]
         if any(_cli_key(r) == _cli_key(nome) for r in dfc[col].dropna().astype(str)): return
-    _append_rows(ws, [{"Cliente":nome,"Telefone":"","Obs":""}])
+    enfileirar(ABA_CLIENTES, [{"Cliente":nome,"Telefone":"","Obs":""}],
+               chave=nome, coluna_chave="Cliente", colunas=["Cliente","Telefone","Obs"])
 
 
 # ──────────────────────────────────────────────
@@ -192,8 +169,9 @@ ABA_PROD, ABA_VEND = "Produtos", "Vendas"
 ABA_COMPRAS, ABA_AJUSTES, ABA_MOVS, ABA_FIADO = "Compras","Ajustes","MovimentosEstoque","Fiado"
 COLS_FIADO = ["ID","Data","Cliente","Valor","Vencimento","Status","Obs","DataPagamento","FormaPagamento","ValorPago"]
 
-@st.cache_data(ttl=30, show_spinner=False)
+@cache_por_aba(ABA_PROD, ABA_MOVS)
 def _build_catalogo():
+    # refeito só quando Produtos ou MovimentosEstoque mudam (ex.: venda gravada)
     try: dfp = carregar_aba(ABA_PROD)
     except: st.error("Erro ao abrir aba Produtos."); st.stop()
 
@@ -225,47 +203,17 @@ def _build_catalogo():
     id_img: Dict[str,str]   = {}
     id_emin: Dict[str,float] = {}
 
-    for _, r in dfp.iterrows():
-        pid = str(r[col_id]).strip()
-        if not pid: continue
-        id_nome[pid]  = str(r.get(col_nome,"") or "").strip()
-        if col_custo: id_custo[pid] = _to_num(r.get(col_custo))
-        if col_foto:  id_img[pid]   = str(r.get(col_foto,"") or "").strip()
-        if col_emin:  id_emin[pid]  = _to_num(r.get(col_emin))
+    pids = dfp[col_id].astype(str).str.strip()
+    tem  = (pids != "").to_numpy()
+    ids  = pids.to_numpy()[tem]
+    id_nome = dict(zip(ids, dfp[col_nome].astype(str).str.strip().to_numpy()[tem]))
+    if col_custo: id_custo = dict(zip(ids, to_num_series(dfp[col_custo]).to_numpy()[tem]))
+    if col_foto:  id_img   = dict(zip(ids, dfp[col_foto].astype(str).str.strip().to_numpy()[tem]))
+    if col_emin:  id_emin  = dict(zip(ids, to_num_series(dfp[col_emin]).to_numpy()[tem]))
 
     # ── Estoque — lê MovimentosEstoque (mesma fonte que Contagem de Estoque) ──
-    def _norm_tipo_mov(t: str) -> str:
-        """Classifica o tipo de movimento igual ao 05_Contagem_Estoque."""
-        import re as _re
-        raw = str(t or ""); low = "".join(ch for ch in unicodedata.normalize("NFKD", raw.lower()) if unicodedata.category(ch) != "Mn")
-        if "fracion" in low:
-            return "entrada" if "+" in raw else "saida" if "-" in raw else "outro"
-        lowc = _re.sub(r"[^a-z]","",low)
-        if "contagem" in lowc or "inventario" in lowc: return "ajuste"
-        if "entrada" in lowc or "compra" in lowc or "estorno" in lowc: return "entrada"
-        if "saida"   in lowc or "venda"  in lowc or "baixa"   in lowc: return "saida"
-        if "ajuste"  in lowc: return "ajuste"
-        return "outro"
-
     id_stock: Dict[str,float] = {}
-    try:
-        dmov = carregar_aba(ABA_MOVS)
-        c_pid  = _first_col(dmov, ["IDProduto","ProdutoID","ID"])
-        c_qtd  = _first_col(dmov, ["Qtd","Quantidade"])
-        c_tipo = _first_col(dmov, ["Tipo","tipo"])
-        if c_pid and c_qtd and c_tipo:
-            for _, r in dmov.iterrows():
-                pid   = str(r.get(c_pid,"")).strip()
-                if not pid: continue
-                tipo  = _norm_tipo_mov(r.get(c_tipo,""))
-                qtd   = _to_num(r.get(c_qtd))
-                cur   = id_stock.get(pid, 0.0)
-                if tipo == "entrada":
-                    id_stock[pid] = cur + qtd
-                elif tipo == "saida":
-                    id_stock[pid] = cur - qtd
-                elif tipo == "ajuste":
-                    id_stock[pid] = cur + qtd
+    try: id_stock = saldos_estoque()["Saldo"].to_dict()
     except: pass
 
     return dfp, cat_map, labels, id_nome, id_custo, id_stock, col_id, col_nome, col_preco, col_unid, id_img, id_emin
@@ -310,7 +258,7 @@ st.markdown(f"""
 <div class="page-header">
   <div>
     <h1>🧾 Vendas Rápidas</h1>
-    <div class="sub">Ebenezér Variedades · {datetime.now().strftime("%d/%m/%Y")}</div>
+    <div class="sub">Ebenezér Variedades · {datetime.now().strftime("%d/%m/%Y")} · {selo_dados([ABA_PROD, ABA_MOVS])}</div>
   </div>
   <div class="header-badge">🛒 {n_cart} {"item" if n_cart==1 else "itens"} · {_brl(total_cart)}</div>
 </div>
@@ -505,7 +453,8 @@ with col_dir:
     btn_limpar    = col_btn2.button("🧹  Limpar", use_container_width=True)
 
     if btn_limpar:
-        _ss["cart"] = []; st.info("Carrinho limpo."); _rerun()
+        _ss["cart"] = []; _ss.pop("venda_pendente", None)
+        st.info("Carrinho limpo."); _rerun()
 
     # ── Registrar venda ──
     if btn_registrar:
@@ -517,33 +466,29 @@ with col_dir:
             cli_nome = _ss["cliente"].strip()
             if cli_nome: _ensure_cliente(cli_nome)
 
-            sh = conectar_sheets()
-            try: ws_v = sh.worksheet(ABA_VEND)
-            except:
-                ws_v = sh.add_worksheet(title=ABA_VEND, rows=2000, cols=20)
-                ws_v.update("A1:K1",[["Data","VendaID","IDProduto","Qtd","PrecoUnit","TotalLinha",
-                                       "FormaPagto","Obs","Desconto","TotalCupom","CupomStatus"]])
-
-            ws_v = garantir_aba(ABA_VEND)
-
-            try: ws_m = sh.worksheet(ABA_MOVS)
-            except: ws_m = _garantir_aba(sh, ABA_MOVS,
-                ["Data","IDProduto","Produto","Tipo","Qtd","Obs","ID","Documento/NF","Origem","SaldoApós"])
-
-            venda_id  = "V-" + datetime.now().strftime("%Y%m%d%H%M%S")
+            # tudo vai para a fila local (outbox) — o envio ao Sheets/Telegram é em segundo plano.
+            # Os IDs ficam fixos até o carrinho ser registrado/limpo: clique duplo (ou rerun
+            # interrompido) repete o MESMO VendaID e o índice de idempotência barra a cópia.
+            pend = _ss.setdefault("venda_pendente", {
+                "venda_id": _gerar_id("V"),
+                "fiado_id": _gerar_id("F"),
+            })
+            venda_id  = pend["venda_id"]
+            if ja_gravado(ABA_VEND, venda_id):
+                _ss["cart"] = []; _ss.pop("venda_pendente", None)
+                st.warning("Venda já registrada (clique duplo?)."); st.stop()
             data_str  = _ss["data_venda"].strftime("%d/%m/%Y")
             desconto  = float(_ss["desc"])
             tot_cupom = max(0.0, total_bruto - desconto)
 
-            # Fiado
-            fiado_id = ""; fiado_msg = ""
+            # Fiado (entra na fila só depois da venda — ver abaixo)
+            fiado_id = ""; fiado_msg = ""; fiado = []
             if _ss["forma"] == "Fiado":
-                ws_f   = _garantir_aba(sh, ABA_FIADO, COLS_FIADO)
-                fiado_id = _gerar_id("F")
+                fiado_id = pend["fiado_id"]
                 venc_s = _ss["venc_fiado"].strftime("%d/%m/%Y") if isinstance(_ss["venc_fiado"], date) else ""
-                _append_rows(ws_f, [{"ID":fiado_id,"Data":data_str,"Cliente":cli_nome,
+                fiado = [{"ID":fiado_id,"Data":data_str,"Cliente":cli_nome,
                     "Valor":float(tot_cupom),"Vencimento":venc_s,"Status":"Em aberto",
-                    "Obs":_ss.get("obs",""),"DataPagamento":"","FormaPagamento":"","ValorPago":""}])
+                    "Obs":_ss.get("obs",""),"DataPagamento":"","FormaPagamento":"","ValorPago":""}]
                 fiado_msg = f"\n💳 <b>Fiado</b> — <b>{cli_nome}</b> · venc: {venc_s}"
 
             novas = []; movs = []
@@ -573,8 +518,12 @@ with col_dir:
                     "ID":venda_id,"Documento/NF":"","Origem":"Vendas rápidas",
                     "SaldoApós":str(int(aft))})
 
-            append_rows(ws_v, novas)
-            append_rows(ws_m, movs)
+            # a chave da venda decide: repetida (clique duplo) → nada de fiado/movimento novo
+            if not enfileirar(ABA_VEND, novas, chave=venda_id, coluna_chave="VendaID", colunas=COLS[ABA_VEND]):
+                _ss["cart"] = []; _ss.pop("venda_pendente", None)
+                st.warning("Venda já registrada (clique duplo?)."); st.stop()
+            enfileirar(ABA_FIADO, fiado, chave=fiado_id, coluna_chave="ID", colunas=COLS_FIADO)
+            enfileirar(ABA_MOVS, movs, chave=venda_id, coluna_chave="ID", colunas=COLS[ABA_MOVS])
 
             # Telegram
             media_tg = []
@@ -585,66 +534,49 @@ with col_dir:
                 bef, aft = sba.get(pid,("–","–"))
                 cap = f"{id_nome.get(pid,pid)}\nx{it['qtd']} @ R$ {it['preco']:.2f} = <b>R$ {it['qtd']*it['preco']:.2f}</b>\nEstoque: {int(bef) if bef!='–' else '–'} → <b>{int(aft) if aft!='–' else '–'}</b>"
                 media_tg.append({"type":"photo","media":foto,"caption":cap.replace(".",","),"parse_mode":"HTML"})
-            if media_tg: _tg_media(media_tg)
 
             itens_txt = "\n".join(
                 f"• <b>{id_nome.get(str(x['IDProduto']),str(x['IDProduto']))}</b> — x{x['Qtd']} @ {_brl(_to_num(x['PrecoUnit']))} = <b>{_brl(_to_num(x['Qtd'])*_to_num(x['PrecoUnit']))}</b>"
                 for x in novas)
-            _tg_send(
+            enfileirar_telegram(media=media_tg, msg=(
                 f"🧾 <b>Venda registrada</b>\n{data_str}\nForma: <b>{_ss['forma']}</b>"
                 + (f"\n👤 {cli_nome}" if cli_nome else "")
                 + f"\n{'─'*22}\n{itens_txt}\n{'─'*22}\n"
                 + (f"Desconto: {_brl(desconto)}\n" if desconto > 0 else "")
                 + f"Total: <b>{_brl(tot_cupom)}</b>"
                 + (f"\n💰 Lucro est.: <b>{_brl(lucro)}</b>" if id_custo else "")
-                + fiado_msg)
+                + fiado_msg))
 
-            _ss["cart"] = []
-            st.cache_data.clear()
+            _ss["cart"] = []; _ss.pop("venda_pendente", None)
             st.success(f"✅ Venda registrada! Total: {_brl(tot_cupom)}")
             _rerun()
 
     # ── Histórico ──
     st.markdown('<div class="sec-titulo">📜 Últimas vendas</div>', unsafe_allow_html=True)
+    painel_fila()
 
-    try: vend = carregar_aba(ABA_VEND)
+    try: vend = carregar_tipada(ABA_VEND)  # nomes canônicos + tipos (ESQUEMAS)
     except: vend = pd.DataFrame()
 
     if vend.empty:
         st.info("Nenhuma venda ainda.")
     else:
-        cv_data  = _first_col(vend, ["Data"])
-        cv_idp   = _first_col(vend, ["IDProduto","ProdutoID","ID"])
-        cv_qtd   = _first_col(vend, ["Qtd","Quantidade"])
-        cv_preco = _first_col(vend, ["PrecoUnit","PreçoUnitário","Preço","Preco"])
-        cv_vid   = _first_col(vend, ["VendaID","Pedido","Cupom"])
-        cv_forma = _first_col(vend, ["FormaPagto","FormaPagamento","Pagamento","Forma"])
-        cv_cli   = _first_col(vend, ["Cliente"])
-
-        vend["_bruto"] = vend.apply(lambda r:
-            _to_num(r.get("TotalLinha")) if "TotalLinha" in vend.columns
-            else (_to_num(r.get(cv_qtd))*_to_num(r.get(cv_preco)) if cv_qtd and cv_preco else 0.0), axis=1)
-        vend["_desc"]  = vend["Desconto"].map(_to_num)  if "Desconto"  in vend.columns else 0.0
-        vend["_total"] = vend["TotalCupom"].map(_to_num) if "TotalCupom" in vend.columns else vend["_bruto"]
-
-        agg_cols = {cv_data:"first","_bruto":"sum","_desc":"max","_total":"max"}
-        if cv_forma: agg_cols[cv_forma] = "first"
-        if cv_cli:   agg_cols[cv_cli]   = "first"
-        if "Obs" in vend.columns: agg_cols["Obs"] = "first"
-
-        grp = vend.groupby(cv_vid, dropna=False).agg(agg_cols).reset_index()
-        grp.rename(columns={cv_vid:"VendaID", cv_data:"Data"}, inplace=True)
-        if cv_forma: grp.rename(columns={cv_forma:"Forma"}, inplace=True)
-        if cv_cli:   grp.rename(columns={cv_cli:"Cliente"}, inplace=True)
-
-        try: grp["_ord"] = pd.to_datetime(grp["Data"], format="%d/%m/%Y", errors="coerce")
-        except: grp["_ord"] = pd.NaT
-        grp = grp.sort_values(["_ord","VendaID"], ascending=[False,False]).head(10).reset_index(drop=True)
+        _orig = vend.attrs.get("colunas_origem", {})
+        vend["_bruto"] = vend["TotalLinha"] if "TotalLinha" in _orig else vend["Qtd"] * vend["PrecoUnit"]
+        vend["_total"] = vend["TotalCupom"] if "TotalCupom" in _orig else vend["_bruto"]
+
+        grp = vend.groupby("VendaID", sort=False).agg(
+            Data=("Data","first"), _bruto=("_bruto","sum"), _desc=("Desconto","max"),
+            _total=("_total","max"), Forma=("FormaPagto","first"),
+            Cliente=("Cliente","first"), Obs=("Obs","first"),
+        ).reset_index()
+        grp["Forma"] = grp["Forma"].astype(str)
+        grp = grp.sort_values(["Data","VendaID"], ascending=[False,False]).head(10).reset_index(drop=True)
 
         for i, row in grp.iterrows():
             vid       = str(row["VendaID"])
-            forma     = str(row.get("Forma","")) if "Forma" in row else "—"
-            cli_h     = str(row.get("Cliente","")) if "Cliente" in row else ""
+            forma     = row["Forma"] if "FormaPagto" in _orig else "—"
+            cli_h     = row["Cliente"]
             total_h   = row["_total"] if row["_total"] > 0 else (row["_bruto"] - row["_desc"])
             cancelado = vid.startswith("CN-") or str(row.get("Obs","")).upper().startswith("ESTORNO")
 
@@ -655,7 +587,7 @@ with col_dir:
             <div class="hist-card {"estorno" if cancelado else ""}">
               <div style="display:flex;justify-content:space-between;align-items:center;flex-wrap:wrap;gap:8px">
                 <div>
-                  <div class="hist-data">{row['Data']}</div>
+                  <div class="hist-data">{row['Data'].strftime('%d/%m/%Y') if pd.notna(row['Data']) else ''}</div>
                   <div class="hist-id">{vid[:22]}{"…" if len(vid)>22 else ""}</div>
                   {f'<div style="font-size:0.75rem;color:rgba(255,255,255,0.4);margin-top:2px">👤 {cli_h}</div>' if cli_h else ""}
                 </div>
@@ -669,14 +601,13 @@ with col_dir:
 
             # Botões duplicar / cancelar
             def _load_cart(vid=vid):
-                linhas = vend[vend[cv_vid]==vid].copy()
+                linhas = vend[vend["VendaID"]==vid]
                 cart = []
-                for _, r in linhas.iterrows():
-                    pid = str(r.get("IDProduto") or r.get("ProdutoID") or r.get("ID",""))
+                for pid, qtd, preco in zip(linhas["IDProduto"], linhas["Qtd"], linhas["PrecoUnit"]):
                     cart.append({"id":pid,"nome":id_nome.get(pid,""),"unid":"un",
                                  "foto":id_img.get(pid,""),
-                                 "qtd":int(_to_num(r[cv_qtd])) if cv_qtd else 1,
-                                 "preco":float(_to_num(r[cv_preco])) if cv_preco else 0.0})
+                                 "qtd":int(qtd) if "Qtd" in _orig else 1,
+                                 "preco":float(preco)})
                 _ss["cart"]       = cart
                 _ss["forma"]      = str(row.get("Forma","Dinheiro"))
                 _ss["obs"]        = ""
@@ -685,21 +616,15 @@ with col_dir:
 
             def _cancelar(vid=vid):
                 if vid.startswith("CN-"): st.warning("Já é estorno."); return
-                if any(str(x).startswith(f"CN-{vid}") for x in vend[cv_vid].unique()):
+                if ja_gravado(ABA_VEND, f"CN-{vid}"):
                     st.warning("Estorno já lançado."); return
-                linhas = vend[vend[cv_vid]==vid].copy()
+                linhas = vend[vend["VendaID"]==vid]
                 if linhas.empty: st.warning("Cupom não encontrado."); return
-                sh2 = conectar_sheets()
-                ws2 = sh2.worksheet(ABA_VEND)
-                dfv2 = get_as_dataframe(ws2, evaluate_formulas=False, dtype=str, header=0).dropna(how="all")
-                dfv2.columns = [c.strip() for c in dfv2.columns]
-                for c in ["Desconto","TotalCupom","CupomStatus","Cliente","FiadoID"]:
-                    if c not in dfv2.columns: dfv2[c] = None
                 cn = f"CN-{vid}"; ds2 = date.today().strftime("%d/%m/%Y"); novas2 = []; tot_est = 0.0
                 for _, r in linhas.iterrows():
-                    pid  = str(r.get("IDProduto") or r.get("ProdutoID") or r.get("ID",""))
-                    qtd2 = -abs(_to_num(r[cv_qtd])) if cv_qtd else -1
-                    pru2 = _to_num(r[cv_preco]) if cv_preco else 0.0
+                    pid  = r["IDProduto"]
+                    qtd2 = -abs(r["Qtd"]) if "Qtd" in _orig else -1
+                    pru2 = r["PrecoUnit"]
                     tot_est += qtd2 * pru2
                     novas2.append({"Data":ds2,"VendaID":cn,"IDProduto":pid,
                         "Qtd":str(int(qtd2)),"PrecoUnit":f"{pru2:.2f}".replace(".",","),
@@ -707,22 +632,20 @@ with col_dir:
                         "FormaPagto":f"Estorno - {forma}","Obs":f"ESTORNO DE {vid}",
                         "Desconto":"0,00","TotalCupom":"0,00","CupomStatus":"ESTORNO",
                         "Cliente":str(r.get("Cliente","")),"FiadoID":""})
-                append_rows(ws2, novas2)
-                try: ws_m2 = sh2.worksheet(ABA_MOVS)
-                except: ws_m2 = _garantir_aba(sh2, ABA_MOVS,
-                    ["Data","IDProduto","Produto","Tipo","Qtd","Obs","ID","Documento/NF","Origem","SaldoApós"])
+                if not enfileirar(ABA_VEND, novas2, chave=cn, coluna_chave="VendaID", colunas=COLS[ABA_VEND]):
+                    st.warning("Estorno já lançado."); return
                 movs2 = []
                 for _, r in linhas.iterrows():
-                    pid  = str(r.get("IDProduto") or r.get("ProdutoID") or r.get("ID",""))
-                    qtd2 = int(abs(_to_num(r[cv_qtd]))) if cv_qtd else 1
+                    pid  = r["IDProduto"]
+                    qtd2 = int(abs(r["Qtd"])) if "Qtd" in _orig else 1
                     bef2 = id_stock.get(pid, 0.0); aft2 = bef2 + qtd2
                     id_stock[pid] = aft2
                     movs2.append({"Data":ds2,"IDProduto":pid,"Produto":id_nome.get(pid,pid),
                         "Tipo":"B entrada","Qtd":str(qtd2),"Obs":f"ESTORNO DE {vid}",
                         "ID":cn,"Documento/NF":"","Origem":"Vendas rápidas","SaldoApós":str(int(aft2))})
-                _append_rows(ws_m2, movs2)
-                _tg_send(f"⛔ <b>Estorno lançado</b>\n{ds2}\n{_brl(abs(tot_est))}\nCupom: {vid}")
-                st.cache_data.clear(); st.success("Estorno lançado."); _rerun()
+                enfileirar(ABA_MOVS, movs2, chave=cn, coluna_chave="ID", colunas=COLS[ABA_MOVS])
+                enfileirar_telegram(f"⛔ <b>Estorno lançado</b>\n{ds2}\n{_brl(abs(tot_est))}\nCupom: {vid}")
+                st.success("Estorno lançado."); _rerun()
 
             cb1, cb2 = st.columns([1, 1])
             cb1.button("🔁 Duplicar", key=f"dup_{i}", on_click=_load_cart, use_container_width=True)
@@ -5,38 +5,18 @@ from datetime import datetime, date, timedelta
 
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+
+from utils.bootstrap import configurar_pagina, preguicoso
+
+go = preguicoso("plotly.graph_objects")
 
 # ──────────────────────────────────────────────
 #  CONFIG & TEMA
 # ──────────────────────────────────────────────
-import pathlib
-_cfg = pathlib.Path(".streamlit"); _cfg.mkdir(exist_ok=True)
-(_cfg / "config.toml").write_text('[theme]\nbase = "dark"\n')
-
-st.set_page_config(page_title="Fechamento de Caixa", page_icon="💰",
-                   layout="wide", initial_sidebar_state="collapsed")
+configurar_pagina("Fechamento de Caixa", "💰", barra_lateral="collapsed", estilo_base=True)
 
 st.markdown("""
 <style>
-@import url('https://fonts.googleapis.com/css2?family=Nunito:wght@400;600;700;800;900&family=DM+Sans:wght@300;400;500&display=swap');
-html, body, [class*="css"] { font-family: 'DM Sans', sans-serif; }
-
-.page-header {
-    background: linear-gradient(135deg, #1a1a2e 0%, #16213e 60%, #0f3460 100%);
-    border-radius: 20px; padding: 24px 32px; margin-bottom: 24px;
-    display: flex; align-items: center; justify-content: space-between;
-    box-shadow: 0 8px 32px rgba(15,52,96,0.25);
-}
-.page-header h1 { font-family:'Nunito',sans-serif; font-weight:900; font-size:1.7rem; color:#fff; margin:0; }
-.page-header .sub { font-size:0.82rem; color:rgba(255,255,255,0.5); margin-top:4px; }
-.header-badge {
-    background:rgba(255,255,255,0.1); border:1px solid rgba(255,255,255,0.2);
-    border-radius:50px; padding:8px 18px; color:#fff; font-size:0.82rem;
-    font-weight:600; backdrop-filter:blur(10px);
-}
-
 /* KPI cards */
 .kpi-card {
     background:rgba(255,255,255,0.06); border-radius:18px; padding:22px 24px;
@@ -104,7 +84,7 @@ html, body, [class*="css"] { font-family: 'DM Sans', sans-serif; }
 
 
 from utils.sheets import (
-    sheet, carregar_aba, garantir_aba, append_rows,
+    sheet, carregar_tipadas, carregar_periodo, garantir_aba, append_rows,
     to_num, brl, safe_cost, first_col, fmt_num,
     norm_tipo_mov, calcular_estoque,
     tg_send, tg_media, gerar_id, parse_date,
@@ -137,12 +117,11 @@ def _canon_id(x):
 # ──────────────────────────────────────────────
 ABA_PROD, ABA_VEND, ABA_COMP = "Produtos", "Vendas", "Compras"
 with st.spinner("Carregando dados..."):
-    try: prod = carregar_aba(ABA_PROD)
-    except: prod = pd.DataFrame()
-    try: vend_raw = carregar_aba(ABA_VEND)
-    except: vend_raw = pd.DataFrame()
-    try: comp_raw = carregar_aba(ABA_COMP)
-    except: comp_raw = pd.DataFrame()
+    try: _abas = carregar_tipadas([ABA_PROD, ABA_VEND, ABA_COMP])  # nomes canônicos + tipos
+    except: _abas = {}
+    prod     = _abas.get(ABA_PROD, pd.DataFrame())
+    vend_raw = _abas.get(ABA_VEND, pd.DataFrame())
+    comp_raw = _abas.get(ABA_COMP, pd.DataFrame())
 
 
 # ──────────────────────────────────────────────
@@ -200,46 +179,12 @@ st.markdown('</div>', unsafe_allow_html=True)
 # ──────────────────────────────────────────────
 def _processar_vendas(v, de, ate, inclui_estornos):
     if v.empty: return pd.DataFrame(), pd.DataFrame()
-    v = v.copy(); v.columns = [c.strip() for c in v.columns]
-
-    col_data  = _first_col(v, ["Data"])
-    col_vid   = _first_col(v, ["VendaID","Pedido","Cupom"])
-    col_idp   = _first_col(v, ["IDProduto","ProdutoID","ID"])
-    col_qtd   = _first_col(v, ["Qtd","Quantidade","Qtde"])
-    col_pu    = _first_col(v, ["PrecoUnit","PreçoUnitário","Preço","Preco"])
-    col_tot   = _first_col(v, ["TotalLinha","Total"])
-    col_forma = _first_col(v, ["FormaPagto","FormaPagamento","Pagamento","Forma"])
-    col_obs   = _first_col(v, ["Obs","Observação"])
-    col_desc  = _first_col(v, ["Desconto"])
-    col_totc  = _first_col(v, ["TotalCupom"])
-    col_stat  = _first_col(v, ["CupomStatus","Status"])
-    col_cli   = _first_col(v, ["Cliente"])
-
-    out = pd.DataFrame({
-        "Data":       v[col_data]  if col_data  else None,
-        "VendaID":    v[col_vid]   if col_vid   else "",
-        "IDProduto":  v[col_idp]   if col_idp   else None,
-        "Qtd":        v[col_qtd]   if col_qtd   else 0,
-        "PrecoUnit":  v[col_pu]    if col_pu    else 0,
-        "TotalLinha": v[col_tot]   if col_tot   else 0,
-        "Forma":      v[col_forma] if col_forma  else "",
-        "Obs":        v[col_obs]   if col_obs   else "",
-        "Desconto":   v[col_desc]  if col_desc  else 0,
-        "TotalCupom": v[col_totc]  if col_totc  else None,
-        "CupomStatus":v[col_stat]  if col_stat  else None,
-        "Cliente":    v[col_cli]   if col_cli   else "",
+    # v já vem tipada (carregar_tipadas): Data datetime64, valores float64
+    out = v[v["Data"].between(pd.Timestamp(de), pd.Timestamp(ate))].rename(columns={
+        "Data": "Data_d", "Qtd": "QtdNum", "PrecoUnit": "PrecoNum", "TotalLinha": "TotalNum",
+        "Desconto": "DescNum", "TotalCupom": "CupomNum", "FormaPagto": "Forma",
     })
-    out["Data_d"]    = out["Data"].apply(_parse_date)
-    out = out[out["Data_d"].notna()]
-    out = out[(out["Data_d"] >= de) & (out["Data_d"] <= ate)]
-
-    out["QtdNum"]    = out["Qtd"].apply(_to_float)
-    out["PrecoNum"]  = out["PrecoUnit"].apply(_to_float)
-    out["TotalNum"]  = out["TotalLinha"].apply(_to_float)
-    out["DescNum"]   = out["Desconto"].apply(_to_float)
-    out["CupomNum"]  = out["TotalCupom"].apply(_to_float)
-    out["VendaID"]   = out["VendaID"].astype(str).fillna("")
-    out["IDProduto"] = out["IDProduto"].astype(str)
+    out["Forma"]     = out["Forma"].astype(str)
     out["is_estorno"]= out["VendaID"].str.startswith("CN-") | (out["CupomStatus"].astype(str).str.upper()=="ESTORNO")
 
     if not inclui_estornos:
@@ -255,6 +200,8 @@ def _processar_vendas(v, de, ate, inclui_estornos):
     )
     return out, cupom
 
+try:    vend_raw = carregar_periodo(ABA_VEND, de, ate)  # anos arquivados só se o período pedir
+except: pass
 vendas, cupom = _processar_vendas(vend_raw, de, ate, inclui_estornos)
 
 
@@ -264,22 +211,16 @@ vendas, cupom = _processar_vendas(vend_raw, de, ate, inclui_estornos)
 def _custo_map(comp_df, prod_df):
     mp = {}
     if not comp_df.empty:
-        c = comp_df.copy(); c.columns = [x.strip() for x in c.columns]
-        c_pid = _first_col(c, ["IDProduto","ProdutoID","ID"])
-        c_qtd = _first_col(c, ["Qtd","Quantidade"])
-        c_cu  = _first_col(c, ["Custo Unitário","CustoUnit","Custo"])
-        if c_pid and c_qtd and c_cu:
-            c["_q"] = c[c_qtd].apply(_to_float)
-            c["_c"] = c[c_cu].apply(_to_float)
-            c["_p"] = c["_q"] * c["_c"]
-            g = c.groupby(c[c_pid].astype(str))[["_p","_q"]].sum()
+        orig = comp_df.attrs.get("colunas_origem", {})
+        if {"IDProduto", "Qtd", "CustoUnit"} <= set(orig):
+            c = pd.DataFrame({"_q": comp_df["Qtd"], "_p": comp_df["Qtd"] * comp_df["CustoUnit"]})
+            g = c.groupby(comp_df["IDProduto"])[["_p","_q"]].sum()
             g["cm"] = g["_p"] / g["_q"].replace(0, pd.NA)
             mp = g["cm"].fillna(0.0).to_dict()
     if not prod_df.empty and "ID" in prod_df.columns and "CustoAtual" in prod_df.columns:
-        for pid, custo in prod_df.set_index("ID")["CustoAtual"].items():
+        for pid, custo in zip(prod_df["ID"], prod_df["CustoAtual"]):
             if pid not in mp or mp[pid] == 0:
-                try: mp[str(pid)] = float(custo) if pd.notna(custo) else 0.0
-                except: pass
+                mp[str(pid)] = float(custo)
     return mp
 
 custo_mp = _custo_map(comp_raw, prod)
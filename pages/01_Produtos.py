@@ -4,39 +4,17 @@ import json, unicodedata as _ud, re
 import streamlit as st
 import pandas as pd
 import gspread
-from gspread_dataframe import get_as_dataframe
-from google.oauth2.service_account import Credentials
 from streamlit.components.v1 import html as sthtml
 
+from utils.bootstrap import configurar_pagina
+
 # ──────────────────────────────────────────────
 #  CONFIG & TEMA
 # ──────────────────────────────────────────────
-import pathlib
-_cfg = pathlib.Path(".streamlit"); _cfg.mkdir(exist_ok=True)
-(_cfg / "config.toml").write_text('[theme]\nbase = "dark"\n')
-
-st.set_page_config(page_title="Produtos — Ebenezér", page_icon="🏪",
-                   layout="wide", initial_sidebar_state="collapsed")
+configurar_pagina("Produtos — Ebenezér", "🏪", barra_lateral="collapsed", estilo_base=True)
 
 st.markdown("""
 <style>
-@import url('https://fonts.googleapis.com/css2?family=Nunito:wght@400;600;700;800;900&family=DM+Sans:wght@300;400;500&display=swap');
-html, body, [class*="css"] { font-family: 'DM Sans', sans-serif; }
-
-.page-header {
-    background: linear-gradient(135deg, #1a1a2e 0%, #16213e 60%, #0f3460 100%);
-    border-radius: 20px; padding: 24px 32px; margin-bottom: 24px;
-    display: flex; align-items: center; justify-content: space-between;
-    box-shadow: 0 8px 32px rgba(15,52,96,0.25);
-}
-.page-header h1 { font-family:'Nunito',sans-serif; font-weight:900; font-size:1.7rem; color:#fff; margin:0; }
-.page-header .sub { font-size:0.82rem; color:rgba(255,255,255,0.5); margin-top:4px; }
-.header-badge {
-    background:rgba(255,255,255,0.1); border:1px solid rgba(255,255,255,0.2);
-    border-radius:50px; padding:8px 18px; color:#fff; font-size:0.82rem;
-    font-weight:600; backdrop-filter:blur(10px);
-}
-
 /* KPI mini */
 .mini-kpi {
     background:rgba(255,255,255,0.06); border:1px solid rgba(255,255,255,0.09);
@@ -58,8 +36,9 @@ html, body, [class*="css"] { font-family: 'DM Sans', sans-serif; }
 #  HELPERS
 from utils.sheets import (
     sheet, carregar_aba, garantir_aba, append_rows,
-    to_num, brl, safe_cost, first_col, fmt_num,
-    norm_tipo_mov, calcular_estoque, tg_send, tg_media, gerar_id, parse_date,
+    to_num, to_num_series, brl, safe_cost, first_col, fmt_num,
+    norm_tipo_mov, calcular_estoque, saldos_estoque, tg_send, tg_media, gerar_id, parse_date,
+    registro_produtos, chave_produto, chaves_produto, canon_id, selo_dados,
     ABA_PROD, ABA_VEND, ABA_COMP, ABA_MOVS, ABA_CLIEN, ABA_FIADO, ABA_FPAGT,
 )
 _to_num = to_num; _to_float = to_num; _brl = brl; _fmt_brl = brl
@@ -68,8 +47,7 @@ _tg_send = tg_send; _tg_media = tg_media; _norm_tipo_mov = norm_tipo_mov
 _gerar_id = gerar_id; _parse_date = parse_date; _norm_tipo = norm_tipo_mov
 _to_date = parse_date
 
-def _canon_id(x):
-    import re as _re; return _re.sub(r"[^0-9]", "", str(x or ""))
+_canon_id = canon_id
 def conectar_sheets(): return sheet()
 
 def _nz(x):
@@ -85,9 +63,7 @@ def _strip_low(s):
     s = _ud2.normalize("NFKD", str(s or ""))
     return "".join(ch for ch in s if _ud2.category(ch) != "Mn").lower().strip()
 
-def _prod_key(pid, pnome):
-    p = _nz(pid)
-    return p if p else f"nm:{_strip_low(_nz(pnome))}"
+_prod_key = chave_produto  # mesma chave em todas as páginas (utils.sheets)
 
 
 ABA_PROD, ABA_MOV, ABA_COMP = "Produtos", "MovimentosEstoque", "Compras"
@@ -119,30 +95,22 @@ for c in ["Tipo","Qtd","IDProduto","Produto"]:
     if c not in df_mov.columns: df_mov[c] = ""
 
 if not df_mov.empty:
-    df_mov["_tnorm"] = df_mov["Tipo"].apply(_norm_tipo)
-    df_mov["_qtd"]   = df_mov["Qtd"].map(_to_num)
-    df_mov["__key"]  = df_mov.apply(lambda r: _prod_key(r.get("IDProduto",""), r.get("Produto","")), axis=1)
-    def _sum_mov(tipo):
-        m = df_mov[df_mov["_tnorm"] == tipo]
-        return {} if m.empty else m.groupby("__key")["_qtd"].sum().to_dict()
-    ent_map = _sum_mov("entrada"); sai_map = _sum_mov("saida"); adj_map = _sum_mov("ajuste")
+    _saldos = saldos_estoque(chave=_prod_key)  # checkpoint + movimentos novos
+    ent_map = _saldos["Entradas"].to_dict(); sai_map = _saldos["Saidas"].to_dict(); adj_map = _saldos["Ajustes"].to_dict()
 else:
     ent_map = sai_map = adj_map = {}
 
 # ── Custo ──
 custo_prod_map = {}
 if col_custo_p:
-    tmp = df_prod.copy()
-    tmp["__key"] = tmp.apply(lambda r: _prod_key(r.get(col_id,""), r.get(col_nome,"")), axis=1)
-    tmp["_c"] = tmp[col_custo_p].map(_to_num)
-    custo_prod_map = dict(zip(tmp["__key"], tmp["_c"]))
+    custo_prod_map = registro_produtos().mapa("custo")
 
 custo_comp_map = {}
 c_pid = _first_col(df_comp, ["IDProduto","ProdutoID"])
 c_cu  = _first_col(df_comp, ["Custo Unitário","Custo"])
 if not df_comp.empty and c_pid and c_cu:
-    df_comp["__key"] = df_comp.apply(lambda r: _prod_key(r.get(c_pid,""), r.get("Produto","")), axis=1)
-    df_comp["_c"]    = df_comp[c_cu].map(_to_num)
+    df_comp["__key"] = chaves_produto(df_comp[c_pid], df_comp.get("Produto"))
+    df_comp["_c"]    = to_num_series(df_comp[c_cu])
     last = df_comp.groupby("__key", as_index=False).tail(1)
     custo_comp_map = dict(zip(last["__key"], last["_c"]))
 
@@ -152,14 +120,14 @@ def _custo(key):
 
 # ── Consolidar ──
 base = df_prod.copy()
-base["__key"]      = base.apply(lambda r: _prod_key(r.get(col_id,""), r.get(col_nome,"")), axis=1)
+base["__key"]      = chaves_produto(base[col_id] if col_id else None, base[col_nome])
 base["_id"]        = base[col_id]   if col_id   else ""
 base["_nome"]      = base[col_nome]
 base["_img"]       = base[col_img].astype(str).fillna("") if col_img else ""
 base["_cat"]       = base[col_cat].astype(str).fillna("") if col_cat else ""
 base["_forn"]      = base[col_forn].astype(str).fillna("") if col_forn else ""
-base["_preco"]     = base[col_preco].map(_to_num) if col_preco else 0.0
-base["_emin"]      = base[col_emin].map(_to_num)  if col_emin  else 0.0
+base["_preco"]     = to_num_series(base[col_preco]) if col_preco else 0.0
+base["_emin"]      = to_num_series(base[col_emin])  if col_emin  else 0.0
 base["_ent"]       = base["__key"].map(lambda k: float(ent_map.get(k,0)))
 base["_sai"]       = base["__key"].map(lambda k: float(sai_map.get(k,0)))
 base["_adj"]       = base["__key"].map(lambda k: float(adj_map.get(k,0)))
@@ -180,7 +148,7 @@ st.markdown(f"""
 <div class="page-header">
   <div>
     <h1>🏪 Catálogo de Produtos</h1>
-    <div class="sub">Ebenezér Variedades · {n_total} produtos ativos</div>
+    <div class="sub">Ebenezér Variedades · {n_total} produtos ativos · {selo_dados([ABA_PROD, ABA_MOVS])}</div>
   </div>
   <div class="header-badge">{"⚠️ " + str(n_baixo) + " com estoque baixo" if n_baixo else "✅ Estoque OK"}</div>
 </div>
@@ -5,38 +5,17 @@ import json, unicodedata, re, time
 import streamlit as st
 import pandas as pd
 import gspread
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
-from google.oauth2.service_account import Credentials
 from datetime import date
 
+from utils.bootstrap import configurar_pagina, get_as_dataframe, set_with_dataframe
+
 # ──────────────────────────────────────────────
 #  CONFIG & TEMA
 # ──────────────────────────────────────────────
-import pathlib
-_cfg = pathlib.Path(".streamlit"); _cfg.mkdir(exist_ok=True)
-(_cfg / "config.toml").write_text('[theme]\nbase = "dark"\n')
-
-st.set_page_config(page_title="Cadastrar Produto", page_icon="➕",
-                   layout="wide", initial_sidebar_state="collapsed")
+configurar_pagina("Cadastrar Produto", "➕", barra_lateral="collapsed", estilo_base=True)
 
 st.markdown("""
 <style>
-@import url('https://fonts.googleapis.com/css2?family=Nunito:wght@400;600;700;800;900&family=DM+Sans:wght@300;400;500&display=swap');
-html, body, [class*="css"] { font-family: 'DM Sans', sans-serif; }
-
-.page-header {
-    background: linear-gradient(135deg, #1a1a2e 0%, #16213e 60%, #0f3460 100%);
-    border-radius: 20px; padding: 24px 32px; margin-bottom: 24px;
-    display: flex; align-items: center; justify-content: space-between;
-    box-shadow: 0 8px 32px rgba(15,52,96,0.25);
-}
-.page-header h1 { font-family:'Nunito',sans-serif; font-weight:900; font-size:1.7rem; color:#fff; margin:0; }
-.page-header .sub { font-size:0.82rem; color:rgba(255,255,255,0.5); margin-top:4px; }
-.header-badge {
-    background:rgba(255,255,255,0.1); border:1px solid rgba(255,255,255,0.2);
-    border-radius:50px; padding:8px 18px; color:#fff; font-size:0.82rem;
-    font-weight:600; backdrop-filter:blur(10px);
-}
 .sec-titulo {
     font-family:'Nunito',sans-serif; font-weight:800; font-size:1.05rem;
     color:rgba(255,255,255,0.9); margin:24px 0 14px 0;
@@ -87,7 +66,7 @@ button[kind="primary"] { border-radius:12px !important; font-weight:700 !importa
 #  CONEXÃO / HELPERS  (centralizados em utils/sheets.py)
 # ──────────────────────────────────────────────
 from utils.sheets import (
-    sheet as _sheet_obj, carregar_aba, garantir_aba, append_rows,
+    sheet as _sheet_obj, carregar_aba, invalidar_aba, garantir_aba, append_rows, cabecalho,
     to_num, brl, safe_cost, first_col, fmt_num,
     norm_tipo_mov, calcular_estoque, tg_send, tg_media, gerar_id, parse_date,
     ABA_PROD, ABA_VEND, ABA_COMP, ABA_MOVS, ABA_CLIEN, ABA_FIADO, ABA_FPAGT,
@@ -104,7 +83,7 @@ def conectar_sheets(): return _sheet_obj()
 # BUMP = token de cache — força recarregamento quando cache_data é limpo
 BUMP = st.session_state.get("_bump", 0)
 
-@st.cache_data(ttl=30, show_spinner=False)
+# carregar_aba já tem cache próprio (com write-through); aqui é só um atalho
 def _load_df(aba: str, _bump: int = 0):
     return carregar_aba(aba)
 
@@ -127,7 +106,7 @@ def _append_row(ws, row: dict):
     append_rows(ws, [row])
 
 def _refresh():
-    st.cache_data.clear()
+    # as gravações já atualizaram o cache das abas (append_rows / invalidar_aba)
     st.rerun()
 
 ABA_PROD = "Produtos"
@@ -165,6 +144,7 @@ def _ensure_header_cols(ws, desired_cols: list[str]) -> list[str]:
         header = []
     if not header:
         ws.update("A1", [desired_cols])
+        cabecalho(ws, recarregar=True)  # o append_rows seguinte usa a linha 1 nova
         return desired_cols
 
     # Não cria coluna nova se já existir uma coluna equivalente.
@@ -176,6 +156,7 @@ def _ensure_header_cols(ws, desired_cols: list[str]) -> list[str]:
     if faltantes:
         header = header + faltantes
         ws.update("A1", [header])
+        cabecalho(ws, recarregar=True)
     return header
 
 def _header_like(headers: list[str], candidates: list[str], default: str) -> str:
@@ -566,6 +547,7 @@ with aba_corrigir:
                     ws_corr.clear()
                     set_with_dataframe(ws_corr, df3.fillna(""), include_index=False,
                                        include_column_header=True, resize=True)
+                    invalidar_aba(aba_corr)
                     st.success("✅ Alterações salvas!")
                     _refresh()
 
@@ -584,5 +566,6 @@ with aba_corrigir:
                 ws_corr.clear()
                 set_with_dataframe(ws_corr, df3.fillna(""), include_index=False,
                                    include_column_header=True, resize=True)
+                invalidar_aba(aba_corr)
                 st.success("✅ Lançamento apagado!")
                 _refresh()
@@ -8,13 +8,13 @@ from pathlib import Path
 import streamlit as st
 import pandas as pd
 import gspread
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
-from google.oauth2.service_account import Credentials
+
+from utils.bootstrap import configurar_pagina
 
 # =========================
 # UI BASE / TEMA
 # =========================
-st.set_page_config(page_title="Estoque — Movimentos & Ajustes", page_icon="📦", layout="wide")
+configurar_pagina("Estoque — Movimentos & Ajustes", "📦")
 
 st.markdown("""
 <style>
@@ -38,20 +38,16 @@ hr{border:0; border-top:1px solid var(--borda); margin:1rem 0}
 </style>
 """, unsafe_allow_html=True)
 
-# ---------- refresh automático ----------
-if st.session_state.pop("_first_load_estoque", True):
-    st.cache_data.clear()
-st.session_state.setdefault("_first_load_estoque", False)
-
 # =========================
 # Credenciais / Conexão
 # ──────────────────────────────────────────────
 #  CONEXÃO / HELPERS  (centralizados em utils/sheets.py)
 # ──────────────────────────────────────────────
 from utils.sheets import (
-    sheet, carregar_aba, garantir_aba, append_rows,
-    to_num, brl, safe_cost, first_col, fmt_num,
-    norm_tipo_mov, calcular_estoque, tg_send, tg_media, gerar_id, parse_date,
+    sheet, carregar_aba, garantir_aba, append_rows, vencer_aba,
+    to_num, to_num_series, brl, safe_cost, first_col, fmt_num,
+    norm_tipo_mov, calcular_estoque, saldos_estoque, classificar_tipos_mov, tg_send, tg_media, gerar_id, parse_date,
+    registro_produtos, chave_produto, chaves_produto, canon_id, selo_dados,
     ABA_PROD, ABA_VEND, ABA_COMP, ABA_MOVS, ABA_CLIEN, ABA_FIADO, ABA_FPAGT,
 )
 # Aliases de compatibilidade
@@ -61,8 +57,7 @@ _tg_send = tg_send; _tg_media = tg_media; _norm_tipo_mov = norm_tipo_mov
 _gerar_id = gerar_id; _parse_date = parse_date; _norm_tipo = norm_tipo_mov
 _to_date = parse_date
 
-def _canon_id(x):
-    import re as _re; return _re.sub(r"[^0-9]", "", str(x or ""))
+_canon_id = canon_id
 def conectar_sheets(): return sheet()
 def _sheet(): return sheet()
 
@@ -71,7 +66,6 @@ def _sheet_titles():
     try: return {ws.title for ws in sheet().worksheets()}
     except: return set()
 
-@st.cache_data(ttl=1, show_spinner=False)
 def _load_df(aba):
     return carregar_aba(aba)
 
@@ -88,13 +82,10 @@ def _strip_accents_low(s):
     s = _ud2.normalize("NFKD", str(s or ""))
     return "".join(ch for ch in s if _ud2.category(ch) != "Mn").lower().strip()
 
-def _prod_key_from(prod_id, prod_nome):
-    pid = _nz(prod_id)
-    return pid if pid else f"nm:{_strip_accents_low(_nz(prod_nome))}"
+_prod_key_from = chave_produto  # mesma chave em todas as páginas (utils.sheets)
 
 def _append_row(ws, row):
-    hdrs = [h.strip() for h in ws.row_values(1)]
-    ws.append_rows([[row.get(h, "") for h in hdrs]], value_input_option="USER_ENTERED")
+    append_rows(ws, [row])
 
 def _ensure_ws(name, headers):
     return garantir_aba(name, headers)
@@ -113,6 +104,12 @@ MOV_HEADERS=["Data","IDProduto","Produto","Tipo","Qtd","Obs","ID","Documento/NF"
 # =========================
 # Carregar bases
 # =========================
+# ---------- refresh automático (1ª visita da sessão relê as abas desta página) ----------
+if st.session_state.pop("_first_load_estoque", True):
+    for _a in (ABA_PRODUTOS, ABA_COMPRAS, ABA_MOV):
+        vencer_aba(_a)
+st.session_state.setdefault("_first_load_estoque", False)
+
 titles=_sheet_titles()
 prod_df=_load_df(ABA_PRODUTOS)
 compras_df=_load_df(ABA_COMPRAS) if ABA_COMPRAS in titles else pd.DataFrame(columns=COMPRAS_HEADERS)
@@ -121,16 +118,14 @@ mov_df=_load_df(ABA_MOV) if ABA_MOV in titles else pd.DataFrame(columns=MOV_HEAD
 # =========================
 # Normalizações
 # =========================
-COLP={
-    "id":   next((c for c in ["ID","Id","id","Codigo","Código","SKU","IDProduto","ProdutoID"] if c in prod_df.columns),None),
-    "nome": next((c for c in ["Nome","Produto","Descrição","Descricao"] if c in prod_df.columns),None),
-}
+_reg=registro_produtos()
+COLP={"id": _reg.coluna("id"), "nome": _reg.coluna("nome")}
 if COLP["nome"] is None:
     st.error("Aba **Produtos** precisa ter coluna de nome.")
     st.stop()
 
 base=prod_df.copy()
-base["__key"]=base.apply(lambda r:_prod_key_from(r.get(COLP["id"],""), r.get(COLP["nome"],"")),axis=1)
+base["__key"]=chaves_produto(base[COLP["id"]] if COLP["id"] else None, base[COLP["nome"]])
 base["Produto"]=base[COLP["nome"]]
 base["IDProduto"]=base[COLP["id"]] if COLP["id"] else ""
 
@@ -138,16 +133,13 @@ base["IDProduto"]=base[COLP["id"]] if COLP["id"] else ""
 # 1) Produtos.CustoAtual (prioridade)
 custo_produto_map = {}
 if "CustoAtual" in prod_df.columns:
-    tmp = prod_df.copy()
-    tmp["__key"] = tmp.apply(lambda r:_prod_key_from(r.get(COLP["id"],""), r.get(COLP["nome"],"")), axis=1)
-    tmp["CustoAtual_num"] = tmp["CustoAtual"].apply(_to_num)
-    custo_produto_map = dict(zip(tmp["__key"], tmp["CustoAtual_num"]))
+    custo_produto_map = dict(zip(base["__key"], to_num_series(prod_df["CustoAtual"])))
 
 # 2) Última compra (fallback)
 custo_compra_map = {}
 if not compras_df.empty:
-    compras_df["__key"]=compras_df.apply(lambda r:_prod_key_from(r.get("IDProduto",""), r.get("Produto","")),axis=1)
-    compras_df["Custo_num"]=compras_df["Custo Unitário"].apply(_to_num)
+    compras_df["__key"]=chaves_produto(compras_df.get("IDProduto"), compras_df.get("Produto"))
+    compras_df["Custo_num"]=to_num_series(compras_df["Custo Unitário"])
     last_cost=compras_df.groupby("__key",as_index=False).tail(1)
     custo_compra_map=dict(zip(last_cost["__key"], last_cost["Custo_num"]))
 
@@ -162,13 +154,9 @@ def _custo_atual(key: str) -> float:
 for c in MOV_HEADERS:
     if c not in mov_df.columns: mov_df[c]=""
 if not mov_df.empty:
-    mov_df["Tipo_norm"]=mov_df["Tipo"].apply(_norm_tipo)
-    mov_df["Qtd_num"]=mov_df["Qtd"].apply(_to_num)
-    mov_df["__key"]=mov_df.apply(lambda r:_prod_key_from(r.get("IDProduto",""), r.get("Produto","")),axis=1)
-    def _sum_mov(tipo):
-        m=mov_df[mov_df["Tipo_norm"]==tipo]
-        return {} if m.empty else m.groupby("__key")["Qtd_num"].sum().to_dict()
-    entradas_mov=_sum_mov("entrada"); saidas_mov=_sum_mov("saida"); ajustes_mov=_sum_mov("ajuste")
+    mov_df["Tipo_norm"]=classificar_tipos_mov(mov_df["Tipo"])
+    _saldos=saldos_estoque(chave=_prod_key_from)  # checkpoint + movimentos novos
+    entradas_mov=_saldos["Entradas"].to_dict(); saidas_mov=_saldos["Saidas"].to_dict(); ajustes_mov=_saldos["Ajustes"].to_dict()
 else:
     entradas_mov,saidas_mov,ajustes_mov={},{},{}
 
@@ -190,7 +178,7 @@ df["ValorTotal"]=(df["EstoqueAtual"].astype(float)*df["CustoAtual"].astype(float
 left,right=st.columns([0.7,0.3])
 with left:
     st.markdown("<h1>📦 Estoque — Movimentos & Ajustes</h1>",unsafe_allow_html=True)
-    st.markdown(f"<div class='small'>Fonte de quantidade: <b>{ABA_MOV}</b> • Atualizado: <code>{datetime.now().strftime('%d/%m/%Y %H:%M:%S')}</code></div>",unsafe_allow_html=True)
+    st.markdown(f"<div class='small'>Fonte de quantidade: <b>{ABA_MOV}</b> • <code>{selo_dados([ABA_PROD, ABA_COMP, ABA_MOVS])}</code></div>",unsafe_allow_html=True)
 with right:
     if Path("pages/03_Compras_Produtos_Entradas.py").exists():
         st.page_link("pages/03_Compras_Produtos_Entradas.py", label="🧾 Compras / Entradas", icon="🧾")
@@ -321,7 +309,6 @@ if 'salvar_s' in locals() and salvar_s:
     })
     st.success("Saída registrada com sucesso! ✅")
     st.toast("Saída lançada", icon="➖")
-    st.cache_data.clear()
 
 st.markdown("</div>", unsafe_allow_html=True)
 
@@ -371,7 +358,6 @@ if 'salvar_a' in locals() and salvar_a:
     })
     st.success("Ajuste registrado com sucesso! ✅")
     st.toast("Ajuste lançado", icon="🛠️")
-    st.cache_data.clear()
 
 st.markdown("</div>", unsafe_allow_html=True)
 
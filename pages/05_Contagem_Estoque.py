@@ -6,41 +6,16 @@ from datetime import datetime
 import streamlit as st
 import pandas as pd
 import gspread
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
-from google.oauth2.service_account import Credentials
+
+from utils.bootstrap import configurar_pagina, get_as_dataframe, set_with_dataframe
 
 # ──────────────────────────────────────────────
 #  CONFIG & TEMA
 # ──────────────────────────────────────────────
-import pathlib
-_cfg = pathlib.Path(".streamlit"); _cfg.mkdir(exist_ok=True)
-(_cfg / "config.toml").write_text('[theme]\nbase = "dark"\n')
-
-st.set_page_config(
-    page_title="Contagem de Estoque",
-    page_icon="📦",
-    layout="wide",
-    initial_sidebar_state="collapsed",
-)
+configurar_pagina("Contagem de Estoque", "📦", barra_lateral="collapsed", estilo_base=True)
 
 st.markdown("""
 <style>
-@import url('https://fonts.googleapis.com/css2?family=Nunito:wght@400;600;700;800;900&family=DM+Sans:wght@300;400;500&display=swap');
-html, body, [class*="css"] { font-family: 'DM Sans', sans-serif; }
-
-.page-header {
-    background: linear-gradient(135deg, #1a1a2e 0%, #16213e 60%, #0f3460 100%);
-    border-radius: 20px; padding: 24px 32px; margin-bottom: 24px;
-    display: flex; align-items: center; justify-content: space-between;
-    box-shadow: 0 8px 32px rgba(15,52,96,0.25);
-}
-.page-header h1 { font-family:'Nunito',sans-serif; font-weight:900; font-size:1.7rem; color:#fff; margin:0; }
-.page-header .sub { font-size:0.82rem; color:rgba(255,255,255,0.5); margin-top:4px; }
-.header-badge {
-    background:rgba(255,255,255,0.1); border:1px solid rgba(255,255,255,0.2);
-    border-radius:50px; padding:8px 18px; color:#fff; font-size:0.82rem;
-    font-weight:600; backdrop-filter:blur(10px);
-}
 .progresso-wrap {
     background:rgba(255,255,255,0.06); border-radius:16px; padding:18px 22px;
     border:1px solid rgba(255,255,255,0.09); margin-bottom:22px;
@@ -160,8 +135,10 @@ with st.container():
 #  HELPERS GOOGLE SHEETS
 from utils.sheets import (
     sheet, carregar_aba, garantir_aba, append_rows,
-    to_num, brl, safe_cost, first_col, fmt_num,
-    norm_tipo_mov, calcular_estoque, tg_send, tg_media, gerar_id, parse_date,
+    atualizar_celulas, invalidar_aba, cache_por_aba,
+    to_num, to_num_series, brl, safe_cost, first_col, fmt_num,
+    norm_tipo_mov, calcular_estoque, saldos_estoque, marcar_checkpoint_estoque, tg_send, tg_media, gerar_id, parse_date,
+    registro_produtos, chave_produto, chaves_produto, canon_id, worksheet,
     ABA_PROD, ABA_VEND, ABA_COMP, ABA_MOVS, ABA_CLIEN, ABA_FIADO, ABA_FPAGT,
 )
 _to_num = to_num; _to_float = to_num; _brl = brl; _fmt_brl = brl
@@ -169,18 +146,16 @@ _first_col = first_col; _fmt_num = fmt_num; _parse_date_any = parse_date
 _tg_send = tg_send; _tg_media = tg_media; _norm_tipo_mov = norm_tipo_mov
 _gerar_id = gerar_id; _parse_date = parse_date; _norm_tipo = norm_tipo_mov
 _to_date = parse_date
-def _canon_id(x):
-    import re as _re; return _re.sub(r"[^0-9]", "", str(x or ""))
+_canon_id = canon_id
 def conectar_sheets(): return sheet()
 def _sheet(): return sheet()
 
 
-@st.cache_data(ttl=15, show_spinner=False)
 def _aba(nome):
-    ws = _sheet().worksheet(nome)
-    df = get_as_dataframe(ws, evaluate_formulas=True, dtype=str, header=0).dropna(how="all")
-    df.columns = [c.strip() for c in df.columns]
-    return df.fillna("")
+    df = carregar_aba(nome)
+    if df.columns.empty:
+        raise gspread.WorksheetNotFound(nome)
+    return df
 
 def _first_col(df, cands):
     for c in cands:
@@ -238,9 +213,7 @@ def _nz(x):
     s = str(x).strip()
     return "" if s.lower() in ("nan","none") else s
 
-def _prod_key(pid, pnome):
-    p = _nz(pid)
-    return p if p else f"nm:{_strip(_nz(pnome))}"
+_prod_key = chave_produto  # mesma chave em todas as páginas (utils.sheets)
 
 def _fmt_num(v):
     try:
@@ -278,27 +251,19 @@ df_prod["_cat"]  = df_prod[col_cat]  if col_cat  else ""
 df_prod["_foto"] = df_prod[col_foto] if col_foto else ""
 col_preco = _first_col(df_prod, ["PreçoVenda","PrecoVenda","Preço","Preco"])
 col_custo = _first_col(df_prod, ["CustoAtual","CustoMedio","Custo"])
-df_prod["__key"]  = df_prod.apply(lambda r: _prod_key(r.get(col_id,""), r.get(col_nome,"")), axis=1)
-df_prod["_preco"] = df_prod[col_preco].apply(_to_num) if col_preco else 0.0
-df_prod["_custo"] = df_prod[col_custo].apply(_to_num) if col_custo else 0.0
+df_prod["__key"]  = chaves_produto(df_prod["_id"], df_prod["_nome"])
+df_prod["_preco"] = to_num_series(df_prod[col_preco]) if col_preco else 0.0
+df_prod["_custo"] = to_num_series(df_prod[col_custo]) if col_custo else 0.0
 df_prod.reset_index(drop=True, inplace=True)
 
 for c in ["Tipo","Qtd","IDProduto","Produto"]:
     if c not in df_mov.columns: df_mov[c] = ""
 
-if not df_mov.empty:
-    df_mov["_tnorm"] = df_mov["Tipo"].apply(_norm_tipo)
-    df_mov["_qtd"]   = df_mov["Qtd"].map(_to_num)
-    df_mov["__key"]  = df_mov.apply(lambda r: _prod_key(r.get("IDProduto",""), r.get("Produto","")), axis=1)
-else:
-    df_mov["_tnorm"] = pd.Series([], dtype=str)
-    df_mov["_qtd"]   = pd.Series([], dtype=float)
-    df_mov["__key"]  = pd.Series([], dtype=str)
+# saldo por produto: checkpoint + movimentos novos (sem varrer o histórico a cada consulta)
+_saldo_map = saldos_estoque(chave=_prod_key)["Saldo"].to_dict() if not df_mov.empty else {}
 
 def estoque_atual(ch) -> float:
-    if df_mov.empty: return 0.0
-    g = df_mov[df_mov["__key"] == ch].groupby("_tnorm")["_qtd"].sum()
-    return float(g.get("entrada", 0.0) - g.get("saida", 0.0) + g.get("ajuste", 0.0))
+    return float(_saldo_map.get(ch, 0.0))
 
 
 # ──────────────────────────────────────────────
@@ -314,7 +279,7 @@ def estoque_atual(ch) -> float:
 #  Só zera quando o usuário clicar em "Iniciar nova contagem".
 # ──────────────────────────────────────────────
 
-@st.cache_data(ttl=10, show_spinner=False)
+@cache_por_aba("Config")
 def _ler_config() -> dict:
     try:
         df_cfg = _aba("Config")
@@ -344,8 +309,7 @@ def _salvar_config(chave: str, valor: str):
             cur = pd.concat([cur, pd.DataFrame([nova])], ignore_index=True)
         ws.clear()
         set_with_dataframe(ws, cur.fillna(""), include_index=False, include_column_header=True, resize=True)
-        _ler_config.clear()
-        _aba.clear()
+        invalidar_aba("Config")
     except Exception as e:
         st.warning(f"Aviso: não foi possível salvar configuração: {e}")
 
@@ -467,7 +431,6 @@ def _render_contagem():
             st.session_state["cnt_ciclo_id"]   = novo
             st.session_state["cnt_contados"]   = set()
             st.session_state["cnt_ciclo_done"] = False
-            st.cache_data.clear()
             st.rerun()
 
         if historico:
@@ -522,7 +485,6 @@ def _render_contagem():
             st.session_state["cnt_ciclo_id"]   = novo
             st.session_state["cnt_contados"]   = set()
             st.session_state["cnt_ciclo_done"] = False
-            st.cache_data.clear()
             st.rerun()
         return
 
@@ -642,7 +604,6 @@ def _render_contagem():
 
             try:
                 ws_mov = _sheet().worksheet("MovimentosEstoque")
-                hdrs   = ws_mov.row_values(1) or ["Data","IDProduto","Produto","Tipo","Qtd","Obs"]
 
                 # Só grava ajuste se houve diferença
                 if delta != 0:
@@ -651,13 +612,13 @@ def _render_contagem():
                         "Data": data_str, "IDProduto": prod_id, "Produto": prod_nome,
                         "Tipo": "Ajuste", "Qtd": qtd_str, "Obs": obs_final,
                     }
-                    ws_mov.append_row([row_data.get(h,"") for h in hdrs], value_input_option="USER_ENTERED")
+                    append_rows(ws_mov, [row_data])
+                    marcar_checkpoint_estoque()  # contagem = saldo conferido → bom ponto de checkpoint
 
                 # Marca como contado e persiste
                 contados.add(sel_key)
                 st.session_state["cnt_contados"] = contados
                 _salvar_contados(contados)
-                st.cache_data.clear()
 
                 # Chegou a 100%?
                 if len(contados) >= total:
@@ -771,12 +732,12 @@ def _render_contagem():
         with col_r1:
             if st.button("🔄 Recarregar progresso", use_container_width=True,
                          help="Busca o progresso salvo na planilha — útil se outra pessoa está contando junto"):
+                invalidar_aba("Config")
                 c2, h2, cid2, done2 = _carregar_estado()
                 st.session_state["cnt_contados"]   = c2
                 st.session_state["cnt_historico"]  = h2
                 st.session_state["cnt_ciclo_id"]   = cid2
                 st.session_state["cnt_ciclo_done"] = done2
-                st.cache_data.clear()
                 st.rerun()
         with col_r2:
             if st.button("🆕 Iniciar nova contagem", use_container_width=True,
@@ -785,7 +746,6 @@ def _render_contagem():
                 st.session_state["cnt_ciclo_id"]   = novo
                 st.session_state["cnt_contados"]   = set()
                 st.session_state["cnt_ciclo_done"] = False
-                st.cache_data.clear()
                 st.rerun()
 
         st.markdown("""
@@ -868,20 +828,21 @@ with _tab_prec:
 
             if _salvar:
                 try:
-                    _ws_p  = _sheet().worksheet("Produtos")
-                    _hdr_p = [h.strip() for h in _ws_p.row_values(1)]
-                    _ci    = next((i+1 for i,h in enumerate(_hdr_p) if h in ["ID","Id","Codigo","Código","SKU"]), None)
-                    _cpv   = next((i+1 for i,h in enumerate(_hdr_p) if h in ["PreçoVenda","PrecoVenda","Preço","Preco"]), None)
-                    _ccu   = next((i+1 for i,h in enumerate(_hdr_p) if h in ["CustoAtual","CustoMedio","Custo"]), None)
+                    _ws_p  = worksheet("Produtos")
+                    _reg   = registro_produtos()  # colunas e linhas já indexadas
+                    _ci    = _reg.posicao_coluna("id")
+                    _cpv   = _reg.posicao_coluna("preco")
+                    _ccu   = _reg.posicao_coluna("custo")
                     if not _ci:
                         st.error("Coluna ID não encontrada na aba Produtos.")
                     else:
-                        _ids = _ws_p.col_values(_ci)[1:]
-                        try:
-                            _ri = _ids.index(_pid_p) + 2
-                        except ValueError:
+                        _ri = _reg.linha(_pid_p)
+                        if _ri is None:
+                            # linha não confirmada pelo registro (ex.: aba servida do snapshot)
+                            _ids = _ws_p.col_values(_ci)[1:]
+                            _ri = _ids.index(_pid_p) + 2 if _pid_p in _ids else None
+                        if _ri is None:
                             st.error(f"Produto '{_pid_p}' não encontrado na planilha.")
-                            _ri = None
                         if _ri:
                             _upd = []
                             if _cpv:
@@ -889,8 +850,7 @@ with _tab_prec:
                             if _ccu:
                                 _upd.append({"range": f"{_col_letter(_ccu)}{_ri}", "values": [[str(_novo_custo).replace(".",",")]]})
                             if _upd:
-                                _ws_p.batch_update(_upd, value_input_option="USER_ENTERED")
-                                st.cache_data.clear()
+                                atualizar_celulas(_ws_p, _upd)
                                 st.success(f"✅ **{_nome_p}** atualizado! Venda: R$ {_novo_preco:.2f} · Custo: R$ {_novo_custo:.2f}")
                             else:
                                 st.warning("Colunas de preço/custo não encontradas na planilha.")
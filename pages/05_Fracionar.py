@@ -9,43 +9,16 @@ from datetime import date, datetime
 import gspread
 import pandas as pd
 import streamlit as st
-from google.oauth2.service_account import Credentials
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
+
+from utils.bootstrap import configurar_pagina, get_as_dataframe, set_with_dataframe
 
 # ──────────────────────────────────────────────
 #  CONFIG & TEMA
 # ──────────────────────────────────────────────
-import pathlib
-_cfg = pathlib.Path(".streamlit"); _cfg.mkdir(exist_ok=True)
-(_cfg / "config.toml").write_text('[theme]\nbase = "dark"\n')
-
-st.set_page_config(
-    page_title="Fracionar",
-    page_icon="✂️",
-    layout="wide",
-    initial_sidebar_state="collapsed",
-)
+configurar_pagina("Fracionar", "✂️", barra_lateral="collapsed", estilo_base=True)
 
 st.markdown("""
 <style>
-@import url('https://fonts.googleapis.com/css2?family=Nunito:wght@400;600;700;800;900&family=DM+Sans:wght@300;400;500&display=swap');
-html, body, [class*="css"] { font-family: 'DM Sans', sans-serif; }
-
-/* Header */
-.page-header {
-    background: linear-gradient(135deg, #1a1a2e 0%, #16213e 60%, #0f3460 100%);
-    border-radius: 20px; padding: 24px 32px; margin-bottom: 24px;
-    display: flex; align-items: center; justify-content: space-between;
-    box-shadow: 0 8px 32px rgba(15,52,96,0.25);
-}
-.page-header h1 { font-family:'Nunito',sans-serif; font-weight:900; font-size:1.7rem; color:#fff; margin:0; }
-.page-header .sub { font-size:0.82rem; color:rgba(255,255,255,0.5); margin-top:4px; }
-.header-badge {
-    background:rgba(255,255,255,0.1); border:1px solid rgba(255,255,255,0.2);
-    border-radius:50px; padding:8px 18px; color:#fff; font-size:0.82rem;
-    font-weight:600; backdrop-filter:blur(10px);
-}
-
 /* Seção título */
 .sec-titulo {
     font-family:'Nunito',sans-serif; font-weight:800; font-size:1.05rem;
@@ -184,9 +157,9 @@ footer { display: none !important; }
 # ──────────────────────────────────────────────
 #  HELPERS SHEETS
 from utils.sheets import (
-    sheet, carregar_aba, garantir_aba, append_rows,
+    sheet, carregar_aba, invalidar_aba, garantir_aba, append_rows, ja_gravado,
     to_num, brl, safe_cost, first_col, fmt_num,
-    norm_tipo_mov, calcular_estoque, tg_send, tg_media, gerar_id, parse_date,
+    norm_tipo_mov, calcular_estoque, saldos_estoque, tg_send, tg_media, gerar_id, parse_date,
     ABA_PROD, ABA_VEND, ABA_COMP, ABA_MOVS, ABA_CLIEN, ABA_FIADO, ABA_FPAGT,
 )
 _to_num = to_num; _to_float = to_num; _brl = brl; _fmt_brl = brl
@@ -201,7 +174,7 @@ def conectar_sheets(): return sheet()
 def _sheet(): return sheet()
 def _conectar(): return sheet()
 
-@st.cache_data(ttl=15, show_spinner=False)
+# carregar_aba já tem cache próprio (com write-through); aqui é só um atalho
 def _carregar(aba):
     return carregar_aba(aba)
 
@@ -239,8 +212,7 @@ def _norm_tipo(t):
     return "outro"
 
 def _append_row(ws, row):
-    hdrs = [h.strip() for h in ws.row_values(1)]
-    ws.append_rows([[row.get(h,"") for h in hdrs]], value_input_option="USER_ENTERED")
+    append_rows(ws, [row])
 
 def _ensure_ws(name, headers=None):
     return garantir_aba(name, headers or [])
@@ -249,31 +221,18 @@ def _ensure_ws(name, headers=None):
 # ──────────────────────────────────────────────
 #  SALDO DE ESTOQUE — mesma lógica da Contagem Estoque
 # ──────────────────────────────────────────────
-def _saldo(df_mov: pd.DataFrame, prod_id: str, nome: str) -> float:
+def _saldo(prod_id: str, nome: str) -> float:
     """Calcula saldo exatamente como a página Contagem Estoque: entradas - saidas + ajustes."""
-    if df_mov.empty: return 0.0
-    c_id  = _pick(df_mov, "IDProduto", "ID")
-    c_qtd = _pick(df_mov, "Qtd", "Quantidade", "Qtde")
-    c_tip = _pick(df_mov, "Tipo", "Movimento", "Mov")
-    if not c_qtd or not c_tip: return 0.0
-
-    # filtra pelo produto
-    if c_id and prod_id:
-        base = df_mov[df_mov[c_id].astype(str) == str(prod_id)]
+    # somas vêm do checkpoint de estoque (+ movimentos novos); filtra pelo produto
+    if prod_id:
+        g = saldos_estoque()
+        alvo = str(prod_id).strip()
     else:
-        c_nm = _pick(df_mov, "Produto", "Nome")
-        if not c_nm: return 0.0
-        base = df_mov[df_mov[c_nm].astype(str).str.strip().str.lower() == nome.strip().lower()]
-    if base.empty: return 0.0
-
-    tnorm = base[c_tip].apply(_norm_tipo)
-    qtds  = base[c_qtd].apply(_to_f)
-
-    ent = qtds[tnorm == "entrada"].sum()
-    sai = qtds[tnorm == "saida"].sum()
-    adj = qtds[tnorm == "ajuste"].sum()   # ajustes negativos já vêm com sinal
-
-    return round(float(ent) - float(sai) + float(adj), 3)
+        g = saldos_estoque(chave=lambda pid, nm: nm.strip().lower())
+        alvo = nome.strip().lower()
+    if alvo not in g.index: return 0.0
+    # ajustes negativos já vêm com sinal
+    return round(float(g.at[alvo, "Saldo"]), 3)
 
 # ──────────────────────────────────────────────
 #  ANTI DUPLICIDADE
@@ -283,10 +242,9 @@ def _refid(data_str, produto, qtd, custo) -> str:
     return "FRAC-" + hashlib.sha1(base.encode()).hexdigest()[:12]
 
 def _ja_existe(ws, refid: str) -> bool:
+    # índice de idempotência em memória (sem baixar a aba Compras inteira)
     try:
-        cur = get_as_dataframe(ws, evaluate_formulas=True, dtype=str, header=0).dropna(how="all")
-        if cur.empty or "RefID" not in cur.columns: return False
-        return refid in cur["RefID"].astype(str).tolist()
+        return ja_gravado(ws.title, refid, "RefID")
     except Exception:
         return False
 
@@ -295,7 +253,6 @@ def _ja_existe(ws, refid: str) -> bool:
 #  CARREGA DADOS
 # ──────────────────────────────────────────────
 df_prod = _safe_load("Produtos")
-df_mov  = _safe_load("MovimentosEstoque")
 
 MOV_HEADERS  = ["Data","IDProduto","Produto","Tipo","Qtd","Obs"]
 COMP_HEADERS = ["Data","Produto","Unidade","Fornecedor","Qtd","Custo Unitário","Total","IDProduto","Obs","RefID"]
@@ -388,7 +345,7 @@ nome_g   = str(row_g.get(c_nome, "") or "")
 unid_g   = str(row_g.get(c_unid, "") or "").strip()
 custo_g  = _to_f(row_g.get(c_custo, 0))   # custo por litro
 foto_g   = str(row_g.get(c_foto, "") or "").strip()
-saldo_g  = _saldo(df_mov, pid_g, nome_g)
+saldo_g  = _saldo(pid_g, nome_g)
 
 # Card do produto selecionado
 img_tag = f'<img src="{foto_g}" alt="foto">' if foto_g.startswith("http") else '<div class="prod-card-ph">🧴</div>'
@@ -494,8 +451,7 @@ if st.session_state.get("mostrar_cadastro_frac"):
             ws_prod.clear()
             set_with_dataframe(ws_prod, df_novo.fillna(""), include_index=False,
                                include_column_header=True, resize=True)
-            st.cache_data.clear()
-            _carregar.clear()
+            invalidar_aba("Produtos")
             st.session_state["mostrar_cadastro_frac"] = False
             st.session_state["prod_recém_cadastrado"] = novo_nome.strip()
             st.success(f"✅ Produto **{novo_nome.strip()}** cadastrado!")
@@ -751,12 +707,11 @@ if btn_confirmar:
                     ws_prod.clear()
                     set_with_dataframe(ws_prod, df_prods.fillna(""), include_index=False,
                                        include_column_header=True, resize=True)
+                    invalidar_aba("Produtos")
         except Exception as _e:
             st.warning(f"⚠️ Estoque atualizado, mas não foi possível salvar o custo: {_e}")
 
-        # Limpa o cache pra dashboard atualizar
-        st.cache_data.clear()
-        _carregar.clear()
+        # MovimentosEstoque e Compras já entraram no cache via append_rows (write-through)
 
     st.balloons()
     st.success(f"✅ Fracionamento registrado com sucesso! {qtd_prod} unidades de {nome_f} geradas.")
@@ -6,12 +6,12 @@ from datetime import datetime, date, timedelta
 import streamlit as st
 import pandas as pd
 import gspread
-from gspread_dataframe import get_as_dataframe
 from gspread.utils import rowcol_to_a1
-from google.oauth2.service_account import Credentials
+
+from utils.bootstrap import configurar_pagina
 
 # ---- Config UI ----
-st.set_page_config(page_title="Fiado — Ebenezér Variedades", page_icon="💳", layout="wide")
+configurar_pagina("Fiado — Ebenezér Variedades", "💳")
 st.title("💳 Fiado — lançar, quitar e acompanhar")
 
 # =========================
@@ -20,8 +20,8 @@ st.title("💳 Fiado — lançar, quitar e acompanhar")
 #  CONEXÃO / HELPERS  (centralizados em utils/sheets.py)
 # ──────────────────────────────────────────────
 from utils.sheets import (
-    sheet, carregar_aba, append_rows,
-    to_num, brl, safe_cost, first_col, fmt_num,
+    sheet, carregar_aba, append_rows as _append_rows_sheets, atualizar_celulas, cabecalho,
+    to_num, to_num_series, brl, safe_cost, first_col, fmt_num,
     norm_tipo_mov, calcular_estoque, tg_send, tg_media, gerar_id, parse_date,
 )
 # Aliases de compatibilidade
@@ -80,6 +80,8 @@ def garantir_aba(ss, nome, cols_padrao):
         missing = [c for c in cols_padrao if _norm_key(c) not in have]
         if missing:
             ws.update('A1', [fix + missing])
+        if fix != headers or missing:
+            cabecalho(ws, recarregar=True)  # o append_rows seguinte usa a linha 1 nova
     return ws
 
 def col_map(ws):
@@ -90,17 +92,10 @@ def col_map(ws):
         if k and k not in mp: mp[k] = i+1
     return mp
 
-@st.cache_data(ttl=20, show_spinner=False)
 def load_df(aba: str) -> pd.DataFrame:
-    sh = conectar_sheets()
-    ws = garantir_aba(sh, aba, {
-        ABA_CLIENTES: COLS_CLIENTES,
-        ABA_FIADO:    COLS_FIADO,
-        ABA_PAGT:     COLS_PAGT
-    }[aba])
-    df = get_as_dataframe(ws, evaluate_formulas=True, dtype=str, header=0).dropna(how="all")
-    df.columns = [c.strip() for c in df.columns]
-    # garante colunas
+    # cache fica no carregar_aba (write-through); índice = linha da planilha − 2
+    df = carregar_aba(aba)
+    # garante colunas (a aba é criada/corrigida por garantir_aba na hora de gravar)
     base_cols = {ABA_CLIENTES: COLS_CLIENTES, ABA_FIADO: COLS_FIADO, ABA_PAGT: COLS_PAGT}[aba]
     for c in base_cols:
         if c not in df.columns: df[c] = ""
@@ -112,13 +107,12 @@ def append_rows(ws, rows: list[dict]):
     if not headers:
         ws.append_row(list(rows[0].keys()))
         headers = ws.row_values(1)
-    hdr_norm = [_norm_key(h) for h in headers]
     to_append = []
     for d in rows:
         dn = {_norm_key(k): v for k,v in d.items()}
-        to_append.append([dn.get(hn, "") for hn in hdr_norm])
+        to_append.append({h.strip(): dn.get(_norm_key(h), "") for h in headers})
     if to_append:
-        ws.append_rows(to_append, value_input_option="USER_ENTERED")
+        _append_rows_sheets(ws, to_append)
 
 def gerar_id(prefixo="F"):
     # F-YYYYMMDDHHMMSSmmm
@@ -188,8 +182,7 @@ with tab_novo:
         # 2) Se for realmente novo (não existe equivalente normalizado), cadastra na aba Clientes
         if _strip_accents_lower(cliente_final) not in norm_to_canon:
             append_rows(ws_cli, [{"Cliente": cliente_final, "Telefone": tel_novo, "Obs": ""}])
-            # atualiza cache e mapas locais
-            st.cache_data.clear()
+            # atualiza mapas locais (o cache da aba já recebeu a linha nova)
             df_cli = load_df(ABA_CLIENTES)
             df_cli["_norm"] = df_cli["Cliente"].apply(_strip_accents_lower)
             norm_to_canon = {n: c for n, c in zip(df_cli["_norm"], df_cli["Cliente"]) if str(c).strip()}
@@ -225,14 +218,13 @@ with tab_novo:
             pass
 
         st.success(f"Fiado lançado para **{cliente_final}** no valor de **{_fmt_brl(valor)}** (ID {fid}).")
-        st.cache_data.clear()
 
 # ---------- REGISTRAR PAGAMENTO ----------
 with tab_quitar:
     st.subheader("💰 Registrar pagamento de fiados")
 
     df_fiado = load_df(ABA_FIADO)
-    df_fiado["ValorNum"] = df_fiado["Valor"].apply(_to_float)
+    df_fiado["ValorNum"] = to_num_series(df_fiado["Valor"])
     abertos = df_fiado[df_fiado["Status"].astype(str).str.lower()=="em aberto"].copy()
 
     if abertos.empty:
@@ -296,7 +288,7 @@ with tab_quitar:
                         if c:
                             updates.append({"range": rowcol_to_a1(idx, c), "values": [[v]]})
                 if updates:
-                    ws_fiado.batch_update(updates, value_input_option="USER_ENTERED")
+                    atualizar_celulas(ws_fiado, updates)
 
                 # escreve resumo do pagamento
                 pid = gerar_id("P")
@@ -318,7 +310,7 @@ with tab_quitar:
                     saldo_restante = None
                     if cli:
                         df_fiado_after = load_df(ABA_FIADO)  # recarrega
-                        df_fiado_after["ValorNum"] = df_fiado_after["Valor"].apply(_to_float)
+                        df_fiado_after["ValorNum"] = to_num_series(df_fiado_after["Valor"])
                         aberto_cli = df_fiado_after[
                             (df_fiado_after["Cliente"].astype(str)==cli) &
                             (df_fiado_after["Status"].astype(str).str.lower()=="em aberto")
@@ -347,8 +339,6 @@ with tab_quitar:
                 except Exception:
                     pass
 
-                st.cache_data.clear()
-
 # ---------- EM ABERTO ----------
 with tab_abertos:
     st.subheader("📋 Fiados em aberto")
@@ -357,7 +347,7 @@ with tab_abertos:
     if df_fiado.empty:
         st.info("Sem registros.")
     else:
-        df_fiado["ValorNum"] = df_fiado["Valor"].apply(_to_float)
+        df_fiado["ValorNum"] = to_num_series(df_fiado["Valor"])
         em_aberto = df_fiado[df_fiado["Status"].astype(str).str.lower()=="em aberto"].copy()
 
         c1,c2 = st.columns([1,1])
@@ -6,15 +6,14 @@ from typing import Optional
 import streamlit as st
 import pandas as pd
 import gspread
-from gspread_dataframe import get_as_dataframe
-from google.oauth2.service_account import Credentials
 
-# >>> Cloudinary (SDK oficial, assinatura automática)
-import cloudinary
-import cloudinary.uploader
-import cloudinary.api
+from utils.bootstrap import configurar_pagina, preguicoso
 
-st.set_page_config(page_title="Upload de Fotos (Produtos)", page_icon="🖼️", layout="wide")
+# >>> Cloudinary (SDK oficial, assinatura automática) — carregado no primeiro upload/consulta;
+#     cloudinary.uploader / cloudinary.api são importados no primeiro acesso
+cloudinary = preguicoso("cloudinary")
+
+configurar_pagina("Upload de Fotos (Produtos)", "🖼️")
 st.title("🖼️ Upload/URL de Foto para Produtos")
 
 # ======================================================================
@@ -23,7 +22,7 @@ st.title("🖼️ Upload/URL de Foto para Produtos")
 #  CONEXÃO / HELPERS  (centralizados em utils/sheets.py)
 # ──────────────────────────────────────────────
 from utils.sheets import (
-    sheet, carregar_aba, garantir_aba, append_rows,
+    sheet, carregar_aba, invalidar_aba, cache_por_aba, garantir_aba, append_rows,
     to_num, brl, safe_cost, first_col, fmt_num,
     norm_tipo_mov, calcular_estoque, tg_send, tg_media, gerar_id, parse_date,
     ABA_PROD, ABA_VEND, ABA_COMP, ABA_MOVS, ABA_CLIEN, ABA_FIADO, ABA_FPAGT,
@@ -68,12 +67,26 @@ def _ensure_foto_col(ws) -> tuple[str, int]:
     ws.update_cell(1, new_idx, "Foto")
     return "Foto", new_idx
 
-@st.cache_data(ttl=20, show_spinner=False)
+# mesma leitura do carregar_aba (sem IDs repetidos); índice = linha − 2 quando a linha é certa
+@cache_por_aba(ABA_PRODUTOS)
 def carregar_produtos() -> pd.DataFrame:
-    ws = _sheet().worksheet(ABA_PRODUTOS)
-    df = get_as_dataframe(ws, evaluate_formulas=True, dtype=str, header=0).dropna(how="all")
-    df.columns = [c.strip() for c in df.columns]
-    return df.fillna("")
+    df = carregar_aba(ABA_PRODUTOS)
+    linhas = df.attrs.get("linhas_planilha")
+    certas = linhas is not None and len(linhas) == len(df)
+    if certas:
+        df.index = pd.Index(linhas) - 2
+    df.attrs = {**df.attrs, "linhas_planilha": linhas if certas else None}
+    return df
+
+def _linha_planilha(ws, i) -> int:
+    """Linha do produto na planilha: índice + 2; sem linha certa (aba do snapshot), procura pelo ID."""
+    sku_i = _nrm_name(dfp.loc[i, col_id]) if col_id else ""
+    if dfp.attrs.get("linhas_planilha") is None and sku_i:
+        c = _find_col(_headers(ws), [col_id])
+        ids = [v.strip() for v in ws.col_values(c)[1:]] if c else []
+        if sku_i in ids:
+            return ids.index(sku_i) + 2
+    return int(i) + 2
 
 # ======================================================================
 # Cloudinary (SDK) — mesma lógica do arquivo que funciona
@@ -145,10 +158,10 @@ with col1:
                 sh = _sheet()
                 ws = sh.worksheet(ABA_PRODUTOS)
                 _, foto_col = _ensure_foto_col(ws)
-                target_row = int(sel_idx) + 2  # DF 0-based; planilha começa na 2
+                target_row = _linha_planilha(ws, sel_idx)
                 ws.update_cell(target_row, foto_col, url.strip())
+                invalidar_aba(ABA_PRODUTOS)
                 st.success("✅ URL salva no catálogo!")
-                st.session_state["_force_refresh"] = True
             except Exception as e:
                 st.error(f"Erro ao salvar: {e}")
 
@@ -204,7 +217,7 @@ else:
             foto_idx = _find_col(hdrs, ["Foto","FotoURL","Imagem","Image","Link","UrlFoto","URL_Foto"])
             if foto_idx:
                 # dfp é cacheado — pegamos da mesma linha/coluna
-                existe_url = str(dfp.iloc[sel_idx, foto_idx-1]).strip()
+                existe_url = str(dfp.loc[sel_idx].iloc[foto_idx-1]).strip()
         except Exception:
             pass
 
@@ -240,13 +253,13 @@ else:
                     sh = _sheet()
                     ws = sh.worksheet(ABA_PRODUTOS)
                     _, foto_col = _ensure_foto_col(ws)
-                    target_row = int(sel_idx) + 2
+                    target_row = _linha_planilha(ws, sel_idx)
                     ws.update_cell(target_row, foto_col, secure_url)
+                    invalidar_aba(ABA_PRODUTOS)
 
                     st.success("✅ Upload concluído e URL salva no catálogo!")
                     st.image(secure_url, width=preview_size, caption=f"{nome_prod} (Cloudinary)")
                     st.code(secure_url, language="text")
-                    st.session_state["_force_refresh"] = True
                 except Exception as e:
                     st.error(f"Erro ao enviar/salvar imagem: {e}")
 
@@ -262,8 +275,9 @@ else:
                 sh = _sheet()
                 ws = sh.worksheet(ABA_PRODUTOS)
                 _, foto_col = _ensure_foto_col(ws)
-                target_row = int(sel_idx) + 2
+                target_row = _linha_planilha(ws, sel_idx)
                 ws.update_cell(target_row, foto_col, "")
+                invalidar_aba(ABA_PRODUTOS)
                 st.success("Link removido da planilha.")
                 st.rerun()
             except Exception as e:
@@ -282,7 +296,7 @@ try:
         # dfp foi carregado antes; pode estar desatualizado se acabou de salvar.
         # Em um app real, você pode recarregar; aqui só tentamos exibir.
         try:
-            foto_url_salva = dfp.iloc[sel_idx, foto_idx-1]
+            foto_url_salva = dfp.loc[sel_idx].iloc[foto_idx-1]
         except Exception:
             foto_url_salva = ""
         if str(foto_url_salva).strip():
@@ -307,9 +321,9 @@ try:
     hdrs = _headers(ws)
     foto_idx = _find_col(hdrs, ["Foto","FotoURL","Imagem","Image","Link","UrlFoto","URL_Foto"])
     if foto_idx:
-        for i_row in range(len(dfp)):
+        for i_row in dfp.index:
             nome = _nrm_name(dfp.loc[i_row, col_nome])
-            url_foto = str(dfp.iloc[i_row, foto_idx-1]).strip()
+            url_foto = str(dfp.loc[i_row].iloc[foto_idx-1]).strip()
             if url_foto:
                 with cols[i % 6]:
                     st.image(url_foto, width=110, caption=nome)
@@ -0,0 +1,141 @@
+# pages/08_Monitor_API.py — chamadas ao Google Sheets por página, operação e etapa
+# -*- coding: utf-8 -*-
+from datetime import datetime
+
+import streamlit as st
+import pandas as pd
+
+from utils.bootstrap import configurar_pagina, preguicoso, tempos_importacao
+
+px = preguicoso("plotly.express")
+
+# ──────────────────────────────────────────────
+#  CONFIG & TEMA
+# ──────────────────────────────────────────────
+configurar_pagina("Monitor da API", "📡", barra_lateral="collapsed", estilo_base=True)
+
+st.markdown("""
+<style>
+.sec-titulo {
+    font-family:'Nunito',sans-serif; font-weight:800; font-size:1.05rem;
+    color:rgba(255,255,255,0.9); margin:28px 0 14px 0;
+}
+</style>
+""", unsafe_allow_html=True)
+
+from utils.cota import estatisticas_cota
+from utils.instrumentacao import ULTIMAS_CHAMADAS, chamadas_api, limpar_chamadas
+from utils.sheets import estatisticas_coalescencia
+from utils.telegram import estatisticas_telegram
+
+# ──────────────────────────────────────────────
+#  DADOS
+# ──────────────────────────────────────────────
+df = pd.DataFrame(chamadas_api())
+
+st.markdown(f"""
+<div class="page-header">
+  <div>
+    <h1>📡 Monitor da API do Sheets</h1>
+    <div class="sub">Últimas {ULTIMAS_CHAMADAS:,} requisições deste processo · {datetime.now().strftime("%d/%m/%Y %H:%M:%S")}</div>
+  </div>
+  <div class="header-badge">{len(df):,} chamadas registradas</div>
+</div>
+""", unsafe_allow_html=True)
+
+c1, c2 = st.columns([1, 5])
+with c1:
+    if st.button("🔄 Atualizar", use_container_width=True):
+        st.rerun()
+with c2:
+    # mesma área escondida do painel (app.py): zerar apaga o histórico de todas as sessões
+    with st.expander("⚙️ Ferramentas avançadas", expanded=False):
+        confirma = st.checkbox("Apagar os registros de todas as sessões deste processo")
+        if st.button("🧹 Zerar registros", disabled=not confirma):
+            limpar_chamadas()
+            st.rerun()
+
+if df.empty:
+    st.info("Nenhuma chamada ao Sheets registrada ainda neste processo.")
+    st.stop()
+
+df["em"] = df["em"].map(datetime.fromtimestamp)  # hora local
+df["kb"] = (df["bytes_enviados"] + df["bytes_recebidos"]) / 1024
+
+
+def _resumo(por: str) -> pd.DataFrame:
+    """Chamadas, p50/p95/máx em ms, KB e erros por grupo (mais caro primeiro)."""
+    g = df.groupby(por, sort=False)
+    out = pd.DataFrame({
+        "chamadas": g.size(),
+        "p50_ms": g["ms"].quantile(0.50),
+        "p95_ms": g["ms"].quantile(0.95),
+        "max_ms": g["ms"].max(),
+        "total_s": g["ms"].sum() / 1000,
+        "kb_env": g["bytes_enviados"].sum() / 1024,
+        "kb_rec": g["bytes_recebidos"].sum() / 1024,
+        "erros": g["erro"].apply(lambda s: int((s != "").sum())),
+    })
+    return out.round(1).sort_values("total_s", ascending=False).reset_index()
+
+
+# ──────────────────────────────────────────────
+#  KPIs
+# ──────────────────────────────────────────────
+k1, k2, k3, k4, k5 = st.columns(5)
+k1.metric("Chamadas", f"{len(df):,}")
+k2.metric("p50", f"{df['ms'].quantile(0.5):.0f} ms")
+k3.metric("p95", f"{df['ms'].quantile(0.95):.0f} ms")
+k4.metric("Tráfego", f"{df['kb'].sum() / 1024:.2f} MB")
+k5.metric("Erros", int((df["erro"] != "").sum()))
+
+cota = estatisticas_cota()
+voo = estatisticas_coalescencia()
+st.caption(f"Cota: {cota['erros_429']} respostas 429 · {cota['repeticoes']} repetições · "
+           f"{cota['segundos_esperando']}s esperando ficha · "
+           f"{voo['coalescidas']} leituras de aba coalescidas ({voo['economia_pct']}%)")
+tg = estatisticas_telegram()
+st.caption(f"Telegram: {tg['mensagens']} mensagens enviadas · {tg['resumidos']} avisos juntados em resumos · "
+           f"{tg['na_fila']} na fila · {tg['repeticoes']} repetições · {tg['falhas']} falhas · "
+           f"{tg['descartados']} descartados (fila cheia)")
+_imp = tempos_importacao()
+if _imp:
+    st.caption("Imports adiados (1º uso neste processo): "
+               + " · ".join(f"{m} {ms:.0f} ms" for m, ms in sorted(_imp.items(), key=lambda x: -x[1])))
+
+# ──────────────────────────────────────────────
+#  RESUMOS
+# ──────────────────────────────────────────────
+for titulo, por in (("📄 Por página", "pagina"), ("⚙️ Por operação", "operacao"),
+                    ("🗂️ Por aba", "aba"), ("🧩 Por etapa", "etapa")):
+    st.markdown(f'<div class="sec-titulo">{titulo}</div>', unsafe_allow_html=True)
+    st.dataframe(_resumo(por), use_container_width=True, hide_index=True)
+
+# ──────────────────────────────────────────────
+#  HISTOGRAMAS
+# ──────────────────────────────────────────────
+st.markdown('<div class="sec-titulo">📊 Distribuição de latência</div>', unsafe_allow_html=True)
+agrupar = st.radio("Agrupar por", ["operacao", "pagina"], horizontal=True,
+                   format_func={"operacao": "Operação", "pagina": "Página"}.get)
+fig = px.histogram(df, x="ms", color=agrupar, nbins=60, barmode="overlay", opacity=0.6,
+                   labels={"ms": "latência (ms)"})
+fig.add_vline(x=df["ms"].quantile(0.50), line_dash="dot", annotation_text="p50")
+fig.add_vline(x=df["ms"].quantile(0.95), line_dash="dash", annotation_text="p95")
+fig.update_layout(template="plotly_dark", height=380, margin=dict(l=10, r=10, t=30, b=10),
+                  paper_bgcolor="rgba(0,0,0,0)", plot_bgcolor="rgba(0,0,0,0)")
+st.plotly_chart(fig, use_container_width=True)
+
+# ──────────────────────────────────────────────
+#  ÚLTIMAS CHAMADAS + CSV
+# ──────────────────────────────────────────────
+st.markdown('<div class="sec-titulo">🧾 Últimas chamadas</div>', unsafe_allow_html=True)
+n = st.number_input("Quantas", min_value=10, max_value=ULTIMAS_CHAMADAS, value=min(500, ULTIMAS_CHAMADAS), step=50)
+ult = df.tail(int(n)).iloc[::-1].drop(columns=["kb"])
+st.dataframe(ult, use_container_width=True, hide_index=True)
+st.download_button(
+    "⬇️ Exportar CSV",
+    ult.to_csv(index=False).encode("utf-8"),
+    file_name=f"chamadas_sheets_{datetime.now():%Y%m%d_%H%M%S}.csv",
+    mime="text/csv",
+    use_container_width=True,
+)
@@ -0,0 +1,122 @@
+# tests/test_outbox.py — lançamentos na fila local já aparecem nas leituras
+# -*- coding: utf-8 -*-
+"""
+Venda enfileirada (utils.outbox) ainda não está no Sheets, mas o estoque, as
+"Últimas vendas" (carregar_tipada) e a checagem de clique duplo (ja_gravado) já
+contam com ela. Depois do envio (append com write-through) nada aparece em
+dobro, e a conferência de chaves numa nova tentativa não derruba o checkpoint
+de estoque.
+
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import pytest
+
+from utils import outbox as ob
+from utils import sheets as S
+
+
+class _Ws:
+    """Worksheet fake: guarda o cabeçalho e devolve o updatedRange do append."""
+
+    def __init__(self, title: str, hdrs: list[str], linhas: int):
+        self.title, self.hdrs, self.linhas = title, hdrs, linhas
+        self.gravadas: list[list] = []
+
+    def row_values(self, n):
+        return list(self.hdrs)
+
+    def append_rows(self, data, value_input_option=None):
+        ini = self.linhas + 1
+        self.linhas += len(data)
+        self.gravadas += data
+        return {"updates": {"updatedRange": f"'{self.title}'!A{ini}:K{self.linhas}"}}
+
+
+def _venda(vid: str, pid: str, qtd: int) -> dict:
+    return {"Data": "14/04/2026", "VendaID": vid, "IDProduto": pid, "Qtd": str(qtd), "PrecoUnit": "2,00",
+            "TotalLinha": f"{2 * qtd},00", "FormaPagto": "Pix", "Obs": "", "Desconto": "0,00",
+            "TotalCupom": f"{2 * qtd},00", "CupomStatus": "OK", "Cliente": "", "FiadoID": ""}
+
+
+def _mov(vid: str, pid: str, tipo: str, qtd: int) -> dict:
+    return {"Data": "14/04/2026", "IDProduto": pid, "Produto": f"Prod {pid}", "Tipo": tipo, "Qtd": str(qtd),
+            "Obs": "", "ID": vid, "Documento/NF": "", "Origem": "teste", "SaldoApós": ""}
+
+
+@pytest.fixture
+def abas(monkeypatch, tmp_path):
+    monkeypatch.setenv("EBENEZER_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(S, "CACHE_TTL", 10 ** 9)
+    monkeypatch.setattr(ob, "iniciar_worker", lambda: None)  # o teste drena na mão
+    monkeypatch.setattr(S, "_pendentes", {})
+    monkeypatch.setattr(S, "_pend_frames", {})
+    S.descartar_checkpoint_estoque()
+    iniciais = {S.ABA_VEND: [_venda("V1", "1", 2)],
+                S.ABA_MOVS: [_mov("C1", "1", "Entrada", 10), _mov("V1", "1", "B saída", 2)]}
+    planilhas = {}
+    for nome, linhas in iniciais.items():
+        cols = S.COLS[nome]
+        valores = [cols] + [[r.get(c, "") for c in cols] for r in linhas]
+        S._guardar_mem(nome, S._df_de_valores(nome, valores), "teste", bruto={"linhas": len(valores)})
+        S._guardar_cabecalho(nome, cols)
+        planilhas[nome] = _Ws(nome, cols, len(valores))
+    monkeypatch.setattr(S, "garantir_aba", lambda nome, colunas=None: planilhas[nome])
+    yield planilhas
+    S.descartar_checkpoint_estoque()
+
+
+def _enfileirar_venda(vid: str, qtd: int) -> None:
+    assert ob.enfileirar(S.ABA_VEND, [_venda(vid, "1", qtd)], chave=vid, coluna_chave="VendaID")
+    assert ob.enfileirar(S.ABA_MOVS, [_mov(vid, "1", "B saída", qtd)], chave=vid, coluna_chave="ID")
+
+
+def test_venda_na_fila_ja_aparece(abas):
+    versao = S.versao_aba(S.ABA_MOVS)
+    _enfileirar_venda("V2", 3)
+    assert S.versao_aba(S.ABA_MOVS) > versao  # caches por aba (catálogo) refazem
+    assert S.carregar_tipada(S.ABA_VEND)["VendaID"].tolist() == ["V1", "V2"]
+    assert len(S.carregar_aba(S.ABA_MOVS)) == 3
+    assert S.saldos_estoque()["Saldo"]["1"] == pytest.approx(5)
+    assert S.ja_gravado(S.ABA_VEND, "V2")
+    assert not S.ja_gravado(S.ABA_VEND, "V2", pendentes=False)
+    # o resumo diário segue só as linhas da aba (corte/assinatura do incremento)
+    assert len(S.carregar_tipadas([S.ABA_VEND], pendentes=False)[S.ABA_VEND]) == 1
+
+
+def test_sobras_do_sqlite_voltam_depois_de_reiniciar(abas, monkeypatch):
+    _enfileirar_venda("V2", 3)
+    monkeypatch.setattr(S, "_pendentes", {})  # processo novo
+    monkeypatch.setattr(ob, "_pendentes_lidos", False)
+    assert len(S.carregar_aba(S.ABA_VEND)) == 1
+    ob._registrar_sobras()
+    assert S.carregar_aba(S.ABA_VEND)["VendaID"].tolist() == ["V1", "V2"]
+
+
+def test_depois_do_envio_nada_aparece_em_dobro(abas):
+    _enfileirar_venda("V2", 3)
+    assert ob.drenar_fila() == 2
+    assert [r[1] for r in abas[S.ABA_VEND].gravadas] == ["V2"]
+    assert not S._pendentes.get(S.ABA_VEND) and not S._pendentes.get(S.ABA_MOVS)
+    assert S.carregar_tipada(S.ABA_VEND)["VendaID"].tolist() == ["V1", "V2"]
+    assert S.saldos_estoque()["Saldo"]["1"] == pytest.approx(5)
+    assert S.ja_gravado(S.ABA_VEND, "V2", pendentes=False)
+
+
+def test_chave_ja_na_aba_esconde_a_linha_pendente(abas):
+    # o append chegou ao Sheets mas o worker ainda não tirou o lançamento da lista
+    _enfileirar_venda("V2", 3)
+    S.append_rows(abas[S.ABA_MOVS], [_mov("V2", "1", "B saída", 3)])
+    assert len(S.carregar_aba(S.ABA_MOVS)) == 3
+    assert S.saldos_estoque()["Saldo"]["1"] == pytest.approx(5)
+
+
+def test_conferir_chaves_nao_descarta_o_checkpoint(abas):
+    S.marcar_checkpoint_estoque()
+    S.saldos_estoque()
+    assert S._carregar_checkpoint() is not None
+    S.invalidar_aba(S.ABA_MOVS, derivados=False)
+    assert S._cp_estoque is not None
+    S.invalidar_aba(S.ABA_MOVS)
+    assert S._cp_estoque is None
@@ -0,0 +1,92 @@
+# tests/test_resumo.py — resumo diário de vendas × cálculo linha a linha do painel
+# -*- coding: utf-8 -*-
+"""
+Os KPIs do painel (faturamento, nº de vendas, itens, custo) saem do resumo_periodo;
+antes saíam de um groupby por VendaID sobre as linhas tipadas do período. Este teste
+refaz o cálculo antigo e confere que o resumo dá o mesmo, com estornos ("CN-…" e Obs
+"ESTORNO"), CupomStatus "ESTORNO" (não conta como estorno), linhas sem VendaID e
+produto sem custo em Produtos (último custo de compra pela Data, + frete).
+
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import random
+
+import pandas as pd
+import pytest
+
+from utils import sheets as S
+
+COLS_VEND = ["Data", "VendaID", "IDProduto", "Qtd", "PrecoUnit", "TotalLinha", "FormaPagto",
+             "Obs", "Desconto", "TotalCupom", "CupomStatus"]
+
+
+def _txt(linhas: list[list], cols: list[str]) -> pd.DataFrame:
+    return S._df_de_valores("", [cols] + [[str(v) for v in r] for r in linhas])
+
+
+@pytest.fixture
+def abas(monkeypatch, tmp_path):
+    monkeypatch.setenv("EBENEZER_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(S, "CACHE_TTL", 10 ** 9)
+    monkeypatch.setattr(S, "_vendas_arquivadas", lambda: [])
+    S.descartar_resumo_diario()
+    rng = random.Random(7)
+    prod = [[str(i), f"Prod {i}", "Cat A" if i % 2 else "Cat B", "0" if i == 3 else f"{i},50"] for i in range(1, 9)]
+    comp = [["10/03/2026", "3", "2", "5,00", "10,00", "0,50"], ["01/03/2026", "3", "1", "9,00", "9,00", "0"]]
+    vend = []
+    for d in range(1, 29):
+        dia = f"{d:02d}/02/2026"
+        for c in range(4):
+            vid = rng.choice([f"V{d}-{c}", f"V{d}-{c}", f"CN-V{d}-{c}", ""])
+            for _ in range(rng.randint(1, 3)):
+                p, q, pr = rng.randint(1, 8), rng.randint(1, 4), rng.randint(2, 30)
+                obs = rng.choice(["", "", "ESTORNO DE V1", "troca"])
+                st_ = rng.choice(["", "", "ESTORNO"])
+                vend.append([dia, vid, str(p), q, f"{pr},00", f"{q * pr},00", rng.choice(["Pix", "Dinheiro"]),
+                             obs, "0", "0", st_])
+    for nome, linhas, cols in [(S.ABA_PROD, prod, ["ID", "Nome", "Categoria", "CustoAtual"]),
+                               (S.ABA_COMP, comp, ["Data", "IDProduto", "Qtd", "Custo Unitário", "Total", "Frete"]),
+                               (S.ABA_VEND, vend, COLS_VEND)]:
+        S._guardar_mem(nome, _txt(linhas, cols), "teste", bruto={"linhas": len(linhas) + 1})
+    yield
+    S.descartar_resumo_diario()
+
+
+def _kpis_antigos(de, ate) -> dict:
+    """O cálculo do painel antes do resumo (groupby por VendaID das linhas do período)."""
+    v = S.carregar_tipada(S.ABA_VEND)
+    vid = v["VendaID"].astype(str)
+    m = v["Data"].between(pd.Timestamp(de), pd.Timestamp(ate))
+    m &= ~(vid.str.upper().str.startswith("CN-") | v["Obs"].astype(str).str.upper().str.contains("ESTORNO", na=False))
+    p = v[m]
+    custo = S._custos_resumo()
+    key = pd.Series(S.canon_ids(p["IDProduto"]), index=p.index)
+    ok = key != ""
+    return {"faturamento": float(p["TotalLinha"].sum()),
+            "cupons": int(p["VendaID"].astype(str).nunique()),  # "" vira um grupo, como no groupby
+            "itens": float(p["Qtd"].sum()),
+            "cogs": float((p["Qtd"][ok] * key[ok].map(custo).fillna(0.0)).sum())}
+
+
+def _kpis_resumo(de, ate) -> dict:
+    r = S.resumo_periodo(de, ate)
+    return {"faturamento": float(r["Bruto"].sum()),
+            "cupons": int(round(r["Cupons"].sum())) + int(r["SemVendaID"].sum() > 0),
+            "itens": float(r["Qtd"].sum()),
+            "cogs": float(r["Custo"].sum())}
+
+
+@pytest.mark.parametrize("de, ate", [("2026-02-01", "2026-02-28"), ("2026-02-10", "2026-02-12"),
+                                     ("2026-02-05", "2026-02-05")])
+def test_resumo_igual_ao_calculo_por_linha(abas, de, ate):
+    novo, antigo = _kpis_resumo(de, ate), _kpis_antigos(de, ate)
+    assert novo["cupons"] == antigo["cupons"]
+    for k in ("faturamento", "itens", "cogs"):
+        assert novo[k] == pytest.approx(antigo[k]), k
+
+
+def test_custo_sem_custo_atual_usa_ultima_compra_pela_data(abas):
+    # produto 3: compra de 10/03 (5,00 + 0,50 de frete) é a mais nova, mesmo vindo antes na aba
+    assert S._custos_resumo()["3"] == pytest.approx(5.5)
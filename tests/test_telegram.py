@@ -0,0 +1,129 @@
+# tests/test_telegram.py — envio assíncrono do Telegram contra um servidor HTTP local
+# -*- coding: utf-8 -*-
+"""
+Sobe um http.server em 127.0.0.1 no lugar da API do Telegram (é o que
+TELEGRAM_API_URL aponta em produção) e confere o worker de utils.telegram:
+agendar não espera o envio, rajada vira resumo, 429 respeita o retry_after,
+400 no resumo reenvia parte por parte e a fila cheia descarta o mais antigo.
+
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import json
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from utils import telegram as tg
+
+TOKEN, CHAT = "123:abc", "-100"
+
+
+class _Api:
+    """Servidor fake: guarda cada requisição e responde o roteiro (depois, 200)."""
+
+    def __init__(self):
+        self.recebidas: list[dict] = []
+        self.roteiro: list[tuple[int, dict]] = []
+        self.demora = 0.0
+        self.lock = threading.Lock()
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                corpo = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with api.lock:
+                    api.recebidas.append({"caminho": self.path, "corpo": corpo, "em": time.monotonic()})
+                    status, resp = api.roteiro.pop(0) if api.roteiro else (200, {"ok": True})
+                time.sleep(api.demora)
+                dados = json.dumps(resp).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self.servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.servidor.server_address[1]}"
+        threading.Thread(target=self.servidor.serve_forever, daemon=True).start()
+
+    def esperar(self, n: int, prazo: float = 10.0) -> list[dict]:
+        fim = time.monotonic() + prazo
+        while time.monotonic() < fim:
+            with self.lock:
+                if len(self.recebidas) >= n:
+                    return list(self.recebidas)
+            time.sleep(0.02)
+        raise AssertionError(f"esperava {n} requisições, chegaram {len(self.recebidas)}")
+
+
+@pytest.fixture
+def api(monkeypatch):
+    monkeypatch.setattr(tg, "JANELA_RESUMO", 0.3)
+    monkeypatch.setattr(tg, "LIMITE_POR_MINUTO", 6000)  # o balde não entra no tempo dos testes
+    monkeypatch.setattr(tg, "_baldes", {})
+    for k in tg._estat:
+        tg._estat[k] = 0
+    a = _Api()
+    yield a
+    a.servidor.shutdown()
+    a.servidor.server_close()
+
+
+def _textos(recebidas: list[dict]) -> list[str]:
+    return [r["corpo"]["text"] for r in recebidas]
+
+
+def test_agendar_volta_sem_esperar_o_envio(api):
+    api.demora = 1.0
+    t0 = time.monotonic()
+    assert tg.agendar("texto", "venda 1", api.url, TOKEN, CHAT)
+    assert time.monotonic() - t0 < 0.2
+    r = api.esperar(1)
+    assert r[0]["caminho"] == f"/bot{TOKEN}/sendMessage"
+    assert r[0]["corpo"]["chat_id"] == CHAT
+
+
+def test_rajada_vira_um_resumo(api):
+    for i in range(3):
+        tg.agendar("texto", f"venda {i}", api.url, TOKEN, CHAT)
+    api.esperar(1)
+    time.sleep(tg.JANELA_RESUMO + 0.3)
+    assert _textos(api.recebidas) == [tg.SEPARADOR.join(f"venda {i}" for i in range(3))]
+    assert tg.estatisticas_telegram()["resumidos"] == 2
+
+
+def test_429_repete_depois_do_retry_after(api):
+    api.roteiro = [(429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 2}})]
+    tg.agendar("texto", "estoque baixo", api.url, TOKEN, CHAT)
+    primeira, segunda = api.esperar(2)
+    assert segunda["em"] - primeira["em"] >= 2.0
+    assert _textos([primeira, segunda]) == ["estoque baixo"] * 2
+    assert tg.estatisticas_telegram()["repeticoes"] == 1
+
+
+def test_400_no_resumo_reenvia_parte_por_parte(api):
+    api.roteiro = [(400, {"ok": False, "error_code": 400, "description": "can't parse entities"})]
+    tg.agendar("texto", "<b>venda 1</b>", api.url, TOKEN, CHAT)
+    tg.agendar("texto", "<b>venda 2", api.url, TOKEN, CHAT)
+    r = api.esperar(3)
+    assert _textos(r) == ["<b>venda 1</b>" + tg.SEPARADOR + "<b>venda 2", "<b>venda 1</b>", "<b>venda 2"]
+
+
+def test_fila_cheia_descarta_o_mais_antigo(monkeypatch):
+    monkeypatch.setattr(tg, "_fila", queue.Queue(maxsize=3))
+    monkeypatch.setattr(tg, "iniciar_worker", lambda: None)  # nada consome a fila
+    for k in tg._estat:
+        tg._estat[k] = 0
+    for i in range(4):
+        assert tg.agendar("texto", f"aviso {i}", "http://127.0.0.1:9", TOKEN, CHAT)
+    na_fila = [tg._fila.get_nowait()["carga"] for _ in range(tg._fila.qsize())]
+    assert na_fila == ["aviso 1", "aviso 2", "aviso 3"]
+    assert tg.estatisticas_telegram()["descartados"] == 1
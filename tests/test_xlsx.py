@@ -0,0 +1,98 @@
+# tests/test_xlsx.py — leitura das abas pelo export XLSX × matriz da API
+# -*- coding: utf-8 -*-
+"""
+Monta um XLSX pequeno com openpyxl e confere _ler_abas_xlsx(nomes, conteudo=...)
+contra _df_de_valores / _df_de_crus sobre a matriz que a API devolveria para as
+mesmas células: frames iguais, linhas vazias no meio preservadas (índice =
+linha da planilha − 2) e abas ausentes do arquivo voltando vazias.
+
+    python -m pytest -q tests
+"""
+from __future__ import annotations
+
+import io
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+
+from utils import sheets as S
+
+CAB_VENDAS = ["Data", "VendaID", "IDProduto", "Qtd", "PrecoUnit", "TotalLinha", "Obs"]
+CELULAS = {  # None = célula vazia; a linha 3 (índice 1) fica vazia inteira
+    "Vendas": [CAB_VENDAS,
+               [datetime(2026, 4, 14), "V-1", "123", 2, 12.5, 25, None],
+               [None] * 7,
+               [datetime(2026, 4, 15), "V-2", "P7", 1, 1453, 1453, "troca"],
+               [None] * 7,
+               [datetime(2026, 4, 16, 8, 30), "V-3", "123", 0.5, 3.25, 1.625, None]],
+    "Clientes": [["Nome", "Telefone"], ["Ana", "61 9999-0000"], [None, None], ["Bia", 6132220000]],
+}
+SERIAL = lambda d: float((d - date(1899, 12, 30)).days)  # noqa: E731
+
+# o que values_get devolve para as mesmas células (sem vazios no fim da linha/aba)
+API_TEXTO = {
+    "Vendas": [CAB_VENDAS,
+               ["14/04/2026", "V-1", "123", "2", "12,5", "25"],
+               [],
+               ["15/04/2026", "V-2", "P7", "1", "1453", "1453", "troca"],
+               [],
+               ["16/04/2026 08:30:00", "V-3", "123", "0,5", "3,25", "1,625"]],
+    "Clientes": [["Nome", "Telefone"], ["Ana", "61 9999-0000"], [], ["Bia", "6132220000"]],
+}
+API_CRU = {  # UNFORMATTED_VALUE / SERIAL_NUMBER
+    "Vendas": [CAB_VENDAS,
+               [SERIAL(date(2026, 4, 14)), "V-1", "123", 2, 12.5, 25],
+               [],
+               [SERIAL(date(2026, 4, 15)), "V-2", "P7", 1, 1453, 1453, "troca"],
+               [],
+               [SERIAL(date(2026, 4, 16)) + 8.5 / 24, "V-3", "123", 0.5, 3.25, 1.625]],
+}
+
+
+@pytest.fixture(scope="module")
+def conteudo() -> bytes:
+    from openpyxl import Workbook
+
+    wb = Workbook()
+    wb.remove(wb.active)
+    for nome, linhas in CELULAS.items():
+        ws = wb.create_sheet(nome)
+        for r in linhas:
+            ws.append(r)
+    buf = io.BytesIO()
+    wb.save(buf)
+    return buf.getvalue()
+
+
+def test_frames_iguais_ao_da_api(conteudo, monkeypatch):
+    monkeypatch.setattr(S, "_valores_crus", False)
+    lidas = S._ler_abas_xlsx(list(CELULAS), conteudo=conteudo)
+    for nome, valores in API_TEXTO.items():
+        df, bruto = lidas[nome]
+        pd.testing.assert_frame_equal(df, S._df_de_valores(nome, valores))
+        assert bruto["linhas"] == len(valores) and bruto["cauda"] is None
+
+
+def test_linhas_vazias_no_meio_mantem_o_indice(conteudo, monkeypatch):
+    monkeypatch.setattr(S, "_valores_crus", False)
+    df, _ = S._ler_abas_xlsx(["Vendas"], conteudo=conteudo)["Vendas"]
+    assert df.index.tolist() == [0, 2, 4]  # linha da planilha − 2
+    assert df.loc[2, "VendaID"] == "V-2" and df.loc[4, "PrecoUnit"] == "3,25"
+
+
+def test_aba_ausente_volta_vazia(conteudo):
+    df, bruto = S._ler_abas_xlsx(["Vendas", "Fiado"], conteudo=conteudo)["Fiado"]
+    assert df.empty and bruto is None
+
+
+def test_abas_sem_formatacao_usam_os_valores_nativos(conteudo, monkeypatch):
+    monkeypatch.setattr(S, "_valores_crus", True)
+    lidas = S._ler_abas_xlsx(list(CELULAS), conteudo=conteudo)
+    df, _ = lidas["Vendas"]
+    esperado = S._df_de_crus("Vendas", API_CRU["Vendas"])
+    pd.testing.assert_frame_equal(df, esperado)
+    pd.testing.assert_frame_equal(S._tipada_de(df), S._tipada_de(esperado))
+    assert S._tipada_de(df)["Data"].dt.day.tolist() == [14, 15, 16]
+    # Clientes não tem esquema: continua pelo caminho de textos
+    pd.testing.assert_frame_equal(lidas["Clientes"][0], S._df_de_valores("Clientes", API_TEXTO["Clientes"]))
@@ -0,0 +1,213 @@
+# utils/arquivo.py — arquivo anual de Vendas e MovimentosEstoque
+# -*- coding: utf-8 -*-
+"""
+Tira os anos fechados das abas vivas para abas próprias — a leitura do dia a
+dia fica do tamanho de um ano, não do histórico inteiro.
+
+    Vendas            → Vendas_2025, Vendas_2024…
+    MovimentosEstoque → MovimentosEstoque_2025…  + uma linha "Ajuste" de saldo
+                        anterior por produto (ID + nome) em 01/01 do ano seguinte, na aba viva
+                        (o estoque calculado não muda)
+    Arquivo_Resumo    → totais de cada mês e do ano por aba e o saldo de cada
+                        produto no fim do ano (Tipo "total" / "saldo")
+
+Passos de um ano (cada um confere o anterior; rodar de novo depois de uma falha
+continua de onde parou, sem duplicar nada):
+    1. copia as linhas do ano para a aba de arquivo (append em lotes, RAW)
+    2. grava o resumo do ano
+    3. (MovimentosEstoque) acrescenta o saldo anterior na aba viva
+    4. apaga as linhas do ano da aba viva (um batch_update)
+
+Leitura: utils.sheets.carregar_periodo(aba, de, ate) só junta os arquivos quando
+o período pede. Os índices de linha mudam: o ano roda com a fila de gravações
+(utils.outbox) drenada e pausada, e antes de apagar a aba viva é relida — se
+alguém gravou nela no meio (outro terminal), nada é apagado. Mesmo assim, o
+melhor é rodar com a loja parada.
+"""
+from __future__ import annotations
+
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+
+from utils.instrumentacao import etapa
+from utils.outbox import pausar_envios
+from utils.sheets import (
+    ABA_ARQ_RESUMO, ABA_MOVS, ABA_VEND, ABAS_ARQUIVAVEIS,
+    aba_arquivo, anos_arquivados, append_rows, cabecalho, carregar_aba, esquecer_arquivos,
+    garantir_aba, invalidar_aba, mapear_colunas, parse_date_series, sheet,
+    to_num_series,
+)
+from utils.sheets import _ler_aba_sheets  # leitura completa direto do Sheets (sem cache)
+from utils.sheets import _pares_estoque   # somas por (IDProduto, Produto), como o saldos_estoque
+
+LOTE_ARQUIVO = 2000                                # linhas por append na aba de arquivo
+COL_CONFERE  = {ABA_VEND: "VendaID", ABA_MOVS: "ID"}  # confere a cópia já feita numa retomada
+
+
+def _anos(df: pd.DataFrame, nome: str) -> pd.Series:
+    """Ano de cada linha (NaN sem data legível — essas linhas ficam na aba viva)."""
+    mapa = mapear_colunas(nome, df.columns)
+    if "Data" not in mapa:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_datetime(parse_date_series(df[mapa["Data"]]), errors="coerce").dt.year
+
+
+def anos_fechados(nome: str) -> list[int]:
+    """Anos anteriores ao corrente que ainda estão na aba viva."""
+    df = carregar_aba(nome)
+    if df.empty:
+        return []
+    anos = _anos(df, nome).dropna().astype(int)
+    return sorted(a for a in anos.unique() if a < date.today().year)
+
+
+# ─────────────────────────────────────────────────────────────
+#  RESUMO  (totais por período + saldo de fim de ano)
+# ─────────────────────────────────────────────────────────────
+def _linhas_resumo(nome: str, ano: int, df: pd.DataFrame, saldos: pd.DataFrame) -> list[dict]:
+    mapa = mapear_colunas(nome, df.columns)
+    meses = pd.to_datetime(parse_date_series(df[mapa["Data"]]), errors="coerce").dt.month
+    qtd = to_num_series(df[mapa["Qtd"]]) if "Qtd" in mapa else pd.Series(0.0, index=df.index)
+    vendas = nome == ABA_VEND
+    valor = to_num_series(df[mapa["TotalLinha"]]) if vendas and "TotalLinha" in mapa else None
+    cupom = df[mapa["VendaID"]].astype(str).str.strip() if vendas and "VendaID" in mapa else None
+    agora = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
+
+    periodos = [(f"{ano}-{int(m):02d}", meses == m) for m in sorted(meses.dropna().unique())]
+    periodos.append((str(ano), pd.Series(True, index=df.index)))  # a linha do ano marca o arquivo
+    rows = []
+    for periodo, m in periodos:
+        rows.append({
+            "Periodo": periodo, "Aba": nome, "Tipo": "total",
+            "Qtd": round(float(qtd[m].sum()), 3),
+            "Valor": round(float(valor[m].sum()), 2) if valor is not None else "",
+            "Linhas": int(m.sum()),
+            "Cupons": int(cupom[m & (cupom != "")].nunique()) if cupom is not None else "",
+            "ArquivadoEm": agora,
+        })
+    for _, r in saldos.iterrows():
+        rows.append({"Periodo": str(ano), "Aba": nome, "Tipo": "saldo", "IDProduto": r["IDProduto"],
+                     "Produto": r["Produto"], "Qtd": round(float(r["Saldo"]), 3), "ArquivadoEm": agora})
+    return rows
+
+
+def _saldos_fim_de_ano(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Saldo por par (IDProduto, Produto) das linhas dadas — a granularidade do
+    saldos_estoque, então produto só com nome também leva o saldo; saldo 0 fica de fora.
+    """
+    pares = _pares_estoque(df)
+    pares = pares.assign(Saldo=pares["Entradas"] - pares["Saidas"] + pares["Ajustes"])
+    ok = (pares["Saldo"].round(6) != 0) & ((pares["IDProduto"] != "") | (pares["Produto"] != ""))
+    return pares.loc[ok, ["IDProduto", "Produto", "Saldo"]].reset_index(drop=True)
+
+
+def _linhas_saldo_anterior(ano: int, saldos: pd.DataFrame, colunas) -> list[dict]:
+    """Uma linha "Ajuste" por produto em 01/01 do ano seguinte, com o saldo de fim de ano."""
+    mapa = mapear_colunas(ABA_MOVS, colunas)  # grava no cabeçalho que a aba usa (ProdutoID…)
+    c = {k: mapa.get(k, k) for k in ("Data", "IDProduto", "Produto", "Tipo", "Qtd", "Obs", "ID", "Origem")}
+    data = date(ano + 1, 1, 1).strftime("%d/%m/%Y")
+    rows = []
+    for _, r in saldos.iterrows():
+        q = float(r["Saldo"])
+        rows.append({
+            c["Data"]: data, c["IDProduto"]: r["IDProduto"], c["Produto"]: r["Produto"], c["Tipo"]: "Ajuste",
+            c["Qtd"]: str(int(q) if q.is_integer() else round(q, 3)).replace(".", ","),
+            c["Obs"]: f"SALDO ANTERIOR (arquivo {ano})", c["ID"]: f"SALDO-{ano}", c["Origem"]: "Arquivo",
+        })
+    return rows
+
+
+# ─────────────────────────────────────────────────────────────
+#  ARQUIVAMENTO
+# ─────────────────────────────────────────────────────────────
+def _apagar_linhas(ws, indices) -> None:
+    """Apaga as linhas (índice = linha − 2) em blocos contíguos, de baixo para cima, numa requisição."""
+    linhas = np.sort(np.asarray(indices, dtype=int)) + 2
+    blocos = np.split(linhas, np.flatnonzero(np.diff(linhas) != 1) + 1)
+    reqs = [{"deleteDimension": {"range": {"sheetId": ws.id, "dimension": "ROWS",
+                                           "startIndex": int(b[0]) - 1, "endIndex": int(b[-1])}}}
+            for b in reversed(blocos)]
+    sheet().batch_update({"requests": reqs})
+
+
+def arquivar_ano(nome: str, ano: int) -> dict:
+    """
+    Move as linhas de `ano` da aba viva para aba_arquivo(nome, ano) — ver os passos no topo.
+    Só anos fechados, do mais antigo para o mais novo (o saldo anterior depende disso).
+    Devolve {"aba", "ano", "arquivo", "linhas", "saldos"}.
+    """
+    if nome not in ABAS_ARQUIVAVEIS:
+        raise ValueError(f"aba '{nome}' não é arquivável")
+    ano = int(ano)
+    if ano >= date.today().year:
+        raise ValueError(f"{ano} ainda não fechou")
+    arq = aba_arquivo(nome, ano)
+    out = {"aba": nome, "ano": ano, "arquivo": arq, "linhas": 0, "saldos": 0}
+
+    with etapa(f"arquivo: {nome} {ano}"), pausar_envios():
+        viva, bruto = _ler_aba_sheets(nome)
+        if viva.empty:
+            return out
+        anos = _anos(viva, nome)
+        if (anos < ano).any():
+            raise ValueError(f"'{nome}' ainda tem linhas de {int(anos[anos < ano].min())} — arquive esse ano antes")
+        do_ano = viva[anos == ano]
+        if do_ano.empty:
+            return out
+        ws_viva = garantir_aba(nome)
+        hdrs = cabecalho(ws_viva, recarregar=True)
+
+        # 1. cópia (RAW: o arquivo guarda exatamente o texto que o app lê da aba viva)
+        ws_arq = garantir_aba(arq, hdrs)
+        copiadas, _ = _ler_aba_sheets(arq)
+        feitas, chave = len(copiadas), COL_CONFERE[nome]
+        if feitas and (feitas > len(do_ano) or (
+                chave in copiadas.columns and chave in do_ano.columns
+                and copiadas[chave].astype(str).tolist() != do_ano[chave].iloc[:feitas].astype(str).tolist())):
+            raise RuntimeError(f"'{arq}' já tem linhas que não batem com {nome} {ano} — confira antes de arquivar")
+        dados = do_ano.iloc[feitas:].reindex(columns=hdrs, fill_value="").astype(str).to_numpy().tolist()
+        for i in range(0, len(dados), LOTE_ARQUIVO):
+            ws_arq.append_rows(dados[i:i + LOTE_ARQUIVO], value_input_option="RAW")
+        if len(_ler_aba_sheets(arq)[0]) != len(do_ano):
+            raise RuntimeError(f"'{arq}' não ficou com as {len(do_ano)} linhas de {ano} — nada foi apagado")
+
+        # 2. resumo
+        saldos = (_saldos_fim_de_ano(do_ano) if nome == ABA_MOVS
+                  else pd.DataFrame(columns=["IDProduto", "Produto", "Saldo"]))
+        if ano not in anos_arquivados(nome, recarregar=True):
+            append_rows(garantir_aba(ABA_ARQ_RESUMO), _linhas_resumo(nome, ano, do_ano, saldos))
+
+        # 3. saldo anterior (o ano seguinte começa com o estoque de fim de ano)
+        esperadas = bruto["linhas"]
+        if nome == ABA_MOVS and not saldos.empty:
+            col_id = mapear_colunas(ABA_MOVS, viva.columns).get("ID")
+            if col_id is None or not (viva[col_id].astype(str).str.strip() == f"SALDO-{ano}").any():
+                novas = _linhas_saldo_anterior(ano, saldos, viva.columns)
+                append_rows(ws_viva, novas)
+                esperadas += len(novas)
+
+        # 4. tira o ano da aba viva — só se ela ainda é a que foi lida (índices valem)
+        agora, bruto_agora = _ler_aba_sheets(nome)
+        if (bruto_agora["linhas"] != esperadas or not do_ano.index.isin(agora.index).all()
+                or (chave in do_ano.columns and chave in agora.columns
+                    and not agora.loc[do_ano.index, chave].astype(str).equals(do_ano[chave].astype(str)))):
+            invalidar_aba(nome)
+            raise RuntimeError(f"'{nome}' mudou durante o arquivamento — nada foi apagado; rode de novo")
+        _apagar_linhas(ws_viva, do_ano.index)
+        invalidar_aba(nome)
+        esquecer_arquivos(nome)
+
+    out.update(linhas=len(do_ano), saldos=len(saldos))
+    return out
+
+
+def arquivar_anos_fechados() -> list[dict]:
+    """Arquiva todos os anos fechados das ABAS_ARQUIVAVEIS, do mais antigo ao mais novo."""
+    feitos = []
+    for nome in ABAS_ARQUIVAVEIS:
+        for ano in anos_fechados(nome):
+            feitos.append(arquivar_ano(nome, ano))
+    return feitos
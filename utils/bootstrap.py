@@ -0,0 +1,131 @@
+# utils/bootstrap.py — início comum das páginas + imports preguiçosos
+# -*- coding: utf-8 -*-
+"""
+Substitui o bloco que cada página repetia (tema escuro no config.toml,
+st.set_page_config, CSS do cabeçalho) e adia dependências pesadas para o
+primeiro uso — a página pinta antes de carregar plotly, cloudinary etc.
+
+    from utils.bootstrap import configurar_pagina, preguicoso, get_as_dataframe
+    configurar_pagina("Vendas", "🧾", barra_lateral="collapsed", estilo_base=True)
+    px = preguicoso("plotly.express")      # importa no primeiro px.bar(...)
+
+Tempos de cada import adiado: tempos_importacao() (painel 08_Monitor_API).
+Orçamento de import por página (cold start): benchmarks/bench_importacao.py.
+"""
+from __future__ import annotations
+
+import importlib
+import threading
+import time
+import types
+from pathlib import Path
+
+import streamlit as st
+
+TEMA = '[theme]\nbase = "dark"\n'
+
+# Cabeçalho padrão (fontes, .page-header, .header-badge) que as páginas copiavam
+CSS_BASE = """
+<style>
+@import url('https://fonts.googleapis.com/css2?family=Nunito:wght@400;600;700;800;900&family=DM+Sans:wght@300;400;500&display=swap');
+html, body, [class*="css"] { font-family: 'DM Sans', sans-serif; }
+
+.page-header {
+    background: linear-gradient(135deg, #1a1a2e 0%, #16213e 60%, #0f3460 100%);
+    border-radius: 20px; padding: 24px 32px; margin-bottom: 24px;
+    display: flex; align-items: center; justify-content: space-between;
+    box-shadow: 0 8px 32px rgba(15,52,96,0.25);
+}
+.page-header h1 { font-family:'Nunito',sans-serif; font-weight:900; font-size:1.7rem; color:#fff; margin:0; }
+.page-header .sub { font-size:0.82rem; color:rgba(255,255,255,0.5); margin-top:4px; }
+.header-badge {
+    background:rgba(255,255,255,0.1); border:1px solid rgba(255,255,255,0.2);
+    border-radius:50px; padding:8px 18px; color:#fff; font-size:0.82rem;
+    font-weight:600; backdrop-filter:blur(10px);
+}
+</style>
+"""
+
+_tempos_lock = threading.Lock()
+_tempos: dict[str, float] = {}  # módulo → ms do primeiro import (feito por preguicoso)
+
+
+def _garantir_tema() -> None:
+    """Tema escuro no .streamlit/config.toml — só grava se mudou (antes: 1 escrita por rerun)."""
+    arq = Path(".streamlit") / "config.toml"
+    try:
+        if arq.read_text(encoding="utf-8") == TEMA:
+            return
+    except OSError:
+        pass
+    try:
+        arq.parent.mkdir(exist_ok=True)
+        arq.write_text(TEMA, encoding="utf-8")
+    except OSError:
+        pass  # disco só-leitura: o tema fica o padrão
+
+
+def configurar_pagina(titulo: str, icone: str, layout: str = "wide",
+                      barra_lateral: str = "auto", estilo_base: bool = False) -> None:
+    """Primeira chamada Streamlit da página: tema, set_page_config e (opcional) CSS_BASE."""
+    _garantir_tema()
+    st.set_page_config(page_title=titulo, page_icon=icone, layout=layout,
+                       initial_sidebar_state=barra_lateral)
+    if estilo_base:
+        st.markdown(CSS_BASE, unsafe_allow_html=True)
+
+
+# ─────────────────────────────────────────────────────────────
+#  IMPORTS PREGUIÇOSOS
+# ─────────────────────────────────────────────────────────────
+class _Preguicoso(types.ModuleType):
+    """Módulo que só é importado no primeiro acesso a um atributo."""
+
+    def _carregar(self) -> types.ModuleType:
+        alvo = self.__dict__.get("_alvo")
+        if alvo is None:
+            t0 = time.perf_counter()
+            alvo = importlib.import_module(self.__name__)
+            ms = (time.perf_counter() - t0) * 1000
+            with _tempos_lock:
+                _tempos.setdefault(self.__name__, round(ms, 1))
+            self.__dict__["_alvo"] = alvo
+        return alvo
+
+    def __getattr__(self, attr: str):
+        alvo = self._carregar()
+        try:
+            return getattr(alvo, attr)
+        except AttributeError as e:
+            # submódulo ainda não importado (cloudinary.uploader, cloudinary.api…)
+            sub = f"{self.__name__}.{attr}"
+            try:
+                return importlib.import_module(sub)
+            except ModuleNotFoundError as falta:
+                if falta.name != sub:
+                    raise  # o submódulo existe, mas depende de algo que não está instalado
+                raise AttributeError(attr) from e  # hasattr/getattr(..., padrão) seguem funcionando
+
+
+def preguicoso(nome: str) -> types.ModuleType:
+    """Stand-in do módulo `nome`; o import de verdade acontece no primeiro uso."""
+    return _Preguicoso(nome)
+
+
+def tempos_importacao() -> dict[str, float]:
+    """ms gastos no primeiro import de cada módulo adiado (neste processo)."""
+    with _tempos_lock:
+        return dict(_tempos)
+
+
+_gspread_df = preguicoso("gspread_dataframe")
+
+
+def get_as_dataframe(*args, **kwargs):
+    """gspread_dataframe.get_as_dataframe, importado no primeiro uso."""
+    return _gspread_df.get_as_dataframe(*args, **kwargs)
+
+
+def set_with_dataframe(*args, **kwargs):
+    """gspread_dataframe.set_with_dataframe, importado no primeiro uso."""
+    return _gspread_df.set_with_dataframe(*args, **kwargs)
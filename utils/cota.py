@@ -0,0 +1,239 @@
+# utils/cota.py — controle de cota das requisições ao Google Sheets
+# -*- coding: utf-8 -*-
+"""
+Mede as requisições do cliente gspread com um balde de fichas (token bucket)
+do tamanho da cota do projeto e repete 429/5xx com espera exponencial.
+
+    leitura  → balde de leituras (padrão 60/min, cota por usuário do Sheets)
+    escrita  → balde próprio: gravar venda nunca espera leitura
+
+Prioridade dentro do balde de leitura: as leituras em segundo plano (threads
+"ebenezer-*": refresh de abas, worker do outbox) só gastam ficha se sobrar
+RESERVA_PRIMEIRO_PLANO — a página que o usuário está olhando passa na frente.
+Em primeiro plano a espera é curta (ESPERA_MAX_PAGINA); passou disso levanta
+CotaEsgotada e o carregar_aba serve o dado em cache (velho) em vez de falhar.
+
+Instalado em utils.sheets.sheet() — as páginas não precisam importar daqui.
+Contadores: estatisticas_cota().
+"""
+from __future__ import annotations
+
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+import gspread
+
+ESPERA_MAX_PAGINA      = 8.0    # segundos que uma página aceita esperar por ficha/backoff
+ESPERA_MAX_FUNDO       = 120.0  # idem para threads em segundo plano
+RESERVA_PRIMEIRO_PLANO = 0.25   # fração do balde de leitura guardada para as páginas
+TENTATIVAS_MAX         = 5      # 1 chamada + 4 repetições
+CODIGOS_REPETIR        = (429, 500, 502, 503, 504)
+
+_local = threading.local()
+
+
+class CotaEsgotada(gspread.exceptions.GSpreadException):
+    """Não há cota para a requisição dentro do tempo que o chamador aceita esperar."""
+
+
+# ─────────────────────────────────────────────────────────────
+#  BALDE DE FICHAS
+# ─────────────────────────────────────────────────────────────
+class Balde:
+    """Token bucket: `por_minuto` fichas por minuto, acumulando até `capacidade`."""
+
+    def __init__(self, por_minuto: float, capacidade: Optional[float] = None):
+        self.taxa = por_minuto / 60.0
+        self.capacidade = float(capacidade or por_minuto)
+        self.fichas = self.capacidade
+        self.visto_em = time.monotonic()
+        self.pausa_ate = 0.0  # depois de um 429 ninguém tira ficha até aqui
+        self.lock = threading.Lock()
+
+    def _repor(self, agora: float) -> None:
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.visto_em) * self.taxa)
+        self.visto_em = agora
+
+    def espera(self, reserva: float = 0.0) -> float:
+        """Segundos até haver 1 ficha acima da reserva (0 = pode ir agora)."""
+        with self.lock:
+            agora = time.monotonic()
+            self._repor(agora)
+            falta = 1.0 + reserva * self.capacidade - self.fichas
+            return max(self.pausa_ate - agora, falta / self.taxa if falta > 0 else 0.0, 0.0)
+
+    def tirar(self, reserva: float, prazo: float) -> float:
+        """Bloqueia até tirar uma ficha; devolve o tempo esperado ou levanta CotaEsgotada."""
+        inicio = time.monotonic()
+        while True:
+            with self.lock:
+                agora = time.monotonic()
+                self._repor(agora)
+                if agora >= self.pausa_ate and self.fichas - 1.0 >= reserva * self.capacidade:
+                    self.fichas -= 1.0
+                    return agora - inicio
+            e = self.espera(reserva)
+            if agora - inicio + e > prazo:
+                raise CotaEsgotada(f"cota do Sheets esgotada (espera estimada {e:.1f}s)")
+            time.sleep(min(max(e, 0.05), 1.0))
+
+    def pausar(self, segundos: float) -> None:
+        """Depois de um 429: zera as fichas e segura todo mundo por `segundos`."""
+        with self.lock:
+            self.fichas = 0.0
+            self.pausa_ate = max(self.pausa_ate, time.monotonic() + segundos)
+
+
+# ─────────────────────────────────────────────────────────────
+#  CONTADORES
+# ─────────────────────────────────────────────────────────────
+_estat_lock = threading.Lock()
+_estat: dict[str, float] = {
+    "leituras": 0, "escritas": 0, "leituras_fundo": 0,
+    "esperas": 0, "segundos_esperando": 0.0,
+    "erros_429": 0, "erros_5xx": 0, "repeticoes": 0,
+    "cota_esgotada": 0, "falhas": 0, "servidas_do_cache": 0,
+}
+
+
+def _contar(**inc) -> None:
+    with _estat_lock:
+        for k, v in inc.items():
+            _estat[k] = _estat.get(k, 0) + v
+
+
+def contar_servida_do_cache(n: int = 1) -> None:
+    """utils.sheets avisa quando serviu aba velha por falta de cota."""
+    _contar(servidas_do_cache=n)
+
+
+# ─────────────────────────────────────────────────────────────
+#  CLIENTE COM COTA
+# ─────────────────────────────────────────────────────────────
+_baldes: dict[str, Balde] = {}
+
+
+def configurar(leituras_min: float = 60, escritas_min: float = 60) -> None:
+    """Tamanho dos baldes (requisições/min). Chamado uma vez pelo sheet()."""
+    _baldes["leitura"] = Balde(leituras_min)
+    _baldes["escrita"] = Balde(escritas_min)
+
+
+def _balde(tipo: str) -> Balde:
+    if tipo not in _baldes:
+        configurar()
+    return _baldes[tipo]
+
+
+def em_segundo_plano() -> bool:
+    """Thread de fundo do app (refresh, outbox) ou bloco marcado com segundo_plano()."""
+    return getattr(_local, "fundo", False) or threading.current_thread().name.startswith("ebenezer-")
+
+
+@contextmanager
+def segundo_plano():
+    """Marca as requisições do bloco como de baixa prioridade."""
+    ant = getattr(_local, "fundo", False)
+    _local.fundo = True
+    try:
+        yield
+    finally:
+        _local.fundo = ant
+
+
+def _tipo_requisicao(method: str, endpoint: str) -> str:
+    m = str(method).upper()
+    if m == "GET" or str(endpoint).rstrip("/").endswith(":batchGet"):
+        return "leitura"
+    return "escrita"
+
+
+def _status(e: Exception) -> Optional[int]:
+    resp = getattr(e, "response", None)
+    try:
+        return int(resp.status_code)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def _retry_after(e: Exception) -> Optional[float]:
+    try:
+        return float(e.response.headers.get("Retry-After"))
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def chamar(method: str, endpoint: str, fazer):
+    """Executa fazer() respeitando a cota e repetindo 429/5xx com backoff + jitter."""
+    tipo = _tipo_requisicao(method, endpoint)
+    fundo = em_segundo_plano()
+    balde = _balde(tipo)
+    reserva = RESERVA_PRIMEIRO_PLANO if (tipo == "leitura" and fundo) else 0.0
+    prazo = ESPERA_MAX_FUNDO if fundo else ESPERA_MAX_PAGINA
+    inicio = time.monotonic()
+
+    for tentativa in range(TENTATIVAS_MAX):
+        restante = prazo - (time.monotonic() - inicio)
+        try:
+            esperou = balde.tirar(reserva, max(restante, 0.0))
+        except CotaEsgotada:
+            _contar(cota_esgotada=1)
+            raise
+        if esperou > 0:
+            _contar(esperas=1, segundos_esperando=esperou)
+        _contar(**{"leituras" if tipo == "leitura" else "escritas": 1},
+                **({"leituras_fundo": 1} if tipo == "leitura" and fundo else {}))
+        try:
+            return fazer()
+        except gspread.exceptions.APIError as e:
+            cod = _status(e)
+            if cod not in CODIGOS_REPETIR or tentativa == TENTATIVAS_MAX - 1:
+                _contar(falhas=1)
+                raise
+            atraso = min(32.0, 2.0 ** tentativa) * random.uniform(0.5, 1.5)
+            if cod == 429:
+                _contar(erros_429=1)
+                atraso = max(atraso, _retry_after(e) or 0.0)
+                balde.pausar(atraso)  # o projeto inteiro recua, não só esta chamada
+            else:
+                _contar(erros_5xx=1)
+            if time.monotonic() - inicio + atraso > prazo:
+                _contar(cota_esgotada=1)
+                raise CotaEsgotada(f"Sheets respondeu {cod}; sem tempo para nova tentativa") from e
+            _contar(repeticoes=1)
+            time.sleep(atraso)
+
+
+def instalar(cliente) -> None:
+    """Passa todas as requisições do cliente gspread (v5 ou v6) por chamar()."""
+    alvo = getattr(cliente, "http_client", None) or cliente
+    if getattr(alvo, "_com_cota", False):
+        return
+    original = alvo.request
+
+    def request(method, endpoint, *args, **kwargs):
+        return chamar(method, endpoint, lambda: original(method, endpoint, *args, **kwargs))
+
+    alvo.request = request
+    alvo._com_cota = True
+
+
+def espera_leitura() -> float:
+    """Segundos que uma leitura de página teria de esperar agora (0 = tem ficha)."""
+    return _balde("leitura").espera()
+
+
+def estatisticas_cota() -> dict:
+    """Contadores desde o início do processo + fichas disponíveis em cada balde."""
+    with _estat_lock:
+        out = dict(_estat)
+    out["segundos_esperando"] = round(out["segundos_esperando"], 2)
+    for tipo in ("leitura", "escrita"):
+        b = _balde(tipo)
+        with b.lock:
+            b._repor(time.monotonic())
+            out[f"fichas_{tipo}"] = round(b.fichas, 1)
+    return out
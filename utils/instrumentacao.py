@@ -0,0 +1,180 @@
+# utils/instrumentacao.py — registro de cada requisição ao Google Sheets
+# -*- coding: utf-8 -*-
+"""
+Cada requisição HTTP do cliente gspread vira um registro com operação, aba,
+página que pediu, etapa, tempo e bytes. Guarda as últimas ULTIMAS_CHAMADAS
+em memória (por processo) para o painel pages/08_Monitor_API.py.
+
+    operação  → tirada do endpoint (values_get, values_batch_get, append,
+                values_batch_update, batch_update, clear, metadados, drive…)
+    página    → arquivo da página (ou app.py) na pilha; threads de fundo
+                aparecem pelo nome ("outbox", "refresher"…)
+    etapa     → rótulo opcional:  with etapa("venda: gravar"): ...
+
+Instalado em utils.sheets.sheet() ANTES do controle de cota: cada tentativa
+conta como uma chamada e o tempo medido é só o da rede (sem a espera por ficha).
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Optional
+from urllib.parse import unquote
+
+ULTIMAS_CHAMADAS = 5000  # registros guardados (os mais antigos saem)
+
+_chamadas: deque = deque(maxlen=ULTIMAS_CHAMADAS)
+_lock = threading.Lock()
+_local = threading.local()
+
+_RE_FAIXA = re.compile(r"/values/([^/:?]+)")
+
+
+@contextmanager
+def etapa(nome: str):
+    """Rotula as requisições feitas dentro do bloco (ex.: passos de gravar uma venda)."""
+    ant = getattr(_local, "etapa", "")
+    _local.etapa = nome
+    try:
+        yield
+    finally:
+        _local.etapa = ant
+
+
+def _operacao(method: str, endpoint: str) -> str:
+    m = str(method).upper()
+    e = str(endpoint).split("?")[0].rstrip("/")
+    if "/drive/" in e:
+        return "drive"
+    for sufixo, nome in ((":batchGet", "values_batch_get"), (":batchUpdate", "batch_update"),
+                         (":batchClear", "values_batch_clear"), (":append", "append"),
+                         (":clear", "clear")):
+        if e.endswith(sufixo):
+            if sufixo == ":batchUpdate" and e.endswith("values:batchUpdate"):
+                return "values_batch_update"
+            return nome
+    if "/values/" in e:
+        return "values_get" if m == "GET" else "values_update"
+    return "metadados" if m == "GET" else m.lower()
+
+
+def _aba_da_faixa(faixa) -> str:
+    f = unquote(str(faixa))
+    f = f.rsplit("!", 1)[0] if "!" in f else f
+    return f.strip("'").replace("''", "'")
+
+
+def _abas(endpoint: str, kwargs: dict) -> str:
+    faixas: list = []
+    m = _RE_FAIXA.search(str(endpoint))
+    if m:
+        faixas.append(m.group(1))
+    params = kwargs.get("params") or {}
+    if isinstance(params, dict) and params.get("ranges"):
+        r = params["ranges"]
+        faixas += r if isinstance(r, (list, tuple)) else [r]
+    corpo = kwargs.get("json") or {}
+    if isinstance(corpo, dict):
+        faixas += [d.get("range", "") for d in corpo.get("data", []) if isinstance(d, dict)]
+        faixas += corpo.get("ranges", []) if isinstance(corpo.get("ranges"), list) else []
+    return "+".join(dict.fromkeys(a for a in map(_aba_da_faixa, faixas) if a))
+
+
+def _pagina() -> str:
+    """Página Streamlit mais externa na pilha; senão o nome da thread de fundo."""
+    pagina = ""
+    f = sys._getframe(2)
+    while f is not None:
+        arq = f.f_code.co_filename
+        if os.sep + "pages" + os.sep in arq or os.path.basename(arq) == "app.py":
+            pagina = os.path.basename(arq)
+        f = f.f_back
+    if pagina:
+        return pagina
+    nome = threading.current_thread().name
+    return nome[len("ebenezer-"):] if nome.startswith("ebenezer-") else nome
+
+
+def _bytes_corpo(kwargs: dict) -> int:
+    corpo = kwargs.get("json")
+    if corpo is None:
+        corpo = kwargs.get("data")
+    if corpo is None:
+        return 0
+    if isinstance(corpo, (bytes, str)):
+        return len(corpo)
+    try:
+        return len(json.dumps(corpo, ensure_ascii=False).encode("utf-8"))
+    except (TypeError, ValueError):
+        return 0
+
+
+def _status(resp=None, erro: Optional[Exception] = None) -> Optional[int]:
+    alvo = resp if erro is None else getattr(erro, "response", None)
+    try:
+        return int(alvo.status_code)
+    except (AttributeError, TypeError, ValueError):
+        return None
+
+
+def registrar(method: str, endpoint: str, kwargs: dict, segundos: float, resp=None,
+              erro: Optional[Exception] = None) -> None:
+    """Acrescenta um registro ao buffer (chamado pelo cliente instrumentado)."""
+    try:
+        recebidos = len(resp.content) if resp is not None else 0
+    except (AttributeError, TypeError):
+        recebidos = 0
+    reg = {
+        "em": time.time(),
+        "pagina": _pagina(),
+        "etapa": getattr(_local, "etapa", ""),
+        "operacao": _operacao(method, endpoint),
+        "aba": _abas(endpoint, kwargs),
+        "metodo": str(method).upper(),
+        "status": _status(resp, erro),
+        "ms": round(segundos * 1000, 1),
+        "bytes_enviados": _bytes_corpo(kwargs),
+        "bytes_recebidos": recebidos,
+        "erro": type(erro).__name__ if erro is not None else "",
+    }
+    with _lock:
+        _chamadas.append(reg)
+
+
+def instalar(cliente) -> None:
+    """Mede todas as requisições do cliente gspread (v5 ou v6). Instalar antes da cota."""
+    alvo = getattr(cliente, "http_client", None) or cliente
+    if getattr(alvo, "_instrumentado", False):
+        return
+    original = alvo.request
+
+    def request(method, endpoint, *args, **kwargs):
+        t0 = time.perf_counter()
+        try:
+            resp = original(method, endpoint, *args, **kwargs)
+        except Exception as e:
+            registrar(method, endpoint, kwargs, time.perf_counter() - t0, erro=e)
+            raise
+        registrar(method, endpoint, kwargs, time.perf_counter() - t0, resp=resp)
+        return resp
+
+    alvo.request = request
+    alvo._instrumentado = True
+
+
+def chamadas_api(ultimas: Optional[int] = None) -> list[dict]:
+    """Cópia dos registros, do mais antigo ao mais recente (as `ultimas` N, se pedido)."""
+    with _lock:
+        regs = list(_chamadas)
+    return regs[-ultimas:] if ultimas else regs
+
+
+def limpar_chamadas() -> None:
+    with _lock:
+        _chamadas.clear()
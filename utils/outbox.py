@@ -0,0 +1,363 @@
+# utils/outbox.py — fila local de gravações (write-behind) para o Sheets
+# -*- coding: utf-8 -*-
+"""
+A venda é gravada primeiro num SQLite local (milissegundos) e uma thread
+do processo envia para o Sheets em lote, com novas tentativas.
+
+    <CACHE_DIR>/outbox.sqlite3   → tabela fila (uma linha por lançamento)
+
+Cada lançamento pode ter uma chave de idempotência (VendaID, FiadoID…):
+a mesma chave não entra duas vezes na fila, e antes de reenviar o worker
+confere se as linhas já estão na planilha (ex.: caiu depois do append).
+
+Uso nas páginas:
+    from utils.outbox import enfileirar, enfileirar_telegram, painel_fila
+
+Enquanto não são enviadas, as linhas de Vendas/MovimentosEstoque ficam registradas
+em utils.sheets (registrar_pendente) e já aparecem nas leituras das páginas.
+
+Quem depende dos índices de linha das abas (utils.arquivo) roda dentro de
+pausar_envios(): a fila é esvaziada e o worker fica parado até o fim do bloco.
+"""
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+import streamlit as st
+
+MAX_TENTATIVAS   = 8    # depois disso o lançamento fica como "falhou" (reenvio manual)
+INTERVALO_WORKER = 2.0  # segundos entre varreduras da fila
+LOTE_MAX         = 100  # lançamentos lidos por varredura
+
+_worker_lock = threading.Lock()
+_worker: Optional[threading.Thread] = None
+_acordar = threading.Event()
+_envio_lock = threading.Lock()  # uma varredura por vez; pausar_envios segura o worker
+_pendentes_lidos = False        # sobras do SQLite já registradas em utils.sheets
+
+
+# ─────────────────────────────────────────────────────────────
+#  BANCO LOCAL
+# ─────────────────────────────────────────────────────────────
+def _arquivo_fila() -> Path:
+    base = Path(os.environ.get("EBENEZER_CACHE_DIR", ".cache"))
+    return base / "outbox.sqlite3"
+
+
+def _conectar() -> sqlite3.Connection:
+    arq = _arquivo_fila()
+    arq.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(arq, timeout=10, isolation_level=None)
+    con.row_factory = sqlite3.Row
+    con.execute("PRAGMA journal_mode=WAL")
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS fila (
+            id           INTEGER PRIMARY KEY AUTOINCREMENT,
+            chave        TEXT UNIQUE,          -- "<aba>|<VendaID>" (NULL = sem idempotência)
+            tipo         TEXT NOT NULL,        -- linhas | telegram | telegram_media
+            aba          TEXT NOT NULL DEFAULT '',
+            coluna_chave TEXT NOT NULL DEFAULT '',
+            valor_chave  TEXT NOT NULL DEFAULT '',
+            colunas      TEXT NOT NULL DEFAULT '[]',
+            carga        TEXT NOT NULL,        -- JSON (linhas ou mensagem)
+            status       TEXT NOT NULL DEFAULT 'pendente',  -- pendente | enviado | falhou
+            tentativas   INTEGER NOT NULL DEFAULT 0,
+            proxima_em   REAL NOT NULL DEFAULT 0,
+            criado_em    REAL NOT NULL,
+            enviado_em   REAL,
+            erro         TEXT NOT NULL DEFAULT ''
+        )""")
+    con.execute("CREATE INDEX IF NOT EXISTS fila_status ON fila(status, id)")
+    return con
+
+
+def _inserir(tipo: str, carga, aba: str = "", chave: str = "", coluna_chave: str = "",
+             colunas: Optional[list] = None) -> bool:
+    con = _conectar()
+    try:
+        cur = con.execute(
+            "INSERT OR IGNORE INTO fila (chave, tipo, aba, coluna_chave, valor_chave, colunas, carga, criado_em)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (f"{aba}|{chave}" if chave else None, tipo, aba, coluna_chave, chave,
+             json.dumps(colunas or [], ensure_ascii=False),
+             json.dumps(carga, ensure_ascii=False, default=str), time.time()))
+        novo = cur.rowcount > 0
+        if novo and tipo == "linhas":
+            from utils.sheets import registrar_pendente
+            # antes de acordar o worker: o envio sempre encontra a linha registrada
+            registrar_pendente(aba, cur.lastrowid, carga, coluna_chave, chave)
+    finally:
+        con.close()
+    iniciar_worker()
+    _acordar.set()
+    return novo
+
+
+# ─────────────────────────────────────────────────────────────
+#  API PÚBLICA
+# ─────────────────────────────────────────────────────────────
+def enfileirar(aba: str, linhas: list[dict], chave: str = "", coluna_chave: str = "",
+               colunas: Optional[list] = None) -> bool:
+    """
+    Agenda append_rows(aba, linhas) e retorna na hora.
+    chave/coluna_chave: idempotência (ex.: chave=venda_id, coluna_chave="VendaID").
+    colunas: cabeçalho garantido com garantir_aba antes de gravar.
+    Retorna False se a chave já estava na fila (nada é agendado de novo).
+    """
+    if not linhas:
+        return True
+    return _inserir("linhas", linhas, aba=aba, chave=chave, coluna_chave=coluna_chave, colunas=colunas)
+
+
+def enfileirar_telegram(msg: str = "", media: Optional[list[dict]] = None) -> None:
+    """Agenda tg_media(media) e/ou tg_send(msg) — enviados depois das gravações anteriores."""
+    if media:
+        _inserir("telegram_media", media)
+    if msg:
+        _inserir("telegram", msg)
+
+
+def situacao_fila() -> dict:
+    """{"pendentes": n, "falhas": n, "mais_antigo": epoch|None} — barato, para a interface."""
+    try:
+        con = _conectar()
+    except Exception:
+        return {"pendentes": 0, "falhas": 0, "mais_antigo": None}
+    try:
+        out = {"pendentes": 0, "falhas": 0, "mais_antigo": None}
+        for r in con.execute("SELECT status, COUNT(*) n, MIN(criado_em) m FROM fila"
+                             " WHERE status != 'enviado' GROUP BY status"):
+            if r["status"] == "pendente":
+                out["pendentes"] = r["n"]; out["mais_antigo"] = r["m"]
+            elif r["status"] == "falhou":
+                out["falhas"] = r["n"]
+        return out
+    finally:
+        con.close()
+
+
+def falhas_fila() -> list[dict]:
+    """Lançamentos que esgotaram as tentativas (para mostrar/reenviar)."""
+    con = _conectar()
+    try:
+        return [dict(r) for r in con.execute(
+            "SELECT id, tipo, aba, valor_chave, tentativas, criado_em, erro FROM fila"
+            " WHERE status = 'falhou' ORDER BY id")]
+    finally:
+        con.close()
+
+
+def reenviar_falhas() -> int:
+    """Devolve os lançamentos com falha para a fila. Retorna quantos."""
+    con = _conectar()
+    try:
+        n = con.execute("UPDATE fila SET status = 'pendente', proxima_em = 0, erro = ''"
+                        " WHERE status = 'falhou'").rowcount
+    finally:
+        con.close()
+    iniciar_worker()
+    _acordar.set()
+    return n
+
+
+def limpar_enviados(dias: int = 7) -> int:
+    """Apaga do SQLite o que já foi enviado há mais de `dias` dias."""
+    con = _conectar()
+    try:
+        return con.execute("DELETE FROM fila WHERE status = 'enviado' AND enviado_em < ?",
+                           (time.time() - dias * 86400,)).rowcount
+    finally:
+        con.close()
+
+
+# ─────────────────────────────────────────────────────────────
+#  ENVIO (worker)
+# ─────────────────────────────────────────────────────────────
+def _marcar_enviados(con: sqlite3.Connection, ids: list[int]) -> None:
+    con.executemany("UPDATE fila SET status = 'enviado', enviado_em = ?, erro = '' WHERE id = ?",
+                    [(time.time(), i) for i in ids])
+
+
+def _marcar_erro(con: sqlite3.Connection, itens: list[sqlite3.Row], erro: Exception) -> None:
+    """itens = estado ANTES do envio; a tentativa conta uma vez só."""
+    agora = time.time()
+    for it in itens:
+        n = it["tentativas"] + 1
+        status = "falhou" if n >= MAX_TENTATIVAS else "pendente"
+        espera = min(300, 2 ** n)  # backoff exponencial, teto de 5 min
+        con.execute("UPDATE fila SET status = ?, tentativas = ?, proxima_em = ?, erro = ? WHERE id = ?",
+                    (status, n, agora + espera, str(erro)[:500], it["id"]))
+
+
+def _enviar_linhas(con: sqlite3.Connection, aba: str, itens: list[sqlite3.Row]) -> None:
+    from utils.instrumentacao import etapa
+    from utils.sheets import append_rows, garantir_aba, invalidar_aba, ja_gravado, retirar_pendentes
+
+    colunas: list[str] = []
+    for it in itens:
+        colunas += [c for c in json.loads(it["colunas"]) if c not in colunas]
+    with etapa(f"outbox {aba}: garantir aba"):
+        ws = garantir_aba(aba, colunas or None)
+
+    # Idempotência: numa nova tentativa o append anterior pode ter chegado ao Sheets
+    enviar, ja_gravados = [], []
+    if any(it["tentativas"] > 0 and it["valor_chave"] for it in itens):
+        invalidar_aba(aba, derivados=False)  # confere na planilha, não no cache
+    with etapa(f"outbox {aba}: conferir chaves"):
+        for it in itens:
+            if it["valor_chave"] and it["coluna_chave"] and ja_gravado(
+                    aba, it["valor_chave"], it["coluna_chave"], pendentes=False):
+                ja_gravados.append(it["id"])
+            else:
+                enviar.append(it)
+    if ja_gravados:
+        _marcar_enviados(con, ja_gravados)
+        retirar_pendentes(aba, ja_gravados)
+    if not enviar:
+        return
+
+    # conta a tentativa ANTES de ir ao Sheets (se o processo cair no meio, a próxima confere)
+    con.executemany("UPDATE fila SET tentativas = tentativas + 1 WHERE id = ?", [(it["id"],) for it in enviar])
+    linhas = [r for it in enviar for r in json.loads(it["carga"])]
+    with etapa(f"outbox {aba}: append"):
+        append_rows(ws, linhas)
+    _marcar_enviados(con, [it["id"] for it in enviar])
+    retirar_pendentes(aba, [it["id"] for it in enviar])
+
+
+def _enviar_telegram(con: sqlite3.Connection, it: sqlite3.Row) -> None:
+    from utils.sheets import tg_media, tg_send
+
+    # só passa para a fila em memória do utils.telegram: o worker não espera o Telegram
+    carga = json.loads(it["carga"])
+    if it["tipo"] == "telegram_media":
+        tg_media(carga)
+    else:
+        tg_send(carga)
+    _marcar_enviados(con, [it["id"]])
+
+
+def drenar_fila() -> int:
+    """
+    Uma varredura: envia os pendentes em ordem, juntando lançamentos seguidos
+    da mesma aba num único append_rows. Para no primeiro erro (preserva a ordem).
+    Retorna quantos lançamentos saíram da fila.
+    """
+    with _envio_lock:
+        return _drenar()
+
+
+@contextmanager
+def pausar_envios(drenar: bool = True):
+    """
+    Nenhum append da fila vai ao Sheets (neste processo) dentro do bloco — para
+    operações que dependem dos índices de linha (arquivo anual). drenar: envia o
+    que já está pendente antes de pausar.
+    """
+    if drenar:
+        while drenar_fila():
+            pass
+    with _envio_lock:
+        yield
+
+
+def _drenar() -> int:
+    con = _conectar()
+    try:
+        itens = list(con.execute(
+            "SELECT * FROM fila WHERE status = 'pendente' AND proxima_em <= ? ORDER BY id LIMIT ?",
+            (time.time(), LOTE_MAX)))
+        grupos: list[list[sqlite3.Row]] = []
+        for it in itens:
+            if (grupos and it["tipo"] == "linhas" and grupos[-1][0]["tipo"] == "linhas"
+                    and grupos[-1][0]["aba"] == it["aba"]):
+                grupos[-1].append(it)
+            else:
+                grupos.append([it])
+
+        feitos = 0
+        for g in grupos:
+            try:
+                if g[0]["tipo"] == "linhas":
+                    _enviar_linhas(con, g[0]["aba"], g)
+                else:
+                    _enviar_telegram(con, g[0])
+                feitos += len(g)
+            except Exception as e:
+                enviados = {r["id"] for r in con.execute(
+                    f"SELECT id FROM fila WHERE status = 'enviado' AND id IN ({','.join('?' * len(g))})",
+                    [it["id"] for it in g])}
+                _marcar_erro(con, [it for it in g if it["id"] not in enviados], e)
+                break
+        return feitos
+    finally:
+        con.close()
+
+
+def _rodar_worker() -> None:
+    while True:
+        _acordar.wait(timeout=INTERVALO_WORKER)
+        _acordar.clear()
+        try:
+            while drenar_fila():
+                pass
+        except Exception:
+            pass
+
+
+def _registrar_sobras() -> None:
+    """Linhas que ficaram no SQLite (processo reiniciado) voltam a aparecer nas leituras."""
+    global _pendentes_lidos
+    from utils.sheets import registrar_pendente
+
+    _pendentes_lidos = True
+    con = _conectar()
+    try:
+        for r in con.execute("SELECT id, aba, coluna_chave, valor_chave, carga FROM fila"
+                             " WHERE tipo = 'linhas' AND status != 'enviado' ORDER BY id"):
+            registrar_pendente(r["aba"], r["id"], json.loads(r["carga"]), r["coluna_chave"], r["valor_chave"])
+    finally:
+        con.close()
+
+
+def iniciar_worker() -> None:
+    """Sobe a thread de envio (uma por processo). Chamado automaticamente ao enfileirar."""
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        if not _pendentes_lidos:
+            try:
+                _registrar_sobras()
+            except Exception:
+                pass  # sem o SQLite o worker também não envia; painel_fila mostra o resto
+        _worker = threading.Thread(target=_rodar_worker, name="ebenezer-outbox", daemon=True)
+        _worker.start()
+
+
+# ─────────────────────────────────────────────────────────────
+#  INTERFACE
+# ─────────────────────────────────────────────────────────────
+def painel_fila() -> None:
+    """Aviso compacto de lançamentos aguardando envio / com falha (com botão de reenvio)."""
+    iniciar_worker()  # sobra de uma sessão anterior também é enviada
+    sit = situacao_fila()
+    if sit["pendentes"]:
+        idade = int(time.time() - (sit["mais_antigo"] or time.time()))
+        st.caption(f"⏳ {sit['pendentes']} lançamento(s) aguardando envio para a planilha"
+                   + (f" · o mais antigo há {idade}s" if idade >= 10 else ""))
+    if sit["falhas"]:
+        with st.expander(f"⚠️ {sit['falhas']} lançamento(s) não foram gravados na planilha", expanded=True):
+            for f in falhas_fila():
+                st.markdown(f"- **{f['aba'] or f['tipo']}** {f['valor_chave']} — "
+                            f"{f['tentativas']} tentativas · `{f['erro'][:120]}`")
+            if st.button("🔁 Tentar enviar de novo", key="outbox_reenviar"):
+                reenviar_falhas()
+                st.rerun()
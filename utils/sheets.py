@@ -2,22 +2,63 @@
 # -*- coding: utf-8 -*-
 """
 Importar em qualquer página assim:
-    from utils.sheets import sheet, carregar_aba, append_rows, to_num, brl, safe_cost, first_col
+    from utils.sheets import sheet, carregar_aba, carregar_abas, append_rows, to_num, brl, safe_cost, first_col
+    from utils.sheets import atualizar_celulas, invalidar_aba, vencer_aba, versao_aba, cache_por_aba, ja_gravado
+    from utils.sheets import worksheet, cabecalho, to_num_series, safe_cost_series, parse_date_series
+    from utils.sheets import ledger_estoque, classificar_tipos_mov, saldos_estoque, marcar_checkpoint_estoque
+    from utils.sheets import registro_produtos, chave_produto, chaves_produto, canon_id, canon_ids
+    from utils.sheets import carregar_tipada, carregar_tipadas, mapear_colunas, ESQUEMAS, relatorio_memoria
+    from utils.sheets import estatisticas_coalescencia, selo_dados, dados_de
+    from utils.sheets import carregar_periodo, anos_arquivados, resumo_arquivo
+    from utils.sheets import resumo_diario, resumo_periodo, estatisticas_resumo, carregar_abas_xlsx
+    from utils.cota import estatisticas_cota
+    from utils.instrumentacao import chamadas_api, etapa
+    from utils.telegram import estatisticas_telegram
 """
 from __future__ import annotations
 
+import hashlib
 import json
 import re
+import secrets
+import sys
+import threading
+import time
 import unicodedata
-from datetime import datetime, date
+import weakref
+from datetime import datetime, date, timedelta
 from typing import Optional
 
 import gspread
+import numpy as np
 import pandas as pd
 import streamlit as st
-from gspread_dataframe import get_as_dataframe
 from google.oauth2.service_account import Credentials
 
+from utils.cota import (
+    configurar as _configurar_cota, contar_servida_do_cache, em_segundo_plano, espera_leitura,
+    instalar as _instalar_cota,
+)
+from utils.instrumentacao import instalar as _instrumentar
+from utils.telegram import API_PADRAO as API_TELEGRAM, agendar as _agendar_telegram
+from utils.snapshot import apagar_snapshot, ler_snapshot, salvar_snapshot
+
+# Copy-on-Write (único modo do pandas 3): os frames em cache vão para as páginas como
+# cópia rasa — quem altera ganha a própria cópia na hora da escrita. Sem ele (pandas 2
+# no modo padrão) a cópia é completa. A opção global não é mexida aqui.
+def _cow_ativo() -> bool:
+    if int(pd.__version__.split(".")[0]) >= 3:
+        return True
+    try:
+        return pd.get_option("mode.copy_on_write") is True
+    except Exception:
+        return False
+
+
+def _copia(df: pd.DataFrame) -> pd.DataFrame:
+    """Frame do cache para quem chamou: cópia rasa com Copy-on-Write, completa sem."""
+    return df.copy(deep=not _cow_ativo())
+
 
 # ─────────────────────────────────────────────────────────────
 #  NOMES DAS ABAS  (fonte única de verdade)
@@ -29,6 +70,7 @@ ABA_MOVS   = "MovimentosEstoque"
 ABA_CLIEN  = "Clientes"
 ABA_FIADO  = "Fiado"
 ABA_FPAGT  = "Fiado_Pagamentos"
+ABA_ARQ_RESUMO = "Arquivo_Resumo"  # totais e saldos dos anos arquivados (utils/arquivo.py)
 
 # Cabeçalhos esperados por aba
 COLS = {
@@ -44,9 +86,12 @@ COLS = {
     ABA_FIADO: ["ID","Data","Cliente","Valor","Vencimento","Status","Obs",
                 "DataPagamento","FormaPagamento","ValorPago"],
     ABA_FPAGT: ["PagamentoID","DataPagamento","Cliente","Forma","TotalPago","IDsFiado","Obs"],
+    ABA_ARQ_RESUMO: ["Periodo","Aba","Tipo","IDProduto","Produto","Qtd","Valor","Linhas","Cupons",
+                     "ArquivadoEm"],
 }
 
-# Limite defensivo de custo unitário (valores acima disso são seriais de data bugados)
+# Limite defensivo de custo unitário (valores acima disso são seriais de data bugados;
+# na leitura sem formatação uma data numa coluna de custo chega igual, como serial)
 MAX_CUSTO_RAZOAVEL = 5_000.0
 
 
@@ -81,83 +126,1204 @@ def sheet() -> gspread.Spreadsheet:
     ]
     creds = Credentials.from_service_account_info(_load_sa(), scopes=scopes)
     gc = gspread.authorize(creds)
+    # toda requisição é medida (painel 08_Monitor_API) e passa pelo controle de cota
+    # (token bucket + backoff em 429/5xx); a medição fica por dentro: só o tempo de rede
+    _instrumentar(gc)
+    _configurar_cota(float(st.secrets.get("SHEETS_LEITURAS_MIN", 60)),
+                     float(st.secrets.get("SHEETS_ESCRITAS_MIN", 60)))
+    _instalar_cota(gc)
     url = st.secrets.get("PLANILHA_URL", "")
     if not url:
         st.error("🛑 PLANILHA_URL ausente nos Secrets."); st.stop()
-    return gc.open_by_url(url) if str(url).startswith("http") else gc.open_by_key(url)
+    sh = gc.open_by_url(url) if str(url).startswith("http") else gc.open_by_key(url)
+    global _xlsx_abas, _valores_crus
+    _xlsx_abas = int(st.secrets.get("SHEETS_XLSX_ABAS", XLSX_ABAS))
+    _valores_crus = bool(st.secrets.get("SHEETS_VALORES_CRUS", VALORES_CRUS))
+    _iniciar_refresher(float(st.secrets.get("SHEETS_REFRESH_S", INTERVALO_REFRESH)))
+    return sh
 
 
 # ─────────────────────────────────────────────────────────────
-#  LEITURA  (cache_data com TTL curto)
+#  LEITURA  (memória do processo → snapshot em disco → Sheets)
 # ─────────────────────────────────────────────────────────────
-@st.cache_data(ttl=30, show_spinner=False)
+CACHE_TTL = 30  # segundos até uma aba em memória ser relida do Sheets
+
+_abas_lock = threading.Lock()
+_abas_mem: dict[str, dict] = {}     # nome → {"df", "lido_em", "dados_em", "origem", "bruto", "base"}
+_abas_versao: dict[str, int] = {}   # nome → versão do conteúdo em cache
+_pend_versao: dict[str, int] = {}   # nome → mudanças nos lançamentos ainda na fila (outbox)
+_abas_em_refresh: set[str] = set()  # abas com leitura em segundo plano em andamento
+_abas_voo: dict[str, "_Voo"] = {}   # nome → leitura do Sheets em andamento (single-flight)
+_geracao_vista: Optional[int] = None
+
+
+@st.cache_data(show_spinner=False)
+def _geracao_cache() -> int:
+    """Muda a cada st.cache_data.clear() — mantém o "Atualizar" das páginas funcionando."""
+    return time.monotonic_ns()
+
+
+def _sincronizar_geracao() -> None:
+    """Se alguém limpou o cache do Streamlit, marca todas as abas em memória como vencidas."""
+    global _geracao_vista
+    g = _geracao_cache()
+    with _abas_lock:
+        if g != _geracao_vista:
+            if _geracao_vista is not None:
+                for ent in _abas_mem.values():
+                    ent["lido_em"] = 0.0
+            _geracao_vista = g
+
+
+def _guardar_mem(nome: str, df: pd.DataFrame, origem: str, bruto: Optional[dict] = None,
+                 voo: Optional["_Voo"] = None, dados_em: Optional[float] = None) -> bool:
+    """
+    Guarda a leitura da aba; a versão só sobe se o conteúdo mudou.
+    Com `voo`, só guarda se a leitura ainda vale (ninguém escreveu/invalidou a aba
+    enquanto ela estava em andamento) — devolve False quando descarta.
+    `dados_em`: hora em que o conteúdo saiu do Sheets (snapshot do disco é mais velho).
+    """
+    with _abas_lock:
+        if voo is not None and _abas_voo.get(nome) is not voo:
+            return False
+        ant = _abas_mem.get(nome)
+        mudou = ant is None or not ant["df"].equals(df)
+        agora = time.time()
+        _abas_mem[nome] = {"df": df, "lido_em": agora, "dados_em": dados_em or agora,
+                           "origem": origem, "bruto": bruto, "base": None}
+        if mudou:
+            _abas_versao[nome] = _abas_versao.get(nome, 0) + 1
+    return True
+
+
+def versao_aba(nome: str) -> int:
+    """Contador que sobe sempre que o conteúdo da aba muda (leitura, escrita ou lançamento na fila)."""
+    with _abas_lock:
+        return _abas_versao.get(nome, 0) + _pend_versao.get(nome, 0)
+
+
+def _versao_lida(nome: str) -> int:
+    """Versão só do que está na aba em cache, sem os lançamentos pendentes (memos internos)."""
+    with _abas_lock:
+        return _abas_versao.get(nome, 0)
+
+
+def vencer_aba(nome: str) -> None:
+    """Marca a aba como vencida: a próxima leitura vai ao Sheets (incremental, se der)."""
+    with _abas_lock:
+        _abas_voo.pop(nome, None)  # leitura em andamento já não serve para quem chega depois
+        ent = _abas_mem.get(nome)
+        if ent is not None:
+            ent["lido_em"] = 0.0
+
+
+def invalidar_aba(nome: str, derivados: bool = True) -> None:
+    """
+    Força releitura COMPLETA da aba na próxima leitura.
+    Use depois de editar/apagar linhas antigas (a leitura incremental só enxerga o final).
+    derivados=False: só a aba (ex.: conferir chaves no Sheets) — o checkpoint de estoque
+    e o resumo diário ficam, eles se conferem pela assinatura das linhas.
+    """
+    with _abas_lock:
+        _abas_voo.pop(nome, None)
+        ent = _abas_mem.get(nome)
+        if ent is not None:
+            ent["lido_em"] = 0.0
+            ent["bruto"] = None
+    with _idem_lock:  # índice de chaves é remontado da releitura completa
+        for k in [k for k in _idem if k[0] == nome]:
+            del _idem[k]
+    apagar_snapshot(nome)
+    if not derivados:
+        return
+    if nome == ABA_MOVS:
+        descartar_checkpoint_estoque()
+    elif nome == ABA_VEND:
+        descartar_resumo_diario()
+
+
+def _intervalo_aba(nome: str) -> str:
+    """Intervalo A1 que cobre a aba inteira (nome entre aspas simples)."""
+    return "'" + str(nome).replace("'", "''") + "'"
+
+
+def _compactar_textos(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Células de texto repetidas (Tipo, Forma, Cliente, Produto…) passam a apontar
+    para o mesmo objeto str — o ganho de memória de um category sem mudar o
+    dtype que as páginas esperam das abas cruas.
+    """
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if col.dtype != object or len(col) < 2:
+            continue
+        codigos, unicos = pd.factorize(col.to_numpy())
+        if len(unicos) <= len(col) // 2:
+            df.isetitem(i, np.asarray(unicos, dtype=object)[codigos])
+    return df
+
+
+def _df_de_valores(nome: str, valores: list[list], primeira: int = 0) -> pd.DataFrame:
+    """
+    Monta o DataFrame a partir da matriz de valores da API,
+    com o mesmo parser que o get_as_dataframe(dtype=str, header=0) usa.
+    O índice é a linha da planilha − 2 (primeira = índice da 1ª linha de dados).
+    """
+    from pandas.io.parsers import TextParser
+
+    if not valores:
+        return pd.DataFrame()
+    largura = max(len(r) for r in valores)
+    linhas = [list(r) + [""] * (largura - len(r)) for r in valores]
+    df = TextParser(linhas, header=0, dtype=str).read()
+    df.index = df.index + primeira
+    df = df.dropna(how="all")
+    df.columns = [str(c).strip() for c in df.columns]
+    df = _compactar_textos(df.fillna(""))
+    return _sem_produtos_repetidos(nome, df)
+
+
+def _sem_produtos_repetidos(nome: str, df: pd.DataFrame) -> pd.DataFrame:
+    # Proteção extra: remove duplicatas de produto (evita o bug de set_with_dataframe duplo)
+    if nome == ABA_PROD and "ID" in df.columns:
+        df = df.drop_duplicates(subset=["ID"], keep="first")
+        linhas = (df.index + 2).tolist()  # linha real na planilha (o índice é refeito abaixo)
+        df = df.reset_index(drop=True)
+        df.attrs["linhas_planilha"] = linhas
+    return df
+
+
+# ── Valores sem formatação: números como números, datas como serial ──
+# Com SHEETS_VALORES_CRUS ligado, as abas de ESQUEMAS são lidas com UNFORMATTED_VALUE
+# e o frame tipado (carregar_tipada) sai direto dos números/seriais — to_num/parse_date
+# só veem as células gravadas como texto. O frame cru (carregar_aba) continua de textos:
+# o shim _textos_coluna escreve "1234,5" e "14/04/2026", que as páginas já sabem ler.
+VALORES_CRUS = False  # secrets: SHEETS_VALORES_CRUS
+_valores_crus = VALORES_CRUS
+_PARAMS_CRUS = {"valueRenderOption": "UNFORMATTED_VALUE", "dateTimeRenderOption": "SERIAL_NUMBER"}
+_DIA_ZERO = datetime(1899, 12, 30)  # serial 0 (datetime: seriais com fração de dia têm hora)
+
+_nativas: dict[int, tuple[weakref.ref, pd.DataFrame]] = {}  # id(frame de texto) → (ref, frame tipado)
+
+
+def _crua(nome: str) -> bool:
+    """A aba é lida sem formatação? (só abas com esquema: sabe-se quais colunas são datas)"""
+    return _valores_crus and nome in ESQUEMAS
+
+
+def _guardar_tipada(df: pd.DataFrame, tipada: pd.DataFrame) -> None:
+    """Liga o frame tipado ao frame de texto — vive enquanto o frame de texto viver."""
+    k = id(df)
+    _nativas[k] = (weakref.ref(df), tipada)
+    weakref.finalize(df, _nativas.pop, k, None)
+
+
+def _tipada_de(df: pd.DataFrame) -> Optional[pd.DataFrame]:
+    """Frame tipado montado dos valores sem formatação junto com `df` (None se não houver)."""
+    par = _nativas.get(id(df))
+    return par[1] if par is not None and par[0]() is df else None
+
+
+def _numeros_texto(v: np.ndarray) -> np.ndarray:
+    """texto_celula para um array de floats de uma vez: 12.0 → "12", 2.5 → "2,5"."""
+    out = np.empty(len(v), dtype=object)
+    inteiro = np.isfinite(v) & (v == np.trunc(v)) & (np.abs(v) < 2 ** 53)
+    out[inteiro] = v[inteiro].astype(np.int64).astype(str)
+    frac = np.flatnonzero(~inteiro)
+    if len(frac):
+        t = np.char.rstrip(np.char.rstrip(np.char.mod("%.10f", v[frac]), "0"), ".")
+        out[frac] = np.char.replace(t, ".", ",")
+    return out
+
+
+def _textos_coluna(vals: np.ndarray, datas: bool) -> np.ndarray:
+    """
+    Shim: uma coluna sem formatação → os textos que o frame cru sempre teve
+    ("1234,5", "14/04/2026"). Cada valor distinto é escrito uma vez; células "NA",
+    "null"… ficam vazias, como no TextParser do _df_de_valores.
+    """
+    from pandas._libs.parsers import STR_NA_VALUES  # o que o TextParser lê como vazio
+    from utils.xlsx import texto_celula
+
+    codigos, unicos = pd.factorize(vals)
+    unicos = np.asarray(unicos, dtype=object)
+    textos = np.empty(len(unicos), dtype=object)
+    eh_txt = np.fromiter((type(u) is str for u in unicos), dtype=bool, count=len(unicos))
+    if eh_txt.any():
+        txt = unicos[eh_txt]
+        textos[eh_txt] = np.where(pd.Series(txt, dtype=object).isin(STR_NA_VALUES), None, txt)
+    feitos = eh_txt.copy()
+    if not datas:
+        num = ~eh_txt & np.fromiter((type(u) in (int, float) for u in unicos), dtype=bool, count=len(unicos))
+        if num.any():
+            textos[num] = _numeros_texto(unicos[num].astype(float))
+            feitos |= num
+    for i in np.flatnonzero(~feitos):  # datas, booleanos
+        u = unicos[i]
+        textos[i] = (texto_celula(_DIA_ZERO + timedelta(seconds=round(float(u) * 86400)))
+                     if datas and type(u) in (int, float) else texto_celula(u))
+    return textos[codigos]
+
+
+def _df_de_crus(nome: str, valores: list[list], primeira: int = 0) -> pd.DataFrame:
+    """
+    _df_de_valores para a leitura sem formatação: devolve o mesmo frame de texto
+    (shim coluna a coluna) e deixa guardado o frame tipado montado direto dos
+    números e seriais — sem passar por texto (ver _tipada_de).
+    """
+    from pandas.io.parsers import TextParser
+    from utils.xlsx import texto_celula
+
+    if not valores:
+        return pd.DataFrame()
+    largura = max(len(r) for r in valores)
+    cab = [texto_celula(c) for c in valores[0]] + [""] * (largura - len(valores[0]))
+    colunas = [str(c).strip() for c in TextParser([cab], header=0, dtype=str).read().columns]
+    datas = {colunas.index(c) for canon, c in mapear_colunas(nome, colunas).items()
+             if ESQUEMAS[nome][canon][0] == DATA}
+    mat = np.full((len(valores) - 1, largura), "", dtype=object)
+    for i, r in enumerate(valores[1:]):
+        mat[i, :len(r)] = r
+    df = pd.DataFrame({c: _textos_coluna(mat[:, j], j in datas) for j, c in enumerate(colunas)},
+                      index=pd.RangeIndex(primeira, primeira + len(mat)))
+    df = _sem_produtos_repetidos(nome, df.dropna(how="all").fillna(""))
+    if df.empty:
+        return df
+    pos = np.asarray(df.attrs.get("linhas_planilha", df.index + 2)) - 2 - primeira
+    _guardar_tipada(df, _tipar(nome, df, {c: mat[pos, j] for j, c in enumerate(colunas)}))
+    return df
+
+
+# ── Leitura incremental (abas que só crescem por append_rows) ──
+ABAS_SO_ACRESCIMO = (ABA_VEND, ABA_MOVS, ABA_COMP)
+LINHAS_CONFERENCIA = 5     # linhas finais re-lidas para detectar edição
+RELEITURA_COMPLETA = 600   # segundos — releitura completa periódica (pega edições antigas)
+
+
+def _hash_linhas(linhas: list[list]) -> str:
+    norm = []
+    for r in linhas:
+        r = [str(v) for v in r]
+        while r and r[-1] == "":
+            r.pop()
+        norm.append(r)
+    return hashlib.sha1(json.dumps(norm, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _estado_bruto(valores: list[list], completo_em: float) -> dict:
+    """O que a leitura incremental precisa lembrar da última leitura completa."""
+    return {
+        "linhas": len(valores),  # inclui o cabeçalho
+        "largura": max((len(r) for r in valores), default=0),
+        "cabecalho": list(valores[0]) if valores else [],
+        "cauda": _hash_linhas(valores[1:][-LINHAS_CONFERENCIA:]),
+        "completo_em": completo_em,
+    }
+
+
+def _faixa_cauda(nome: str, bruto: dict) -> str:
+    """Últimas linhas já conhecidas (para conferência) + tudo o que veio depois."""
+    from gspread.utils import rowcol_to_a1
+
+    k = min(LINHAS_CONFERENCIA, bruto["linhas"] - 1)
+    inicio = bruto["linhas"] - k + 1
+    col = re.sub(r"\d", "", rowcol_to_a1(1, max(1, bruto["largura"])))
+    return f"{_intervalo_aba(nome)}!A{inicio}:{col}"
+
+
+def _aplicar_cauda(nome: str, ent: dict, valores: list[list]):
+    """
+    Junta as linhas novas ao DataFrame em memória.
+    Retorna (df, bruto) ou None se a conferência falhar (precisa releitura completa).
+    """
+    bruto = ent["bruto"]
+    k = min(LINHAS_CONFERENCIA, bruto["linhas"] - 1)
+    if len(valores) < k:
+        return None
+    # cauda None = leitura completa veio do XLSX (texto ≠ FORMATTED_VALUE): confere só a contagem
+    if bruto["cauda"] is not None and _hash_linhas(valores[:k]) != bruto["cauda"]:
+        return None
+    novas = valores[k:]
+    # parte da última versão confirmada pelo Sheets (sem as linhas gravadas localmente)
+    df = ent["base"] if ent.get("base") is not None else ent["df"]
+    if novas:
+        crua = _crua(nome)
+        montar = _df_de_crus if crua else _df_de_valores
+        df_novas = montar(nome, [bruto["cabecalho"]] + novas, primeira=bruto["linhas"] - 1)
+        if list(df_novas.columns) != list(df.columns):
+            return None
+        tipada, tip_novas = (_tipada_de(df), _tipada_de(df_novas)) if crua else (None, None)
+        df = pd.concat([df, df_novas])
+        if tipada is not None and tip_novas is not None:
+            _guardar_tipada(df, _juntar_tipadas(tipada, tip_novas))
+    novo = dict(bruto)
+    novo["linhas"] = bruto["linhas"] + len(novas)
+    novo["largura"] = max([bruto["largura"]] + [len(r) for r in novas])
+    novo["cauda"] = _hash_linhas(valores[-LINHAS_CONFERENCIA:]) if novas else bruto["cauda"]
+    return df, novo
+
+
+def _ler_aba_sheets(nome: str) -> tuple[pd.DataFrame, dict]:
+    """Leitura completa "crua" de uma aba direto do Sheets (sem cache) — 1 requisição."""
+    sh = sheet()  # antes do _crua: a conexão lê SHEETS_VALORES_CRUS
+    crua = _crua(nome)
+    try:
+        resp = sh.values_get(_intervalo_aba(nome), params=_PARAMS_CRUS if crua else None)
+    except gspread.exceptions.APIError as e:
+        if "Unable to parse range" in str(e):
+            raise gspread.WorksheetNotFound(nome) from e
+        raise
+    valores = resp.get("values", [])
+    df = _df_de_crus(nome, valores) if crua else _df_de_valores(nome, valores)
+    return df, _estado_bruto(valores, time.time())
+
+
+# ── Leitura em bloco: a planilha inteira num XLSX exportado pelo Drive ──
+XLSX_ABAS = 0  # leituras completas a partir das quais vale exportar (0 = desligado; secrets: SHEETS_XLSX_ABAS)
+_xlsx_abas = XLSX_ABAS
+
+
+def exportar_xlsx() -> bytes:
+    """A planilha inteira como XLSX (uma requisição ao Drive)."""
+    from utils.xlsx import MIME_XLSX
+
+    sh = sheet()
+    return sh.client.export(sh.id, MIME_XLSX)
+
+
+def _ler_abas_xlsx(nomes: list[str], conteudo: Optional[bytes] = None) -> dict[str, tuple[pd.DataFrame, Optional[dict]]]:
+    """
+    Leitura completa das abas a partir do XLSX → {nome: (df, bruto)}, como _ler_abas_sheets.
+    Abas lidas sem formatação (_crua) saem dos valores nativos das células, pelo _df_de_crus.
+    """
+    from utils.xlsx import ler_xlsx
+
+    agora = time.time()
+    matrizes = ler_xlsx(conteudo if conteudo is not None else exportar_xlsx(), abas=nomes,
+                        crus=[n for n in nomes if _crua(n)])
+    out: dict[str, tuple[pd.DataFrame, Optional[dict]]] = {}
+    for n in nomes:
+        if n not in matrizes:
+            out[n] = (pd.DataFrame(), None)
+            continue
+        valores = matrizes[n]
+        bruto = _estado_bruto(valores, agora)
+        bruto["cauda"] = None  # ver _aplicar_cauda
+        out[n] = (_df_de_crus(n, valores) if _crua(n) else _df_de_valores(n, valores), bruto)
+    return out
+
+
+def carregar_abas_xlsx(nomes: Optional[list[str]] = None) -> dict[str, pd.DataFrame]:
+    """
+    Releitura completa de várias abas (padrão: todas de COLS) num único export XLSX;
+    memória e snapshots ficam como depois de um carregar_abas. Para "atualizar tudo".
+    """
+    nomes = list(nomes or COLS)
+    lidas = _ler_abas_xlsx(nomes)
+    for n, (df, bruto) in lidas.items():
+        if bruto is not None:
+            _guardar_mem(n, df, "xlsx", bruto)
+            salvar_snapshot(n, df, bruto=bruto)
+    return {n: _copia(df) for n, (df, _) in lidas.items()}
+
+
+def _ler_abas_sheets(nomes: list[str], ents: Optional[dict] = None) -> dict[str, tuple[pd.DataFrame, Optional[dict]]]:
+    """
+    Lê várias abas numa única requisição (values_batch_get) → {nome: (df, bruto)}.
+    Abas de ABAS_SO_ACRESCIMO com leitura anterior (ents) buscam só o final.
+    Com SHEETS_XLSX_ABAS ligado e pelo menos tantas leituras completas no lote,
+    essas vêm de um export XLSX (se o export falhar, seguem pela API).
+    Abas lidas sem formatação (SHEETS_VALORES_CRUS) vão numa segunda requisição do lote.
+    Se o lote falhar (ex.: uma das abas não existe), cai para leitura aba a aba;
+    abas inexistentes voltam como DataFrame vazio.
+    """
+    if not nomes:
+        return {}
+    sh = sheet()  # a conexão lê as opções dos secrets (XLSX, valores sem formatação)
+    ents = ents or {}
+    agora = time.time()
+    faixas: dict[str, str] = {}
+    for n in nomes:
+        bruto = (ents.get(n) or {}).get("bruto")
+        if (n in ABAS_SO_ACRESCIMO and bruto and bruto["linhas"] > 0
+                and agora - bruto["completo_em"] < RELEITURA_COMPLETA):
+            faixas[n] = _faixa_cauda(n, bruto)
+        else:
+            faixas[n] = _intervalo_aba(n)
+
+    out: dict[str, tuple[pd.DataFrame, Optional[dict]]] = {}
+    inteiras = [n for n, f in faixas.items() if f == _intervalo_aba(n)]
+    if _xlsx_abas and len(inteiras) >= _xlsx_abas:
+        try:
+            out = _ler_abas_xlsx(inteiras)
+        except Exception:
+            out = {}
+        faixas = {n: f for n, f in faixas.items() if n not in out}
+        if not faixas:
+            return out
+
+    # uma requisição por modo de valores (formatados / sem formatação)
+    grupos = [{n: f for n, f in faixas.items() if _crua(n) == crua} for crua in (False, True)]
+    faixas = {**grupos[0], **grupos[1]}
+    completas: list[str] = []
+    lote: list = []
+    try:
+        for g, params in zip(grupos, (None, _PARAMS_CRUS)):
+            if g:
+                lote += sh.values_batch_get(list(g.values()), params=params).get("valueRanges", [])
+    except gspread.exceptions.APIError:
+        lote = []
+    if len(lote) == len(faixas):
+        for (n, faixa), vr in zip(faixas.items(), lote):
+            valores = vr.get("values", [])
+            if faixa == _intervalo_aba(n):
+                df = _df_de_crus(n, valores) if _crua(n) else _df_de_valores(n, valores)
+                out[n] = (df, _estado_bruto(valores, agora))
+                continue
+            r = _aplicar_cauda(n, ents[n], valores)
+            if r is None:
+                completas.append(n)
+            else:
+                out[n] = r
+        if completas:
+            out.update(_ler_abas_sheets(completas))
+        return out
+
+    for n in faixas:
+        try:
+            out[n] = _ler_aba_sheets(n)
+        except gspread.WorksheetNotFound:
+            out[n] = (pd.DataFrame(), None)
+    return out
+
+
+def _em_segundo_plano(alvo, nome: str) -> None:
+    """Roda alvo() numa thread daemon, ligada à sessão atual quando houver uma."""
+    t = threading.Thread(target=alvo, name=f"ebenezer-{nome}", daemon=True)
+    try:
+        from streamlit.runtime.scriptrunner import add_script_run_ctx
+        add_script_run_ctx(t)
+    except Exception:
+        pass
+    t.start()
+
+
+def _refresh_em_segundo_plano(nomes: list[str]) -> None:
+    """Relê as abas do Sheets sem bloquear a página; atualiza memória e snapshots."""
+    with _abas_lock:
+        nomes = [n for n in nomes if n not in _abas_em_refresh]
+        _abas_em_refresh.update(nomes)
+    if not nomes:
+        return
+
+    def _rodar():
+        try:
+            with _abas_lock:
+                ents = {n: _abas_mem.get(n) for n in nomes}
+            _ler_em_voo(nomes, ents)  # erros voltam no dict; o dado velho continua em memória
+        finally:
+            with _abas_lock:
+                _abas_em_refresh.difference_update(nomes)
+
+    _em_segundo_plano(_rodar, "+".join(nomes))
+
+
+# ── Single-flight: uma leitura por aba de cada vez no processo ──
+ESPERA_VOO = 60.0  # segundos que se espera a leitura iniciada por outra thread
+
+_estat_voo = {"leituras": 0, "coalescidas": 0}
+
+
+class _Voo:
+    """Leitura de uma aba em andamento; quem chega depois espera o mesmo resultado."""
+    __slots__ = ("pronto", "df", "erro")
+
+    def __init__(self):
+        self.pronto = threading.Event()
+        self.df: Optional[pd.DataFrame] = None
+        self.erro: Optional[Exception] = None
+
+
+def _ler_em_voo(nomes: list[str], ents: dict) -> dict[str, object]:
+    """
+    Lê as abas do Sheets com single-flight → {nome: DataFrame | exceção}.
+    Quando o TTL vence com N sessões abertas, a primeira que pede cada aba vai ao
+    Sheets e as outras esperam essa mesma leitura: 1 requisição por aba por refresh.
+    As abas próprias são lidas (em lote) antes de esperar as alheias — sem deadlock.
+    Escrita/invalidação no meio do caminho desliga o voo: o resultado ainda vai para
+    quem já esperava, mas não entra na memória nem no snapshot.
+    """
+    meus: dict[str, _Voo] = {}
+    alheios: dict[str, _Voo] = {}
+    with _abas_lock:
+        for n in dict.fromkeys(nomes):
+            voo = _abas_voo.get(n)
+            if voo is None:
+                meus[n] = _abas_voo[n] = _Voo()
+            else:
+                alheios[n] = voo
+        _estat_voo["leituras"] += len(meus)
+        _estat_voo["coalescidas"] += len(alheios)
+
+    out: dict[str, object] = {}
+    if meus:
+        try:
+            for n, (df, bruto) in _ler_abas_sheets(list(meus), ents).items():
+                if _guardar_mem(n, df, "sheets", bruto, voo=meus[n]) and not df.empty:
+                    salvar_snapshot(n, df, bruto=bruto)
+                out[n] = df
+        except Exception as e:
+            for n in meus:
+                out.setdefault(n, e)
+        finally:
+            with _abas_lock:
+                for n, voo in meus.items():
+                    if _abas_voo.get(n) is voo:
+                        del _abas_voo[n]
+                    r = out.get(n)
+                    if isinstance(r, pd.DataFrame):
+                        voo.df = r
+                    else:
+                        voo.erro = r if isinstance(r, Exception) else RuntimeError(f"aba '{n}' não lida")
+                    voo.pronto.set()
+
+    for n, voo in alheios.items():
+        if not voo.pronto.wait(ESPERA_VOO):
+            out[n] = TimeoutError(f"leitura da aba '{n}' em outra sessão demorou demais")
+        else:
+            out[n] = voo.df if voo.erro is None else voo.erro
+    return out
+
+
+def estatisticas_coalescencia() -> dict:
+    """Leituras de aba que foram ao Sheets × pedidos atendidos pela leitura de outra thread."""
+    with _abas_lock:
+        e = dict(_estat_voo)
+    total = e["leituras"] + e["coalescidas"]
+    e["economia_pct"] = round(100 * e["coalescidas"] / total, 1) if total else 0.0
+    return e
+
+
+def _abas_em_dia(nomes: list[str]) -> dict[str, pd.DataFrame]:
+    """
+    Garante que as abas estão em dia na memória e devolve os DataFrames SEM cópia
+    (só para uso interno — quem altera o resultado precisa copiar antes).
+    """
+    global _ultimo_uso
+    _sincronizar_geracao()
+    agora = time.time()
+    if not em_segundo_plano():
+        _ultimo_uso = agora
+    out: dict[str, pd.DataFrame] = {}
+    vencidas: dict[str, Optional[dict]] = {}
+    with _abas_lock:
+        for n in dict.fromkeys(nomes):
+            ent = _abas_mem.get(n)
+            if ent is not None and agora - ent["lido_em"] < CACHE_TTL:
+                out[n] = ent["df"]
+            else:
+                vencidas[n] = ent
+
+    # Cold start: serve o snapshot do disco e relê em segundo plano
+    do_disco = []
+    for n, ent in list(vencidas.items()):
+        if ent is not None:
+            continue
+        snap = ler_snapshot(n)
+        if snap is not None:
+            df, info = snap
+            _guardar_mem(n, df, "disco", info.get("bruto"), dados_em=info.get("salvo_em"))
+            out[n] = df
+            do_disco.append(n)
+            del vencidas[n]
+    if do_disco:
+        _refresh_em_segundo_plano(do_disco)
+
+    # Stale-while-revalidate: aba vencida só pelo TTL → a página recebe na hora o último
+    # snapshot completo em memória e a releitura vai para segundo plano (nas ABAS_QUENTES
+    # o refresher normalmente já chegou antes). Vencida de propósito (vencer_aba /
+    # "Atualizar" → lido_em 0) espera o Sheets, a não ser que não haja cota de leitura.
+    # Abas invalidadas (bruto None) e threads de fundo sempre vão ao Sheets.
+    if vencidas and not em_segundo_plano():
+        sem_cota = espera_leitura() > 0
+        velhas = [n for n, ent in vencidas.items()
+                  if ent is not None and ent.get("bruto") is not None and (ent["lido_em"] > 0 or sem_cota)]
+        for n in velhas:
+            out[n] = vencidas.pop(n)["df"]
+        if velhas:
+            if sem_cota:
+                contar_servida_do_cache(len(velhas))
+            _refresh_em_segundo_plano(velhas)
+
+    if vencidas:
+        for n, r in _ler_em_voo(list(vencidas), vencidas).items():
+            if isinstance(r, pd.DataFrame):
+                out[n] = r
+            elif vencidas[n] is not None:
+                out[n] = vencidas[n]["df"]  # melhor dado velho do que tela vazia
+                contar_servida_do_cache()
+            else:
+                st.warning(f"⚠️ Não foi possível carregar aba '{n}': {r}")
+                out[n] = pd.DataFrame()
+
+    return {n: out[n] for n in dict.fromkeys(nomes)}
+
+
+# ── Refresher: mantém as abas quentes em dia sem ninguém esperar na página ──
+ABAS_QUENTES      = (ABA_PROD, ABA_VEND, ABA_MOVS, ABA_FIADO)
+INTERVALO_REFRESH = 20.0    # segundos entre voltas (secrets: SHEETS_REFRESH_S)
+REFRESH_OCIOSO    = 600.0   # sem página aberta há tanto tempo → o refresher descansa
+
+_refresher: Optional[threading.Thread] = None
+_ultimo_uso = 0.0  # última leitura pedida por uma página
+
+
+def _iniciar_refresher(intervalo: float) -> None:
+    """Sobe (uma vez por processo) a thread que relê as ABAS_QUENTES a cada `intervalo` s."""
+    global _refresher
+    if intervalo <= 0:
+        return
+    with _abas_lock:
+        if _refresher is not None and _refresher.is_alive():
+            return
+        _refresher = threading.Thread(target=_rodar_refresher, args=(intervalo,),
+                                      name="ebenezer-refresher", daemon=True)
+        _refresher.start()
+
+
+def _rodar_refresher(intervalo: float) -> None:
+    """
+    Laço do refresher. Nome "ebenezer-*": lê com prioridade baixa na cota e entra
+    no single-flight como qualquer outro leitor. Só relê o que tem mais de meia volta
+    (se uma página acabou de ler, pula) e descansa quando ninguém usa o app.
+    """
+    while True:
+        time.sleep(intervalo)
+        try:
+            agora = time.time()
+            if agora - _ultimo_uso > REFRESH_OCIOSO:
+                continue
+            with _abas_lock:
+                ents = {n: _abas_mem.get(n) for n in ABAS_QUENTES}
+            alvo = [n for n, ent in ents.items() if ent is None or agora - ent["lido_em"] >= intervalo / 2]
+            if alvo:
+                _ler_em_voo(alvo, ents)
+        except Exception:
+            pass  # a thread não pode morrer; a próxima volta tenta de novo
+
+
+def dados_de(nomes: list[str]) -> Optional[datetime]:
+    """Hora (local) em que saiu do Sheets o dado mais antigo entre as abas em memória."""
+    with _abas_lock:
+        horas = [_abas_mem[n].get("dados_em") for n in nomes if n in _abas_mem]
+    horas = [h for h in horas if h]
+    return datetime.fromtimestamp(min(horas)) if horas else None
+
+
+def selo_dados(nomes: list[str]) -> str:
+    """Texto do selo de frescor — "🕒 dados de hh:mm:ss" ("" se nada foi lido ainda)."""
+    h = dados_de(nomes)
+    return f"🕒 dados de {h:%H:%M:%S}" if h else ""
+
+
+def carregar_abas(nomes: list[str]) -> dict[str, pd.DataFrame]:
+    """
+    Lê várias abas de uma vez e devolve {nome: DataFrame}.
+    Mesmas regras do carregar_aba, mas tudo o que precisar ir ao Sheets
+    sai numa única requisição (values_batch_get) em vez de uma por aba.
+    """
+    return {n: _copia(_com_pendentes(n, df)) for n, df in _abas_em_dia(nomes).items()}
+
+
 def carregar_aba(nome: str) -> pd.DataFrame:
     """
     Lê uma aba do Sheets e devolve DataFrame limpo.
-    - Todas as colunas como string
+    - Todas as colunas como string (também na leitura sem formatação: ver _textos_coluna)
     - Sem linhas totalmente vazias
     - Sem duplicatas de produto na aba Produtos (drop_duplicates por ID)
+
+    Camadas: memória do processo (CACHE_TTL) → snapshot em disco → Sheets.
+    No cold start o snapshot é servido na hora e a aba é relida em segundo plano;
+    vencida pelo TTL, a página recebe o último snapshot em memória e a releitura vai
+    para segundo plano (stale-while-revalidate) — a página só espera o Sheets na
+    primeira leitura da aba ou depois de vencer_aba/invalidar_aba/"Atualizar".
+    Cada chamada devolve uma cópia do frame em cache (rasa com Copy-on-Write, ver _copia):
+    alterar o frame recebido não afeta outras sessões.
+    Vendas/MovimentosEstoque/Compras já trazem as linhas ainda na fila local (utils.outbox).
+    Para várias abas de uma vez, prefira carregar_abas([...]).
     """
-    try:
-        ws = sheet().worksheet(nome)
-        df = get_as_dataframe(ws, evaluate_formulas=True, dtype=str, header=0).dropna(how="all")
-        df.columns = [c.strip() for c in df.columns]
-        df = df.fillna("")
+    return carregar_abas([nome])[nome]
 
-        # Proteção extra: remove duplicatas de produto (evita o bug de set_with_dataframe duplo)
-        if nome == ABA_PROD and "ID" in df.columns:
-            df = df.drop_duplicates(subset=["ID"], keep="first").reset_index(drop=True)
 
-        return df
-    except gspread.WorksheetNotFound:
-        return pd.DataFrame()
-    except Exception as e:
-        st.warning(f"⚠️ Não foi possível carregar aba '{nome}': {e}")
-        return pd.DataFrame()
+# ── Caches derivados (dependem de abas específicas) ──
+_dependentes: dict[str, list[str]] = {}     # aba → caches que dependem dela
+_estat_cache: dict[str, dict[str, int]] = {}  # cache → {"chamadas", "calculos"}
+
+
+def cache_por_aba(*abas: str, ttl: Optional[float] = None, max_entradas: int = 4):
+    """
+    Decorator para caches derivados de abas (catálogo, config, estoque…).
+    O resultado fica guardado enquanto a versão das abas declaradas não mudar:
+    gravar em MovimentosEstoque recalcula só quem depende de MovimentosEstoque,
+    e o que depende só de Produtos continua quente.
+
+        @cache_por_aba(ABA_PROD, ABA_MOVS)
+        def _build_catalogo(): ...
+
+    Os argumentos da função entram na chave, como no st.cache_data. A versão
+    das abas também — cada gravação cria uma entrada nova; max_entradas segura
+    só as mais recentes (versões antigas nunca mais são pedidas).
+    """
+    def deco(fn):
+        nome = f"{fn.__module__}.{fn.__qualname__}"
+        for a in abas:
+            _dependentes.setdefault(a, []).append(nome)
+        estat = _estat_cache.setdefault(nome, {"chamadas": 0, "calculos": 0})
+
+        def _calcular(versoes: tuple, *args, **kwargs):
+            estat["calculos"] += 1
+            return fn(*args, **kwargs)
+
+        # o st.cache_data separa os caches por módulo/nome da função
+        _calcular.__module__ = fn.__module__
+        _calcular.__qualname__ = fn.__qualname__
+        _calcular.__name__ = fn.__name__
+        _calcular = st.cache_data(ttl=ttl, max_entries=max_entradas, show_spinner=False)(_calcular)
+
+        def wrapper(*args, **kwargs):
+            _abas_em_dia(list(abas))  # respeita o CACHE_TTL das abas
+            estat["chamadas"] += 1
+            versoes = tuple(versao_aba(a) for a in abas)
+            return _calcular(versoes, *args, **kwargs)
+
+        wrapper.__name__ = fn.__name__
+        wrapper.__qualname__ = fn.__qualname__
+        wrapper.__doc__ = fn.__doc__
+        wrapper.clear = _calcular.clear
+        wrapper.abas = abas
+        return wrapper
+    return deco
+
+
+def estatisticas_cache() -> list[dict]:
+    """Chamadas × recálculos de cada cache derivado (para conferir a taxa de acerto)."""
+    out = []
+    for nome, e in _estat_cache.items():
+        abas = sorted(a for a, deps in _dependentes.items() if nome in deps)
+        acertos = e["chamadas"] - e["calculos"]
+        out.append({
+            "cache": nome,
+            "abas": ", ".join(abas),
+            "chamadas": e["chamadas"],
+            "calculos": e["calculos"],
+            "acerto_pct": round(100 * acertos / e["chamadas"], 1) if e["chamadas"] else 0.0,
+        })
+    return out
+
+
+# ── Worksheets e cabeçalhos (metadados que quase nunca mudam) ──
+_ws_lock = threading.Lock()
+_ws_cache: dict[str, gspread.Worksheet] = {}          # título → Worksheet
+_cabecalhos: dict[str, tuple[list[str], float, float]] = {}  # título → (cabeçalho, visto_em, relido_em)
+
+
+def worksheet(nome: str) -> gspread.Worksheet:
+    """
+    sheet().worksheet(nome) sem ir ao Sheets a cada chamada.
+    Na primeira falta busca os metadados de TODAS as abas numa requisição só.
+    """
+    with _ws_lock:
+        ws = _ws_cache.get(nome)
+    if ws is not None:
+        return ws
+    todas = {w.title: w for w in sheet().worksheets()}
+    with _ws_lock:
+        _ws_cache.clear()
+        _ws_cache.update(todas)
+    if nome not in todas:
+        raise gspread.WorksheetNotFound(nome)
+    return todas[nome]
+
+
+def esquecer_worksheet(nome: str) -> None:
+    """Descarta handle e cabeçalho em cache (aba apagada/renomeada/recriada)."""
+    with _ws_lock:
+        _ws_cache.pop(nome, None)
+        _cabecalhos.pop(nome, None)
+
+
+def _guardar_cabecalho(nome: str, hdrs: list, visto_em: Optional[float] = None) -> list[str]:
+    """
+    visto_em = hora em que o Sheets tinha esse cabeçalho (leitura de aba em memória);
+    None = acabou de vir do row_values(1) / foi gravado agora — conta como releitura.
+    """
+    hdrs = [str(h).strip() for h in hdrs]
+    agora = time.time()
+    with _ws_lock:
+        ant = _cabecalhos.get(nome)
+        relido_em = agora if visto_em is None else (ant[2] if ant else 0.0)
+        _cabecalhos[nome] = (hdrs, visto_em or agora, relido_em)
+    return list(hdrs)
+
+
+def cabecalho(ws: gspread.Worksheet, recarregar: bool = False) -> list[str]:
+    """
+    Linha 1 da aba (strip), sem ws.row_values(1) a cada gravação.
+    Se a última leitura da aba é mais nova que o cabeçalho guardado e trouxe outro,
+    vale o da leitura; só vai ao Sheets na primeira vez ou com recarregar=True.
+    Página que muda a linha 1 por conta própria (ws.update("A1", …)) chama
+    cabecalho(ws, recarregar=True) depois.
+    """
+    nome = ws.title
+    if recarregar:
+        return _guardar_cabecalho(nome, ws.row_values(1) or [])
+    with _ws_lock:
+        guardado = _cabecalhos.get(nome)
+    with _abas_lock:
+        ent = _abas_mem.get(nome)
+        bruto = ent.get("bruto") if ent else None
+        dados_em = ent.get("dados_em", 0.0) if ent else 0.0
+    if bruto and bruto.get("cabecalho"):
+        lido = [str(h).strip() for h in bruto["cabecalho"]]
+        if guardado is None or (guardado[0] != lido and dados_em > guardado[1]):
+            return _guardar_cabecalho(nome, lido, visto_em=dados_em)
+    if guardado is not None:
+        return list(guardado[0])
+    return _guardar_cabecalho(nome, ws.row_values(1) or [])
+
+
+def _cabecalho_para(ws: gspread.Worksheet, rows: list[dict]) -> list[str]:
+    """
+    Cabeçalho para gravar rows; chave desconhecida → relê a linha 1 (no máx. 1x por
+    CACHE_TTL de releituras de verdade — cabeçalho vindo da memória não conta).
+    """
+    hdrs = cabecalho(ws)
+    chaves = {k for r in rows for k in r}
+    if chaves - set(hdrs):
+        with _ws_lock:
+            guardado = _cabecalhos.get(ws.title)
+        if guardado is None or time.time() - guardado[2] >= CACHE_TTL:
+            hdrs = cabecalho(ws, recarregar=True)
+    return hdrs
 
 
 def garantir_aba(nome: str, colunas: Optional[list] = None) -> gspread.Worksheet:
     """
     Retorna o worksheet, criando-o se não existir.
     Garante que os cabeçalhos esperados estejam presentes.
+    Handle e cabeçalho ficam em cache: chamadas repetidas não vão ao Sheets.
     """
     colunas = colunas or COLS.get(nome, [])
-    sh = sheet()
     try:
-        ws = sh.worksheet(nome)
+        ws = worksheet(nome)
     except gspread.WorksheetNotFound:
-        ws = sh.add_worksheet(title=nome, rows=3000, cols=max(10, len(colunas)))
+        ws = sheet().add_worksheet(title=nome, rows=3000, cols=max(10, len(colunas)))
         if colunas:
             ws.update("A1", [colunas])
+        with _ws_lock:
+            _ws_cache[nome] = ws
+        _guardar_cabecalho(nome, colunas)
         return ws
 
     # Garante cabeçalhos sem destruir dados existentes
     if colunas:
-        hdrs = [h.strip() for h in (ws.row_values(1) or [])]
+        hdrs = cabecalho(ws)
         faltando = [c for c in colunas if c not in hdrs]
+        if faltando:
+            # confere na planilha antes de mexer (o cabeçalho em cache pode estar velho)
+            hdrs = cabecalho(ws, recarregar=True)
+            faltando = [c for c in colunas if c not in hdrs]
         if faltando:
             ws.update("A1", [hdrs + faltando])
+            _guardar_cabecalho(nome, hdrs + faltando)
+            invalidar_aba(nome)
 
     return ws
 
 
 # ─────────────────────────────────────────────────────────────
 #  ESCRITA SEGURA  (append_rows — nunca apaga a aba inteira)
+#  Write-through: depois de gravar, corrige a aba em cache no lugar
+#  (sem st.cache_data.clear(), as outras sessões continuam com cache quente).
 # ─────────────────────────────────────────────────────────────
-def append_rows(ws: gspread.Worksheet, rows: list[dict]) -> None:
+def _linha_inicial(resp) -> Optional[int]:
+    """Primeira linha escrita, a partir do updatedRange da resposta da API."""
+    try:
+        faixa = resp["updates"]["updatedRange"]
+    except (KeyError, TypeError):
+        return None
+    m = re.search(r"!\$?[A-Za-z]+\$?(\d+)", str(faixa))
+    return int(m.group(1)) if m else None
+
+
+def _patch_mem(nome: str, patch) -> None:
+    """
+    Aplica patch(df) → df_novo na aba em cache e sobe a versão dela.
+    Se o patch não tiver como ser aplicado (retorna None), invalida a aba.
+    """
+    with _abas_lock:
+        _abas_voo.pop(nome, None)  # leitura iniciada antes da escrita não sobrescreve o patch
+        ent = _abas_mem.get(nome)
+        if ent is None:
+            return
+        try:
+            df_novo = patch(ent["df"])
+        except Exception:
+            df_novo = None
+        if df_novo is None:
+            ent["lido_em"] = 0.0
+            ent["bruto"] = None
+        else:
+            if ent.get("base") is None:
+                ent["base"] = ent["df"]
+            ent["df"] = df_novo
+        _abas_versao[nome] = _abas_versao.get(nome, 0) + 1
+
+
+def _acrescentar_mem(nome: str, hdrs: list[str], data: list[list], primeira_linha: Optional[int]) -> None:
+    def _patch(df: pd.DataFrame):
+        if primeira_linha is None or len(set(hdrs)) != len(hdrs):
+            return None
+        novas = pd.DataFrame([["" if v is None else str(v) for v in r] for r in data], columns=hdrs)
+        if not df.empty and not set(hdrs) <= set(df.columns):
+            return None
+        novas.index = range(primeira_linha - 2, primeira_linha - 2 + len(novas))
+        if df.empty:
+            return novas
+        novas = novas.reindex(columns=df.columns, fill_value="")
+        out = pd.concat([df, novas])
+        tipada = _tipada_de(df)
+        if tipada is not None:  # o frame tipado acompanha: só as linhas novas são convertidas
+            _guardar_tipada(out, _juntar_tipadas(tipada, _tipar(nome, novas)))
+        return out
+    _patch_mem(nome, _patch)
+
+
+# ── Índice de idempotência (chaves já gravadas, em memória) ──
+# Colunas que identificam um lançamento em cada aba: append_rows não grava de novo
+# uma linha cuja chave já está na aba (clique duplo, reenvio depois de timeout…).
+CHAVES_IDEMPOTENCIA: dict[str, tuple[str, ...]] = {
+    ABA_VEND:  ("VendaID",),
+    ABA_COMP:  ("RefID",),
+    ABA_FIADO: ("ID",),
+    ABA_FPAGT: ("PagamentoID",),
+}
+
+_idem_lock = threading.Lock()
+_idem: dict[tuple[str, str], dict] = {}  # (aba, coluna) → {"versao", "linhas", "chaves": set}
+
+
+def _chave_txt(v) -> str:
+    return "" if v is None else str(v).strip()
+
+
+def _chaves_gravadas(aba: str, coluna: str) -> set[str]:
+    """
+    Conjunto das chaves de `coluna` na aba, montado a partir da aba em cache
+    (sem leitura extra quando ela está quente). Abas que só crescem reaproveitam
+    o conjunto e leem só as linhas novas quando a versão muda.
+    """
+    _abas_em_dia([aba])
+    with _abas_lock:
+        ent = _abas_mem.get(aba)
+        versao = _abas_versao.get(aba, 0)
+        df = ent["df"] if ent is not None else pd.DataFrame()
+    with _idem_lock:
+        idx = _idem.get((aba, coluna))
+        if idx is not None and idx["versao"] == versao:
+            return idx["chaves"]
+        if coluna not in df.columns:
+            chaves, novos = set(), None
+        elif idx is not None and aba in ABAS_SO_ACRESCIMO and len(df) >= idx["linhas"]:
+            chaves, novos = idx["chaves"], df[coluna].iloc[idx["linhas"]:]
+        else:
+            chaves, novos = set(), df[coluna]
+        if novos is not None and len(novos):
+            u = pd.Series(novos.unique()).astype(str).str.strip()
+            chaves.update(u[u != ""])
+        _idem[(aba, coluna)] = {"versao": versao, "linhas": len(df), "chaves": chaves}
+        return chaves
+
+
+def ja_gravado(aba: str, chave, coluna: Optional[str] = None, pendentes: bool = True) -> bool:
+    """
+    A chave (VendaID, RefID, ID do fiado, PagamentoID…) já está na aba? O(1) em memória.
+    `coluna` padrão: a primeira de CHAVES_IDEMPOTENCIA[aba].
+    pendentes: conta também o que ainda está na fila local (o worker do outbox passa False).
+    """
+    chave = _chave_txt(chave)
+    if not chave:
+        return False
+    if coluna is None:
+        if aba not in CHAVES_IDEMPOTENCIA:
+            raise ValueError(f"aba '{aba}' sem coluna de idempotência; informe `coluna`")
+        coluna = CHAVES_IDEMPOTENCIA[aba][0]
+    if chave in _chaves_gravadas(aba, coluna):
+        return True
+    if not pendentes:
+        return False
+    with _pend_lock:
+        return any(it["chave"] == chave and it["coluna"] == coluna for it in _pendentes.get(aba, {}).values())
+
+
+def _sem_duplicatas(aba: str, rows: list[dict]) -> list[dict]:
+    """Tira as linhas cuja chave de idempotência já está gravada na aba."""
+    cols = [c for c in CHAVES_IDEMPOTENCIA.get(aba, ()) if any(_chave_txt(r.get(c)) for r in rows)]
+    if not cols:
+        return rows
+    gravadas = {c: _chaves_gravadas(aba, c) for c in cols}
+    return [r for r in rows if not any(_chave_txt(r.get(c)) in gravadas[c] for c in cols)]
+
+
+def _registrar_chaves(aba: str, rows: list[dict]) -> None:
+    """Depois do append: as chaves novas entram nos índices da aba na hora."""
+    with _idem_lock:
+        for (a, col), idx in _idem.items():
+            if a == aba:
+                idx["chaves"].update(k for k in (_chave_txt(r.get(col)) for r in rows) if k)
+
+
+def append_rows(ws: gspread.Worksheet, rows: list[dict]) -> int:
     """
     Acrescenta linhas ao final da aba usando append_rows da API.
     NUNCA usa ws.clear() + set_with_dataframe (que causava duplicatas e perda de dados).
+    As linhas também entram na aba em cache (write-through) e a versão dela sobe.
+    Linhas cuja chave (CHAVES_IDEMPOTENCIA) já está na aba são descartadas.
+    Retorna quantas linhas foram gravadas.
     """
     if not rows:
-        return
-    hdrs = [h.strip() for h in ws.row_values(1)]
+        return 0
+    rows = _sem_duplicatas(ws.title, rows)
+    if not rows:
+        return 0
+    hdrs = _cabecalho_para(ws, rows)
     data = [[row.get(h, "") for h in hdrs] for row in rows]
-    ws.append_rows(data, value_input_option="USER_ENTERED")
+    resp = ws.append_rows(data, value_input_option="USER_ENTERED")
+    _acrescentar_mem(ws.title, hdrs, data, _linha_inicial(resp))
+    _registrar_chaves(ws.title, rows)
+    return len(rows)
+
+
+def atualizar_celulas(ws: gspread.Worksheet, updates: list[dict]) -> None:
+    """
+    ws.batch_update(updates) + write-through na aba em cache.
+    updates = [{"range": "C5", "values": [[valor]]}, ...] (uma célula por item).
+    Só corrige no lugar abas cujo índice é a linha da planilha; nas demais, invalida.
+    """
+    if not updates:
+        return
+    from gspread.utils import a1_to_rowcol
+
+    ws.batch_update(updates, value_input_option="USER_ENTERED")
+    nome = ws.title
+    hdrs = cabecalho(ws)
+
+    def _patch(df: pd.DataFrame):
+        if nome == ABA_PROD or nome in ABAS_SO_ACRESCIMO:
+            return None  # índice não corresponde à linha (Produtos) ou quebra a leitura incremental
+        df = df.copy()
+        for u in updates:
+            faixa = str(u["range"]).split("!")[-1]
+            if ":" in faixa:
+                return None
+            lin, col = a1_to_rowcol(faixa)
+            if col > len(hdrs) or hdrs[col - 1] not in df.columns or (lin - 2) not in df.index:
+                return None
+            v = u["values"][0][0] if u.get("values") and u["values"][0] else ""
+            df.at[lin - 2, hdrs[col - 1]] = "" if v is None else str(v)
+        return df
+    _patch_mem(nome, _patch)
+
+
+# ── Lançamentos ainda na fila local (utils.outbox) ──
+# A venda entra no SQLite e só chega ao Sheets quando o worker envia. Até lá as linhas
+# ficam registradas aqui e entram nas leituras das abas que só crescem (carregar_aba,
+# carregar_tipada, saldos_estoque, ja_gravado): estoque, "Últimas vendas" e a checagem
+# de clique duplo já contam com elas. Saem da lista quando o worker envia; se a chave
+# já aparece na aba antes disso, a linha pendente é ignorada (nada aparece em dobro).
+# Nas demais abas as páginas editam linhas pelo índice: só aparecem depois de gravadas.
+_pend_lock = threading.Lock()
+_pendentes: dict[str, dict[int, dict]] = {}  # aba → {id na fila: {"linhas", "coluna", "chave"}}
+_pend_frames: dict[str, dict] = {}           # aba → {"versao", "base", "novas", "texto", "tipada"}
+
+
+def _mudaram_pendentes(aba: str) -> None:
+    with _abas_lock:
+        _pend_versao[aba] = _pend_versao.get(aba, 0) + 1
+
+
+def registrar_pendente(aba: str, id_fila: int, linhas: list[dict], coluna: str = "", chave: str = "") -> None:
+    """Lançamento que entrou na fila local — aparece nas leituras da aba até ser enviado."""
+    if aba not in ABAS_SO_ACRESCIMO or not linhas:
+        return
+    with _pend_lock:
+        _pendentes.setdefault(aba, {})[id_fila] = {"linhas": list(linhas), "coluna": coluna,
+                                                   "chave": _chave_txt(chave)}
+    _mudaram_pendentes(aba)
+
+
+def retirar_pendentes(aba: str, ids: list[int]) -> None:
+    """Lançamentos que saíram da fila (enviados ou encontrados na aba)."""
+    with _pend_lock:
+        pend = _pendentes.get(aba, {})
+        saiu = [pend.pop(i) for i in ids if i in pend]
+        if not pend:
+            _pend_frames.pop(aba, None)
+    if saiu:
+        _mudaram_pendentes(aba)
+
+
+def _memo_pendentes(nome: str, df: pd.DataFrame) -> Optional[dict]:
+    """Linhas pendentes de `nome` no formato de `df` (None se não houver), 1x por versão."""
+    with _pend_lock:
+        if not _pendentes.get(nome):
+            return None
+        memo = _pend_frames.get(nome)
+    versao = versao_aba(nome)  # antes de juntar as linhas: mudança no meio refaz na próxima
+    if memo is None or memo["versao"] != versao or memo["base"] is not df:
+        with _pend_lock:
+            itens = list(_pendentes.get(nome, {}).values())
+        linhas = [r for it in itens
+                  if not (it["chave"] and it["coluna"] and it["chave"] in _chaves_gravadas(nome, it["coluna"]))
+                  for r in it["linhas"]]
+        novas = None
+        if linhas:
+            cols = list(df.columns) or list(dict.fromkeys(c for r in linhas for c in r))
+            novas = pd.DataFrame([["" if r.get(c) is None else str(r.get(c)) for c in cols] for r in linhas],
+                                 columns=cols)
+            inicio = int(df.index.max()) + 1 if len(df) else 0
+            novas.index = range(inicio, inicio + len(novas))
+        memo = {"versao": versao, "base": df, "novas": novas, "texto": None, "tipada": None}
+        with _pend_lock:
+            if _pendentes.get(nome):
+                _pend_frames[nome] = memo
+    return memo if memo["novas"] is not None else None
+
+
+def _com_pendentes(nome: str, df: pd.DataFrame) -> pd.DataFrame:
+    """df + linhas ainda na fila (o próprio df se não houver nenhuma)."""
+    memo = _memo_pendentes(nome, df)
+    if memo is None:
+        return df
+    if memo["texto"] is None:
+        memo["texto"] = memo["novas"] if df.empty else pd.concat([df, memo["novas"]])
+    return memo["texto"]
+
+
+def _tipada_com_pendentes(nome: str, df: pd.DataFrame, tipada: pd.DataFrame) -> pd.DataFrame:
+    """Frame tipado de df + linhas ainda na fila (só as pendentes são convertidas)."""
+    memo = _memo_pendentes(nome, df)
+    if memo is None:
+        return tipada
+    if memo["tipada"] is None:
+        tip = _tipar(nome, memo["novas"])
+        memo["tipada"] = tip if df.empty else _juntar_tipadas(tipada, tip)
+    return memo["tipada"]
 
 
 def gerar_id(prefixo: str = "ID") -> str:
-    return f"{prefixo}-{datetime.now().strftime('%Y%m%d%H%M%S%f')[:-3]}"
+    """ID único mesmo entre terminais no mesmo milissegundo: "V-20260414083000123-a1f3"."""
+    return f"{prefixo}-{datetime.now().strftime('%Y%m%d%H%M%S%f')[:-3]}-{secrets.token_hex(2)}"
 
 
 # ─────────────────────────────────────────────────────────────
@@ -207,6 +1373,62 @@ def safe_cost(x, max_val: float = MAX_CUSTO_RAZOAVEL) -> float:
     return 0.0 if v > max_val or v < 0 else v
 
 
+_RE_NUM_VALIDO = r"-?(?:\d+\.?\d*|\.\d+)"  # o que float() aceita depois da limpeza
+
+
+def _to_num_textos(u: pd.Series, default: float) -> np.ndarray:
+    """Mesmas regras do to_num, com métodos .str sobre uma Series de textos."""
+    t = u.str.strip().str.replace("−", "-", regex=False)
+    neg = (t.str.startswith("(") & t.str.endswith(")")).to_numpy()
+    t = t.where(~neg, t.str[1:-1])
+    t = (t.str.replace("R$", "", regex=False)
+          .str.replace(" ", "", regex=False)
+          .str.replace("\u00A0", "", regex=False))
+    br = t.str.contains(",", regex=False).to_numpy()
+    t = t.where(~br, t.str.replace(".", "", regex=False).str.replace(",", ".", regex=False))
+    t = t.str.replace(r"[^0-9.\-]", "", regex=True)
+    varios = (t.str.count("-") > 1).to_numpy()
+    t = t.where(~varios, "-" + t.str.replace("-", "", regex=False))
+    t = t.str.replace(r"\.(?=.*\.)", "", regex=True)  # só o último ponto é decimal
+    ok = t.str.fullmatch(_RE_NUM_VALIDO).to_numpy(dtype=bool)
+    out = np.full(len(t), default, dtype=float)
+    out[ok] = t[ok].astype(float).to_numpy()
+    sinal = ok & neg
+    out[sinal] = -np.abs(out[sinal])
+    return out
+
+
+def to_num_series(s, default: float = 0.0) -> pd.Series:
+    """
+    Versão vetorizada do to_num para uma coluna inteira (mesmo resultado, célula a célula).
+    Cada texto distinto é convertido uma vez só; colunas da planilha repetem muito valor.
+        df["QtdNum"] = to_num_series(df["Qtd"])
+    """
+    if not isinstance(s, pd.Series):
+        s = pd.Series(s, dtype=object)
+    if s.empty:
+        return pd.Series([], index=s.index, dtype=float, name=s.name)
+    if pd.api.types.is_numeric_dtype(s.dtype):
+        return s.astype(float).fillna(default)
+
+    vals = s.to_numpy(dtype=object)
+    eh_texto = np.fromiter((type(v) is str for v in vals), dtype=bool, count=len(vals))
+    out = np.full(len(vals), default, dtype=float)
+    if eh_texto.any():
+        codigos, unicos = pd.factorize(vals[eh_texto])
+        out[eh_texto] = _to_num_textos(pd.Series(unicos, dtype=object), default)[codigos]
+    resto = np.flatnonzero(~eh_texto)
+    if len(resto):
+        out[resto] = [to_num(vals[i], default) for i in resto]  # None, números, tipos raros
+    return pd.Series(out, index=s.index, name=s.name)
+
+
+def safe_cost_series(s, max_val: float = MAX_CUSTO_RAZOAVEL) -> pd.Series:
+    """safe_cost vetorizado: to_num_series + zera valores absurdos ou negativos."""
+    v = to_num_series(s)
+    return v.mask((v > max_val) | (v < 0), 0.0)
+
+
 def brl(v) -> str:
     """Formata valor como moeda brasileira: R$ 1.234,56"""
     try:
@@ -258,6 +1480,10 @@ def norm_str(s: str) -> str:
     return re.sub(r"\s+", " ", strip_acc(str(s or "")).lower()).strip()
 
 
+_SERIAL_ZERO = date(1899, 12, 30)    # dia 0 dos seriais de data do Sheets/Excel
+_RE_SERIAL   = r"\d{5}(?:\.\d+)?"   # 20000..79999 ≈ 1954..2118 (parse_date_series)
+
+
 def parse_date(s) -> Optional[date]:
     """Converte string de data para objeto date. Aceita DD/MM/YYYY e YYYY-MM-DD."""
     if s is None or (isinstance(s, float) and pd.isna(s)):
@@ -274,6 +1500,65 @@ def parse_date(s) -> Optional[date]:
         return None
 
 
+# formatos rápidos: (regex, ordem dos grupos) — mesmos do parse_date, na mesma ordem
+_FORMATOS_DATA = (
+    (r"(\d{1,2})/(\d{1,2})/(\d{4})", ("day", "month", "year")),   # DD/MM/YYYY
+    (r"(\d{4})-(\d{1,2})-(\d{1,2})", ("year", "month", "day")),   # ISO
+    (r"(\d{1,2})/(\d{1,2})/(\d{2})", ("day", "month", "year")),   # DD/MM/YY
+)
+
+
+def parse_date_series(s) -> pd.Series:
+    """
+    parse_date para uma coluna inteira (mesmo resultado, célula a célula), lendo
+    também serial do Sheets (45123 → 16/07/2023) — só aqui: parse_date segue sem.
+    Converte cada texto distinto uma vez: os formatos comuns em passadas vetorizadas,
+    o que sobrar (formatos estranhos) pelo parse_date normal.
+        df["Data_d"] = parse_date_series(df["Data"])
+    """
+    if not isinstance(s, pd.Series):
+        s = pd.Series(s, dtype=object)
+    codigos, unicos = pd.factorize(s.to_numpy(dtype=object))
+    res = np.full(len(unicos), None, dtype=object)
+    pendente = np.ones(len(unicos), dtype=bool)
+
+    eh_texto = np.fromiter((type(v) is str for v in unicos), dtype=bool, count=len(unicos))
+    txt = pd.Series(unicos, dtype=object).where(eh_texto, "").astype(str).str.strip()
+    for regex, ordem in _FORMATOS_DATA:
+        if not pendente.any():
+            break
+        partes = txt[pendente].str.extract(f"^{regex}$")
+        ok = partes[0].notna().to_numpy()
+        if not ok.any():
+            continue
+        partes = partes[ok].astype(int)
+        partes.columns = list(ordem)
+        if ordem[-1] == "year" and regex.endswith("{2})"):  # %y: 69–99 → 19xx, 00–68 → 20xx
+            partes["year"] += np.where(partes["year"] >= 69, 1900, 2000)
+        datas = pd.to_datetime(partes[["year", "month", "day"]], errors="coerce")
+        validas = datas.notna().to_numpy()
+        idx = np.flatnonzero(pendente)[ok][validas]
+        res[idx] = datas[validas].dt.date.to_numpy()
+        pendente[idx] = False
+
+    serial = pendente & txt.str.fullmatch(_RE_SERIAL).to_numpy(dtype=bool)
+    if serial.any():
+        dias = txt[serial].astype(float)
+        dentro = ((dias >= 20000) & (dias < 80000)).to_numpy()
+        idx = np.flatnonzero(serial)[dentro]
+        base = pd.Timestamp(_SERIAL_ZERO)
+        res[idx] = (base + pd.to_timedelta(dias[dentro].astype(int), unit="D")).dt.date.to_numpy()
+        pendente[idx] = False
+
+    for i in np.flatnonzero(pendente):
+        res[i] = parse_date(unicos[i])
+
+    out = np.full(len(s), None, dtype=object)
+    tem = codigos >= 0
+    out[tem] = res[codigos[tem]]
+    return pd.Series(out, index=s.index, name=s.name, dtype=object)
+
+
 # ─────────────────────────────────────────────────────────────
 #  ESTOQUE  (cálculo via MovimentosEstoque — fonte única)
 # ─────────────────────────────────────────────────────────────
@@ -298,77 +1583,1017 @@ def norm_tipo_mov(t: str) -> str:
     return "outro"
 
 
-def calcular_estoque(df_mov: pd.DataFrame) -> dict[str, float]:
+_TIPOS_MOV = ("entrada", "saida", "ajuste", "outro")
+_SINAL_MOV = np.array([1.0, -1.0, 1.0, 0.0])  # mesma ordem de _TIPOS_MOV
+
+
+def _fatorar(col: pd.Series, fn) -> np.ndarray:
+    """Aplica fn uma vez por valor distinto da coluna e devolve o resultado por linha."""
+    codigos, unicos = pd.factorize(col.to_numpy(dtype=object))
+    vals = [fn(u) for u in unicos] + [fn(np.nan)]  # código −1 (vazio/NaN) → último
+    return np.asarray(vals, dtype=object)[codigos]
+
+
+def classificar_tipos_mov(col: pd.Series) -> pd.Series:
+    """norm_tipo_mov para uma coluna inteira (cada texto distinto classificado uma vez)."""
+    return pd.Series(_fatorar(col, norm_tipo_mov), index=col.index, name=col.name, dtype=object)
+
+
+def ledger_estoque(df_mov: pd.DataFrame, chave=None) -> pd.DataFrame:
     """
-    Recebe a aba MovimentosEstoque e devolve {IDProduto: saldo_atual}.
-    Fonte única de verdade para estoque em todo o app.
+    Razão de estoque por produto a partir da aba MovimentosEstoque, sem iterrows:
+    tipos classificados por valor distinto, Qtd vetorizada e somas com np.bincount
+    sobre os códigos fatorados dos produtos.
+
+    Devolve DataFrame indexado pelo IDProduto (na ordem em que aparecem):
+        Entradas | Saidas | Ajustes | Saldo
+    chave: função opcional aplicada ao ID (ex.: _canon_id); IDs que virarem "" saem.
     """
+    vazio = pd.DataFrame(columns=["Entradas", "Saidas", "Ajustes", "Saldo"], dtype=float)
+    vazio.index.name = "IDProduto"
     if df_mov.empty:
-        return {}
+        return vazio
 
     c_pid  = first_col(df_mov, ["IDProduto", "ProdutoID", "ID"])
     c_qtd  = first_col(df_mov, ["Qtd", "Quantidade"])
     c_tipo = first_col(df_mov, ["Tipo", "tipo"])
-
     if not (c_pid and c_qtd and c_tipo):
-        return {}
+        return vazio
 
-    saldo: dict[str, float] = {}
-    for _, r in df_mov.iterrows():
-        pid  = str(r.get(c_pid, "")).strip()
-        if not pid:
-            continue
-        tipo = norm_tipo_mov(r.get(c_tipo, ""))
-        qtd  = to_num(r.get(c_qtd, 0))
-        cur  = saldo.get(pid, 0.0)
-        if tipo == "entrada":
-            saldo[pid] = cur + qtd
-        elif tipo == "saida":
-            saldo[pid] = cur - qtd
-        elif tipo == "ajuste":
-            saldo[pid] = cur + qtd
-    return saldo
+    def _id(v):
+        pid = str(v).strip()  # NaN vira "nan", como no str(r.get(...)) de antes
+        return chave(pid) if (chave and pid) else pid
+
+    pid  = _fatorar(df_mov[c_pid], _id)
+    tipo = _fatorar(df_mov[c_tipo], lambda t: _TIPOS_MOV.index(norm_tipo_mov(t))).astype(np.int8)
+    qtd  = to_num_series(df_mov[c_qtd]).to_numpy()
+
+    usar = (tipo < 3) & (pid != "")
+    if not usar.any():
+        return vazio
+    cod, produtos = pd.factorize(pid[usar])
+    tipo, qtd = tipo[usar], qtd[usar]
+    n = len(produtos)
+
+    cols = {}
+    for k, nome in enumerate(("Entradas", "Saidas", "Ajustes")):
+        m = tipo == k
+        cols[nome] = np.bincount(cod[m], weights=qtd[m], minlength=n)
+    # saldo na ordem das linhas (0 + q1 − q2 + …), igual ao laço antigo
+    cols["Saldo"] = np.bincount(cod, weights=qtd * _SINAL_MOV[tipo], minlength=n)
+    return pd.DataFrame(cols, index=pd.Index(produtos, name="IDProduto", dtype=object))
+
+
+def calcular_estoque(df_mov: pd.DataFrame) -> dict[str, float]:
+    """
+    Recebe a aba MovimentosEstoque e devolve {IDProduto: saldo_atual}.
+    Fonte única de verdade para estoque em todo o app.
+    Para entradas/saídas/ajustes separados (DataFrame), use ledger_estoque.
+    """
+    led = ledger_estoque(df_mov)
+    return dict(zip(led.index, led["Saldo"].tolist()))
+
+
+# ── Checkpoint de estoque (só reprocessa os movimentos novos) ──
+CHECKPOINT_ESTOQUE  = "_checkpoint_estoque"  # nome do snapshot em disco
+CHECKPOINT_A_CADA   = 500                    # grava novo checkpoint a cada N movimentos novos
+CHECKPOINT_VALIDADE = 24 * 3600              # recálculo completo pelo menos 1x por dia
+
+_cp_lock = threading.Lock()
+_cp_estoque: Optional[dict] = None   # {"corte", "linhas", "assinatura", "pares", "criado_em"}
+_cp_forcar = False
+_cp_memo: Optional[tuple] = None     # (versão MovimentosEstoque, pares) da última consulta
+
+
+def _colunas_mov(df_mov: pd.DataFrame):
+    return (first_col(df_mov, ["IDProduto", "ProdutoID", "ID"]),
+            first_col(df_mov, ["Produto", "Nome"]),
+            first_col(df_mov, ["Qtd", "Quantidade"]),
+            first_col(df_mov, ["Tipo", "tipo"]))
+
+
+def _pares_estoque(df_mov: pd.DataFrame) -> pd.DataFrame:
+    """
+    Somas por par (IDProduto, Produto) — granularidade que serve a qualquer chave
+    de página (só ID, ID ou nome…). Colunas: IDProduto, Produto, Entradas, Saidas, Ajustes.
+    """
+    vazio = pd.DataFrame({"IDProduto": pd.Series([], dtype=object), "Produto": pd.Series([], dtype=object),
+                          "Entradas": [], "Saidas": [], "Ajustes": []})
+    c_pid, c_nome, c_qtd, c_tipo = _colunas_mov(df_mov)
+    if df_mov.empty or not (c_pid and c_qtd and c_tipo):
+        return vazio
+
+    def _txt(v):
+        return str(v).strip()
+
+    pid  = _fatorar(df_mov[c_pid], _txt)
+    nome = _fatorar(df_mov[c_nome], _txt) if c_nome else np.full(len(df_mov), "", dtype=object)
+    tipo = _fatorar(df_mov[c_tipo], lambda t: _TIPOS_MOV.index(norm_tipo_mov(t))).astype(np.int8)
+    qtd  = to_num_series(df_mov[c_qtd]).to_numpy()
+
+    usar = tipo < 3
+    if not usar.any():
+        return vazio
+    c_p, u_p = pd.factorize(pid[usar])
+    c_n, u_n = pd.factorize(nome[usar])
+    cod, pares = pd.factorize(c_p.astype(np.int64) * len(u_n) + c_n)
+    tipo, qtd = tipo[usar], qtd[usar]
+    out = pd.DataFrame({"IDProduto": np.asarray(u_p, dtype=object)[pares // len(u_n)],
+                        "Produto": np.asarray(u_n, dtype=object)[pares % len(u_n)]})
+    for k, col in enumerate(("Entradas", "Saidas", "Ajustes")):
+        m = tipo == k
+        out[col] = np.bincount(cod[m], weights=qtd[m], minlength=len(pares))
+    return out
+
+
+def _somar_pares(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    if a.empty:
+        return b
+    if b.empty:
+        return a
+    return (pd.concat([a, b], ignore_index=True)
+              .groupby(["IDProduto", "Produto"], sort=False, as_index=False)
+              [["Entradas", "Saidas", "Ajustes"]].sum())
+
+
+def _assinatura_mov(df_mov: pd.DataFrame, ate: int) -> str:
+    """Hash das últimas linhas cobertas pelo checkpoint (detecta edição/remoção no fim)."""
+    cols = [c for c in _colunas_mov(df_mov) if c]
+    trecho = df_mov.iloc[max(0, ate - LINHAS_CONFERENCIA):ate][cols]
+    return _hash_linhas(trecho.astype(str).values.tolist())
+
+
+def _carregar_checkpoint() -> Optional[dict]:
+    global _cp_estoque
+    with _cp_lock:
+        if _cp_estoque is not None:
+            return _cp_estoque
+    snap = ler_snapshot(CHECKPOINT_ESTOQUE)
+    if snap is None:
+        return None
+    pares, info = snap
+    cp = {"corte": info.get("corte"), "linhas": info.get("linhas_mov"),
+          "assinatura": info.get("assinatura"), "pares": pares.reset_index(drop=True),
+          "criado_em": info.get("criado_em", 0.0)}
+    with _cp_lock:
+        _cp_estoque = cp
+    return cp
+
+
+def _gravar_checkpoint(df_mov: pd.DataFrame, pares: pd.DataFrame) -> None:
+    global _cp_estoque, _cp_forcar
+    cp = {"corte": int(df_mov.index[-1]) + 1, "linhas": len(df_mov),
+          "assinatura": _assinatura_mov(df_mov, len(df_mov)), "pares": pares, "criado_em": time.time()}
+    with _cp_lock:
+        _cp_estoque = cp
+        _cp_forcar = False
+    salvar_snapshot(CHECKPOINT_ESTOQUE, pares, corte=cp["corte"], linhas_mov=cp["linhas"],
+                    assinatura=cp["assinatura"], criado_em=cp["criado_em"])
+
+
+def descartar_checkpoint_estoque() -> None:
+    """Esquece o checkpoint (ex.: linha antiga de MovimentosEstoque editada/apagada)."""
+    global _cp_estoque, _cp_memo
+    with _cp_lock:
+        _cp_estoque = None
+        _cp_memo = None
+    apagar_snapshot(CHECKPOINT_ESTOQUE)
+
+
+def marcar_checkpoint_estoque() -> None:
+    """Pede um checkpoint na próxima consulta (ex.: depois de uma contagem de estoque)."""
+    global _cp_forcar
+    with _cp_lock:
+        _cp_forcar = True
+
+
+def _pares_em_dia() -> pd.DataFrame:
+    """Checkpoint + replay só dos movimentos posteriores a ele."""
+    global _cp_memo
+    df = _abas_em_dia([ABA_MOVS])[ABA_MOVS]
+    versao = _versao_lida(ABA_MOVS)
+    with _cp_lock:
+        memo, forcar = _cp_memo, _cp_forcar
+    if memo is not None and memo[0] == versao and not forcar:
+        return memo[1]
+    if df.empty:
+        return _pares_estoque(df)
+
+    cp = _carregar_checkpoint()
+    inicio, pares = 0, None
+    if cp and cp.get("corte") is not None and time.time() - (cp["criado_em"] or 0) < CHECKPOINT_VALIDADE:
+        if df.index.is_monotonic_increasing:
+            pos = int(df.index.searchsorted(cp["corte"]))
+        else:
+            pos = int((df.index < cp["corte"]).sum())
+        if pos == cp["linhas"] and _assinatura_mov(df, pos) == cp["assinatura"]:
+            inicio, pares = pos, cp["pares"]
+
+    novos = _pares_estoque(df.iloc[inicio:])
+    pares = novos if pares is None else _somar_pares(pares, novos)
+    if forcar or len(df) - inicio >= CHECKPOINT_A_CADA:
+        _gravar_checkpoint(df, pares)
+    with _cp_lock:
+        _cp_memo = (versao, pares)
+    return pares
+
+
+def saldos_estoque(chave=None) -> pd.DataFrame:
+    """
+    Entradas/Saidas/Ajustes/Saldo da aba MovimentosEstoque agrupados por chave,
+    a partir do último checkpoint + movimentos novos (custo estável com o histórico),
+    mais os movimentos ainda na fila local (utils.outbox).
+        chave(pid, nome) -> str   (padrão: IDProduto; chave "" fica de fora)
+    Índice = chave, na ordem em que os produtos aparecem nos movimentos.
+    """
+    pares = _pares_em_dia()
+    pend = _memo_pendentes(ABA_MOVS, _abas_em_dia([ABA_MOVS])[ABA_MOVS])
+    if pend is not None:
+        pares = _somar_pares(pares, _pares_estoque(pend["novas"]))
+    if chave is None:
+        chaves = pares["IDProduto"].to_numpy(dtype=object)
+    else:
+        chaves = np.array([chave(p, n) for p, n in zip(pares["IDProduto"], pares["Produto"])], dtype=object)
+    ok = chaves != ""
+    g = (pares.loc[ok, ["Entradas", "Saidas", "Ajustes"]]
+              .groupby(chaves[ok], sort=False).sum())
+    g["Saldo"] = g["Entradas"] - g["Saidas"] + g["Ajustes"]
+    g.index.name = "Chave"
+    return g
 
 
 # ─────────────────────────────────────────────────────────────
-#  TELEGRAM  (centralizado)
+#  ESQUEMAS  (cabeçalho cru → nome canônico + tipo, 1x por versão da aba)
 # ─────────────────────────────────────────────────────────────
-def tg_send(msg: str) -> None:
-    """Envia mensagem via Telegram se TELEGRAM_ENABLED == '1'."""
+TEXTO, NUMERO, DATA, CATEGORIA = "texto", "numero", "data", "categoria"
+
+_ALIASES_IDPROD = ["IDProduto", "ID do Produto", "ProdutoID", "Produto Id", "SKU", "COD", "Código", "Codigo", "ID"]
+_ALIASES_QTD    = ["Qtd", "Quantidade", "Qtde", "Qde"]
+
+# aba → {coluna canônica: (tipo, aliases em ordem de preferência)}
+ESQUEMAS: dict[str, dict[str, tuple[str, list[str]]]] = {
+    ABA_VEND: {
+        "Data":        (DATA,      ["Data"]),
+        "VendaID":     (TEXTO,     ["VendaID", "Pedido", "Cupom"]),
+        "IDProduto":   (TEXTO,     _ALIASES_IDPROD),
+        "Qtd":         (NUMERO,    _ALIASES_QTD),
+        "PrecoUnit":   (NUMERO,    ["PrecoUnit", "Preço Unitário", "Preço", "Preço Unit", "Unitário"]),
+        "TotalLinha":  (NUMERO,    ["TotalLinha", "Total", "Total da Linha"]),
+        "FormaPagto":  (CATEGORIA, ["FormaPagto", "Forma Pagamento", "Pagamento", "Forma"]),
+        "Obs":         (TEXTO,     ["Obs", "Observação"]),
+        "Desconto":    (NUMERO,    ["Desconto"]),
+        "TotalCupom":  (NUMERO,    ["TotalCupom"]),
+        "CupomStatus": (CATEGORIA, ["CupomStatus", "Status"]),
+        "Cliente":     (CATEGORIA, ["Cliente"]),
+        "FiadoID":     (TEXTO,     ["FiadoID"]),
+    },
+    ABA_COMP: {
+        "Data":        (DATA,      ["Data", "Emissão"]),
+        "IDProduto":   (TEXTO,     _ALIASES_IDPROD),
+        "Produto":     (CATEGORIA, ["Produto", "Nome"]),
+        "Unidade":     (CATEGORIA, ["Unidade"]),
+        "Fornecedor":  (CATEGORIA, ["Fornecedor"]),
+        "Qtd":         (NUMERO,    _ALIASES_QTD),
+        "CustoUnit":   (NUMERO,    ["Custo Unitário", "Custo Unit", "Preço de Custo", "Preço Custo", "Custo"]),
+        "Total":       (NUMERO,    ["Total", "Total da Linha", "Valor Total"]),
+        "Frete":       (NUMERO,    ["FreteRateado", "Frete"]),
+        "Obs":         (TEXTO,     ["Obs", "Observação"]),
+    },
+    ABA_PROD: {
+        "ID":          (TEXTO,     ["ID", "Codigo", "SKU", "IDProduto"]),
+        "Nome":        (TEXTO,     ["Nome", "Produto", "Descrição"]),
+        "Categoria":   (CATEGORIA, ["Categoria"]),
+        "Unidade":     (CATEGORIA, ["Unidade", "Und"]),
+        "Fornecedor":  (TEXTO,     ["Fornecedor"]),
+        "PrecoVenda":  (NUMERO,    ["PreçoVenda", "Preço Venda", "Preço"]),
+        "CustoAtual":  (NUMERO,    ["CustoAtual"]),
+        "CustoMedio":  (NUMERO,    ["CustoMedio"]),
+        "EstoqueAtual":(NUMERO,    ["EstoqueAtual"]),
+        "EstoqueMin":  (NUMERO,    ["EstoqueMin", "Estoque Mínimo"]),
+        "LeadTimeDias":(NUMERO,    ["LeadTimeDias"]),
+        "FatorCusto":  (NUMERO,    ["FatorCusto"]),
+        "Ativo":       (TEXTO,     ["Ativo?", "Ativo"]),
+        "Foto":        (TEXTO,     ["Foto", "Imagem", "URLImagem", "ImagemURL"]),
+    },
+    ABA_MOVS: {
+        "Data":        (DATA,      ["Data"]),
+        "IDProduto":   (TEXTO,     ["IDProduto", "ProdutoID"]),
+        "Produto":     (CATEGORIA, ["Produto", "Nome"]),
+        "Tipo":        (CATEGORIA, ["Tipo"]),
+        "Qtd":         (NUMERO,    _ALIASES_QTD),
+        "Obs":         (TEXTO,     ["Obs"]),
+        "ID":          (TEXTO,     ["ID"]),
+        "Origem":      (CATEGORIA, ["Origem"]),
+    },
+}
+
+_tip_lock = threading.Lock()
+_tipadas: dict[str, tuple[int, pd.DataFrame]] = {}  # aba → (versão, frame tipado)
+
+
+def _chave_cabecalho(s) -> str:
+    """Compara cabeçalhos sem acento, caixa, espaço ou "_" ("Preço Unitário" == "precounitario")."""
+    return re.sub(r"[\s_]+", "", strip_acc(str(s)).lower())
+
+
+def mapear_colunas(nome: str, colunas) -> dict[str, str]:
+    """{coluna canônica: coluna crua} para os cabeçalhos dados (sem repetir coluna crua)."""
+    por_chave: dict[str, str] = {}
+    for c in colunas:
+        por_chave.setdefault(_chave_cabecalho(c), c)
+    usadas: set[str] = set()
+    out: dict[str, str] = {}
+    for canon, (_, aliases) in ESQUEMAS.get(nome, {}).items():
+        chaves = [_chave_cabecalho(a) for a in aliases]
+        if _chave_cabecalho(canon) not in chaves:  # nome canônico só na frente se não estiver na lista
+            chaves.insert(0, _chave_cabecalho(canon))
+        for k in chaves:
+            c = por_chave.get(k)
+            if c is not None and c not in usadas:
+                out[canon] = c
+                usadas.add(c)
+                break
+    return out
+
+
+def _converter(col: Optional[pd.Series], tipo: str, index: pd.Index) -> pd.Series:
+    if tipo == NUMERO:
+        return (to_num_series(col) if col is not None else pd.Series(0.0, index=index)).astype("float64")
+    if tipo == DATA:
+        if col is None:
+            return pd.Series(pd.NaT, index=index, dtype="datetime64[ns]")
+        return pd.to_datetime(parse_date_series(col), errors="coerce")
+    txt = col.astype(str).str.strip() if col is not None else pd.Series("", index=index, dtype=object)
+    return txt.astype("category") if tipo == CATEGORIA else txt
+
+
+def _converter_cru(vals: np.ndarray, tipo: str, index: pd.Index) -> pd.Series:
+    """
+    _converter para NUMERO/DATA a partir dos valores sem formatação: números e
+    seriais entram direto; só as células gravadas como texto passam pelo parser.
+    """
+    if pd.api.types.infer_dtype(vals, skipna=False) in ("floating", "integer", "mixed-integer-float"):
+        eh_num = np.ones(len(vals), dtype=bool)  # coluna toda numérica (o caso comum)
+    else:
+        eh_num = np.fromiter((type(v) in (int, float, bool) for v in vals), dtype=bool, count=len(vals))
+    texto = ~eh_num
+    if tipo == NUMERO:
+        out = np.zeros(len(vals))
+        out[eh_num] = vals[eh_num].astype(float)
+        if texto.any():
+            out[texto] = to_num_series(pd.Series(vals[texto], dtype=object)).to_numpy()
+        return pd.Series(out, index=index)
+    out = np.full(len(vals), np.datetime64("NaT"), dtype="datetime64[ns]")
+    if eh_num.any():
+        dias = np.floor(vals[eh_num].astype(float))
+        ok = (dias >= 20000) & (dias < 80000)  # mesma faixa de seriais do parse_date
+        d = out[eh_num]
+        d[ok] = np.datetime64(_SERIAL_ZERO, "ns") + dias[ok].astype("int64").astype("timedelta64[D]")
+        out[eh_num] = d
+    if texto.any():
+        out[texto] = pd.to_datetime(parse_date_series(pd.Series(vals[texto], dtype=object)),
+                                    errors="coerce").to_numpy(dtype="datetime64[ns]")
+    return pd.Series(out, index=index)
+
+
+def _tipar(nome: str, df: pd.DataFrame, crus: Optional[dict[str, np.ndarray]] = None) -> pd.DataFrame:
+    """crus = {coluna crua: valores sem formatação} — NUMERO/DATA saem deles, sem texto no meio."""
+    mapa = mapear_colunas(nome, df.columns)
+    crus = crus or {}
+    cols = {}
+    for canon, (tipo, _) in ESQUEMAS[nome].items():
+        c = mapa.get(canon)
+        if c in crus and tipo in (NUMERO, DATA):
+            cols[canon] = _converter_cru(crus[c], tipo, df.index)
+        else:
+            cols[canon] = _converter(df[c] if c is not None else None, tipo, df.index)
+    usadas = set(mapa.values())
+    for c in df.columns:  # colunas sem esquema seguem como texto
+        if c not in usadas and c not in cols:
+            cols[c] = df[c]
+    out = pd.DataFrame(cols, index=df.index)
+    out.attrs["colunas_origem"] = mapa
+    return out
+
+
+def _juntar_tipadas(a: pd.DataFrame, b: pd.DataFrame) -> pd.DataFrame:
+    """pd.concat de dois frames tipados sem perder as colunas category (união das categorias)."""
+    from pandas.api.types import union_categoricals
+
+    out = pd.concat([a, b])
+    for i in range(out.shape[1]):
+        ca, cb = a.iloc[:, i], b.iloc[:, i]
+        if isinstance(ca.dtype, pd.CategoricalDtype) and isinstance(cb.dtype, pd.CategoricalDtype):
+            out.isetitem(i, union_categoricals([ca, cb], sort_categories=True))
+    out.attrs["colunas_origem"] = a.attrs.get("colunas_origem", {})
+    return out
+
+
+def carregar_tipadas(nomes: list[str], junto: tuple = (), pendentes: bool = True) -> dict[str, pd.DataFrame]:
+    """
+    Abas com nomes canônicos (ESQUEMAS) e tipos prontos: float64 para valores,
+    datetime64 para datas, category para Tipo/Forma/Categoria…
+    A conversão roda uma vez por versão da aba; colunas do esquema ausentes
+    na planilha vêm vazias (0.0 / NaT / "") e df.attrs["colunas_origem"]
+    diz de qual cabeçalho cru cada coluna canônica veio.
+    junto = abas que só devem ser lidas na mesma requisição (ex.: MovimentosEstoque
+    para o saldos_estoque logo em seguida).
+    pendentes: inclui as linhas ainda na fila local (utils.outbox), como o carregar_aba.
+    Com SHEETS_VALORES_CRUS, a leitura já entrega o frame tipado (sem to_num/parse_date).
+    """
+    for n in nomes:
+        if n not in ESQUEMAS:
+            raise KeyError(f"Aba sem esquema: {n}")
+    brutas = _abas_em_dia([*nomes, *junto])
+    out: dict[str, pd.DataFrame] = {}
+    for n in dict.fromkeys(nomes):
+        versao = _versao_lida(n)
+        with _tip_lock:
+            memo = _tipadas.get(n)
+        if memo is None or memo[0] != versao:
+            tipada = _tipada_de(brutas[n])  # lida sem formatação: já veio tipada
+            memo = (versao, tipada if tipada is not None else _tipar(n, brutas[n]))
+            with _tip_lock:
+                _tipadas[n] = memo
+        tipada = _tipada_com_pendentes(n, brutas[n], memo[1]) if pendentes else memo[1]
+        out[n] = _copia(tipada)  # com Copy-on-Write: sem duplicar os dados
+    return out
+
+
+def carregar_tipada(nome: str) -> pd.DataFrame:
+    """Uma aba já tipada — ver carregar_tipadas."""
+    return carregar_tipadas([nome])[nome]
+
+
+# ─────────────────────────────────────────────────────────────
+#  ARQUIVO ANUAL  (anos fechados de Vendas/MovimentosEstoque em abas próprias)
+#  A aba viva fica com o ano corrente; "Vendas_2025" etc. guardam os anos já
+#  fechados (utils/arquivo.py). Arquivos não mudam: lidos 1x por processo.
+# ─────────────────────────────────────────────────────────────
+ABAS_ARQUIVAVEIS = (ABA_VEND, ABA_MOVS)
+ARQUIVO_TTL      = 3600  # segundos — a lista de anos arquivados só muda quando o arquivamento roda
+
+_arq_lock = threading.Lock()
+_arq_resumo: Optional[tuple[float, pd.DataFrame]] = None  # (lido_em, Arquivo_Resumo)
+_arq_frames: dict[str, pd.DataFrame] = {}                 # "Vendas_2025" → frame tipado
+
+
+def aba_arquivo(nome: str, ano: int) -> str:
+    """Nome da aba de arquivo de um ano ("Vendas" + 2025 → "Vendas_2025")."""
+    return f"{nome}_{int(ano)}"
+
+
+def resumo_arquivo(recarregar: bool = False) -> pd.DataFrame:
+    """Aba Arquivo_Resumo (vazia se ainda não existe), relida no máx. 1x por ARQUIVO_TTL."""
+    global _arq_resumo
+    with _arq_lock:
+        memo = _arq_resumo
+    if memo is not None and not recarregar and time.time() - memo[0] < ARQUIVO_TTL:
+        return _copia(memo[1])
     try:
-        if str(st.secrets.get("TELEGRAM_ENABLED", "0")) != "1":
-            return
-        token   = str(st.secrets.get("TELEGRAM_TOKEN", ""))
-        chat_id = str(st.secrets.get("TELEGRAM_CHAT_ID_LOJINHA", "")
-                      or st.secrets.get("TELEGRAM_CHAT_ID", ""))
-        if not token or not chat_id:
-            return
-        import requests
-        requests.post(
-            f"https://api.telegram.org/bot{token}/sendMessage",
-            json={"chat_id": chat_id, "text": msg,
-                  "parse_mode": "HTML", "disable_web_page_preview": True},
-            timeout=8,
-        )
+        df, _ = _ler_aba_sheets(ABA_ARQ_RESUMO)
+    except gspread.WorksheetNotFound:
+        df = pd.DataFrame()
+    with _arq_lock:
+        _arq_resumo = (time.time(), df)
+    return _copia(df)
+
+
+def anos_arquivados(nome: str, recarregar: bool = False) -> list[int]:
+    """Anos de `nome` já arquivados (têm a linha "total" do ano em Arquivo_Resumo)."""
+    res = resumo_arquivo(recarregar)
+    if res.empty or not {"Periodo", "Aba", "Tipo"} <= set(res.columns):
+        return []
+    per = res["Periodo"].astype(str).str.strip()
+    m = ((res["Aba"].astype(str).str.strip() == nome) & (res["Tipo"].astype(str).str.strip() == "total")
+         & per.str.fullmatch(r"\d{4}"))
+    return sorted({int(p) for p in per[m]})
+
+
+def esquecer_arquivos(nome: Optional[str] = None) -> None:
+    """Descarta o resumo e os arquivos em memória/disco (depois de arquivar um ano)."""
+    global _arq_resumo
+    with _arq_lock:
+        _arq_resumo = None
+        for arq in [a for a in _arq_frames if nome is None or a.startswith(f"{nome}_")]:
+            del _arq_frames[arq]
+            apagar_snapshot(arq)
+
+
+def _arquivo_tipado(nome: str, ano: int) -> pd.DataFrame:
+    """Aba de arquivo tipada com o esquema da aba viva: memória → snapshot em disco → Sheets."""
+    arq = aba_arquivo(nome, ano)
+    with _arq_lock:
+        df = _arq_frames.get(arq)
+    if df is not None:
+        return df
+    snap = ler_snapshot(arq)
+    if snap is not None:
+        bruto = snap[0]
+    else:
+        try:
+            bruto, _ = _ler_aba_sheets(arq)
+        except gspread.WorksheetNotFound:
+            bruto = pd.DataFrame()
+        else:
+            salvar_snapshot(arq, bruto)
+    df = _tipar(nome, bruto)
+    with _arq_lock:
+        _arq_frames[arq] = df
+    return df
+
+
+def carregar_periodo(nome: str, de, ate) -> pd.DataFrame:
+    """
+    carregar_tipada(nome) + os arquivos anuais que o período [de, ate] precisar.
+    Período dentro do que a aba viva já cobre → só a aba viva (nenhuma leitura a mais);
+    começando antes dela → junta os anos arquivados do intervalo (índice refeito 0..n-1).
+    """
+    viva = carregar_tipada(nome)
+    if nome not in ABAS_ARQUIVAVEIS:
+        return viva
+    ini = viva["Data"].min() if not viva.empty else pd.NaT
+    de, ate = pd.Timestamp(de), pd.Timestamp(ate)
+    if pd.notna(ini) and de >= ini.normalize():
+        return viva
+    try:
+        anos = [a for a in anos_arquivados(nome) if de.year <= a <= ate.year]
+        partes = [_arquivo_tipado(nome, a) for a in anos]
+    except Exception as e:
+        st.warning(f"⚠️ Não foi possível carregar o arquivo de '{nome}': {e}")
+        return viva
+    if not partes:
+        return viva
+    return pd.concat([*partes, viva], ignore_index=True)
+
+
+# ─────────────────────────────────────────────────────────────
+#  RESUMO DIÁRIO DE VENDAS  (dia × produto × forma, mantido por incremento)
+#  O painel soma linhas do resumo em vez de reagrupar as linhas cruas de Vendas;
+#  venda nova refaz só o(s) dia(s) que ela tocou.
+# ─────────────────────────────────────────────────────────────
+RESUMO_DIARIO   = "_resumo_diario"  # nome do snapshot em disco
+RESUMO_VALIDADE = 24 * 3600         # recálculo completo pelo menos 1x por dia (pega edições antigas)
+DIMENSOES_RESUMO = ["Data", "KeyID", "FormaPagto", "Estorno"]
+MEDIDAS_RESUMO   = ["Qtd", "Bruto", "Desconto", "Liquido", "Cupons", "SemVendaID", "Linhas"]  # + "Custo", na consulta
+
+_rd_lock = threading.Lock()
+_rd_estado: Optional[dict] = None  # {"corte", "linhas", "assinatura", "cubo", "criado_em"}
+_rd_memo: Optional[tuple] = None   # (versão Vendas, cubo) da última consulta
+_rd_custos: Optional[tuple] = None # ((versão Produtos, versão Compras), custo por KeyID)
+_rd_estat = {"completos": 0, "incrementais": 0, "dias_refeitos": 0}
+
+
+def _assinatura_vendas(df: pd.DataFrame, ate: int) -> str:
+    """Hash das últimas linhas cobertas pelo resumo (detecta edição/remoção no fim)."""
+    trecho = df.iloc[max(0, ate - LINHAS_CONFERENCIA):ate][["Data", "VendaID", "IDProduto", "Qtd", "TotalLinha"]]
+    return _hash_linhas(trecho.astype(str).values.tolist())
+
+
+def _custos_resumo() -> pd.Series:
+    """
+    Custo unitário VIGENTE por KeyID: CustoAtual de Produtos; sem custo → último custo
+    de compra (pela Data, empate pela ordem na aba; CustoUnit ou Total/Qtd, + Frete).
+    Refeito só quando Produtos ou Compras mudam de versão.
+    """
+    global _rd_custos
+    abas = carregar_tipadas([ABA_PROD, ABA_COMP])
+    versoes = (versao_aba(ABA_PROD), versao_aba(ABA_COMP))
+    with _rd_lock:
+        memo = _rd_custos
+    if memo is not None and memo[0] == versoes:
+        return memo[1]
+    prod, comp = abas[ABA_PROD], abas[ABA_COMP]
+    custo = pd.Series(prod["CustoAtual"].to_numpy(), index=canon_ids(prod["ID"]), dtype=float)
+    custo = custo[~custo.index.duplicated()]
+    if not comp.empty:
+        unit = comp["CustoUnit"].to_numpy(dtype=float)
+        qtd = comp["Qtd"].to_numpy(dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            unit = np.where((unit <= 0) & (qtd > 0), comp["Total"].to_numpy(dtype=float) / qtd, unit)
+        c = pd.DataFrame({"KeyID": canon_ids(comp["IDProduto"]), "Data": comp["Data"].to_numpy(),
+                          "_ord": np.arange(len(comp)), "Custo": unit + comp["Frete"].to_numpy(dtype=float)})
+        c = c[(c["KeyID"] != "") & (qtd > 0) & (c["Custo"] > 0) & (c["Custo"].abs() <= 1e6)]
+        ultimo = c.sort_values(["KeyID", "Data", "_ord"]).groupby("KeyID")["Custo"].last()
+        custo = custo.where(custo > 0).combine_first(ultimo).fillna(0.0)
+    with _rd_lock:
+        _rd_custos = (versoes, custo)
+    return custo
+
+
+def _agregar_vendas(v: pd.DataFrame) -> pd.DataFrame:
+    """
+    Linhas tipadas de Vendas → uma linha por DIMENSOES_RESUMO com as MEDIDAS_RESUMO.
+    Desconto e Liquido (TotalCupom, ou Total − Desconto) são do cupom e vão rateados
+    pelas linhas dele (pelo TotalLinha; 1/n se o cupom soma 0).
+    Regras do painel de antes (groupby por VendaID das linhas do período):
+      estorno = VendaID "CN-…" ou Obs com "ESTORNO";
+      Cupons  = 1/n por linha, n = linhas do cupom do mesmo lado (estorno ou não) —
+                soma exata por dia; Cupons por produto é a fração dos cupons;
+      linhas sem VendaID não entram em Cupons: formam UM cupom só no período
+                (SemVendaID conta essas linhas — ver resumo_periodo).
+    """
+    v = v[v["Data"].notna()]
+    if v.empty:
+        return pd.DataFrame(columns=DIMENSOES_RESUMO + MEDIDAS_RESUMO).astype(
+            {"Data": "datetime64[ns]", "Estorno": bool, **dict.fromkeys(MEDIDAS_RESUMO, float)})
+    vid = v["VendaID"].astype(str).str.strip()
+    cup = vid.where(vid != "", "#" + pd.Series(v.index.astype(str), index=v.index))  # sem VendaID = cupom próprio
+    g = pd.DataFrame({"tot": v["TotalLinha"], "desc": v["Desconto"], "tc": v["TotalCupom"]}).groupby(cup)
+    n = g["tot"].transform("count").to_numpy(dtype=float)
+    tot_c = g["tot"].transform("sum").to_numpy()
+    desc_c = g["desc"].transform("max").to_numpy()
+    tc_c = g["tc"].transform("max").to_numpy()
+    liq_c = np.where(tc_c > 0, tc_c, np.maximum(0.0, tot_c - desc_c))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        parte = np.where(tot_c != 0, v["TotalLinha"].to_numpy() / tot_c, 1.0 / n)
+    key = pd.Series(canon_ids(v["IDProduto"]), index=v.index)
+    estorno = (vid.str.upper().str.startswith("CN-")
+               | v["Obs"].astype(str).str.upper().str.contains("ESTORNO", na=False))
+    n_lado = vid.groupby([vid, estorno]).transform("count").to_numpy(dtype=float)
+    sem_id = (vid == "").to_numpy()
+    linhas = pd.DataFrame({
+        "Data":       v["Data"].dt.normalize(),
+        "KeyID":      key,
+        "FormaPagto": v["FormaPagto"].astype(str).str.strip(),
+        "Estorno":    estorno.to_numpy(dtype=bool),
+        "Qtd":        v["Qtd"],
+        "Bruto":      v["TotalLinha"],
+        "Desconto":   desc_c * parte,
+        "Liquido":    liq_c * parte,
+        "Cupons":     np.where(sem_id, 0.0, 1.0 / n_lado),
+        "SemVendaID": sem_id.astype(float),
+        "Linhas":     1.0,
+    }, index=v.index)
+    return linhas.groupby(DIMENSOES_RESUMO, as_index=False, sort=True)[MEDIDAS_RESUMO].sum()
+
+
+def _vendas_arquivadas() -> list[pd.DataFrame]:
+    try:
+        return [_arquivo_tipado(ABA_VEND, a) for a in anos_arquivados(ABA_VEND)]
     except Exception:
+        return []  # sem o arquivo o resumo cobre só a aba viva
+
+
+def descartar_resumo_diario() -> None:
+    """Esquece o resumo (linha antiga de Vendas editada/apagada) — o próximo é completo."""
+    global _rd_estado, _rd_memo
+    with _rd_lock:
+        _rd_estado = None
+        _rd_memo = None
+    apagar_snapshot(RESUMO_DIARIO)
+
+
+def _carregar_resumo() -> Optional[dict]:
+    global _rd_estado
+    with _rd_lock:
+        if _rd_estado is not None:
+            return _rd_estado
+    snap = ler_snapshot(RESUMO_DIARIO)
+    if snap is None:
+        return None
+    cubo, info = snap
+    if list(cubo.columns) != DIMENSOES_RESUMO + MEDIDAS_RESUMO:
+        return None  # resumo gravado com outras medidas → refaz
+    est = {"corte": info.get("corte"), "linhas": info.get("linhas_vendas"), "assinatura": info.get("assinatura"),
+           "cubo": cubo.reset_index(drop=True), "criado_em": info.get("criado_em", 0.0)}
+    with _rd_lock:
+        _rd_estado = est
+    return est
+
+
+def resumo_diario() -> pd.DataFrame:
+    """
+    Resumo de Vendas por DIMENSOES_RESUMO (aba viva + anos arquivados), em dia com a aba:
+    vendas novas refazem só os dias que tocaram; edição/remoção no fim da aba, ou
+    RESUMO_VALIDADE vencida, refazem tudo. Guardado em disco entre reinícios.
+    """
+    global _rd_estado, _rd_memo
+    # só o que já está na aba: o corte/assinatura do incremento seguem as linhas do Sheets
+    viva = carregar_tipadas([ABA_VEND], pendentes=False)[ABA_VEND]
+    versao = _versao_lida(ABA_VEND)
+    with _rd_lock:
+        memo = _rd_memo
+    if memo is not None and memo[0] == versao:
+        return memo[1]
+
+    est = _carregar_resumo()
+    inicio = None
+    if est and est.get("corte") is not None and time.time() - (est["criado_em"] or 0) < RESUMO_VALIDADE:
+        if viva.index.is_monotonic_increasing:
+            pos = int(viva.index.searchsorted(est["corte"]))
+        else:
+            pos = int((viva.index < est["corte"]).sum())
+        if pos == est["linhas"] and _assinatura_vendas(viva, pos) == est["assinatura"]:
+            inicio = pos
+
+    mudou = True
+    if inicio is None:
+        base = pd.concat([*_vendas_arquivadas(), viva], ignore_index=True)
+        cubo = _agregar_vendas(base)
+        criado_em = time.time()
+        _rd_estat["completos"] += 1
+    else:
+        criado_em = est["criado_em"]
+        dias = viva["Data"].iloc[inicio:].dropna().dt.normalize().unique()
+        if len(dias):
+            refeitos = _agregar_vendas(viva[viva["Data"].dt.normalize().isin(dias)])
+            ant = est["cubo"]
+            cubo = (pd.concat([ant[~ant["Data"].isin(dias)], refeitos], ignore_index=True)
+                      .sort_values(DIMENSOES_RESUMO, ignore_index=True))
+            _rd_estat["incrementais"] += 1
+            _rd_estat["dias_refeitos"] += len(dias)
+        else:
+            cubo, mudou = est["cubo"], inicio != len(viva)
+
+    corte = int(viva.index[-1]) + 1 if len(viva) else 0
+    est = {"corte": corte, "linhas": len(viva), "assinatura": _assinatura_vendas(viva, len(viva)),
+           "cubo": cubo, "criado_em": criado_em}
+    with _rd_lock:
+        _rd_estado = est
+        _rd_memo = (versao, cubo)
+    if mudou:
+        salvar_snapshot(RESUMO_DIARIO, cubo, corte=corte, linhas_vendas=len(viva),
+                        assinatura=est["assinatura"], criado_em=criado_em)
+    return cubo
+
+
+def resumo_periodo(de, ate, por: Optional[list[str]] = None, estornos: bool = False) -> pd.DataFrame:
+    """
+    Linhas do resumo_diario() com Data em [de, ate] (sem estornos, por padrão).
+    por = colunas para agrupar e somar as medidas — DIMENSOES_RESUMO e/ou "Categoria"
+    (da aba Produtos, resolvida na hora): resumo_periodo(de, ate, por=["Data"]).
+    Custo = Qtd × custo unitário vigente (_custos_resumo), calculado na consulta.
+    Nº de cupons do período = round(Cupons) + (1 se SemVendaID > 0).
+    """
+    cubo = resumo_diario()
+    m = cubo["Data"].between(pd.Timestamp(de), pd.Timestamp(ate))
+    if not estornos:
+        m &= ~cubo["Estorno"]
+    out = cubo[m]
+    custo = out["KeyID"].map(_custos_resumo()).fillna(0.0).where(out["KeyID"] != "", 0.0)
+    out = out.assign(Custo=out["Qtd"] * custo.to_numpy(dtype=float))
+    if not por:
+        return out.reset_index(drop=True)
+    if "Categoria" in por:
+        prod = carregar_tipada(ABA_PROD)
+        cat = pd.Series(prod["Categoria"].astype(str).to_numpy(), index=canon_ids(prod["ID"]))
+        out = out.assign(Categoria=out["KeyID"].map(cat[~cat.index.duplicated()]).fillna(""))
+    return out.groupby(por, as_index=False, sort=True)[MEDIDAS_RESUMO + ["Custo"]].sum()
+
+
+def estatisticas_resumo() -> dict:
+    """Linhas do resumo em memória e quantas vezes ele foi refeito (inteiro / por dia)."""
+    with _rd_lock:
+        cubo = _rd_memo[1] if _rd_memo is not None else None
+    return {"linhas": 0 if cubo is None else len(cubo), **_rd_estat}
+
+
+def _bytes_frame(df: pd.DataFrame) -> int:
+    """Memória real do frame: objetos str compartilhados entre células contam uma vez."""
+    total = int(df.index.memory_usage())
+    for i in range(df.shape[1]):
+        col = df.iloc[:, i]
+        if col.dtype == object:
+            arr = col.to_numpy()
+            unicos = {id(v): v for v in arr}
+            total += arr.nbytes + sum(sys.getsizeof(v) for v in unicos.values())
+        else:
+            total += int(col.memory_usage(index=False, deep=True))
+    return total
+
+
+def relatorio_memoria() -> list[dict]:
+    """Memória por aba em cache (frame cru e frame tipado), para o painel de ferramentas."""
+    with _abas_lock:
+        ents = {n: (e["df"], e["origem"]) for n, e in _abas_mem.items()}
+        versoes = dict(_abas_versao)
+    with _tip_lock:
+        tipadas = {n: df for n, (_, df) in _tipadas.items()}
+    out = []
+    for n, (df, origem) in sorted(ents.items()):
+        cru = _bytes_frame(df)
+        tip = _bytes_frame(tipadas[n]) if n in tipadas else 0
+        out.append({
+            "aba": n,
+            "linhas": len(df),
+            "colunas": df.shape[1],
+            "versao": versoes.get(n, 0),
+            "origem": origem,
+            "cru_kb": round(cru / 1024, 1),
+            "tipada_kb": round(tip / 1024, 1),
+            "total_kb": round((cru + tip) / 1024, 1),
+        })
+    return out
+
+
+# ─────────────────────────────────────────────────────────────
+#  REGISTRO DE PRODUTOS  (chaves e índices montados 1x por versão da aba)
+# ─────────────────────────────────────────────────────────────
+_CAMPOS_PROD = {
+    "id":         ["ID", "Id", "Codigo", "Código", "SKU", "IDProduto", "ProdutoID"],
+    "nome":       ["Nome", "Produto", "Descrição", "Descricao"],
+    "preco":      ["PreçoVenda", "PrecoVenda", "Preço Venda", "Preço", "Preco"],
+    "custo":      ["CustoAtual", "CustoMedio", "Custo", "PreçoCusto", "PrecoCusto", "CustoUnit"],
+    "unidade":    ["Unidade", "Und"],
+    "categoria":  ["Categoria"],
+    "fornecedor": ["Fornecedor"],
+    "foto":       ["Foto", "Imagem", "URLImagem", "ImagemURL", "FotoURL", "Image", "Photo"],
+    "emin":       ["EstoqueMin", "Estoque Mínimo", "Estoque Min", "EstMinimo"],
+    "ativo":      ["Ativo?", "Ativo"],
+}
+
+
+def _txt_prod(v) -> str:
+    """Texto limpo de uma célula ("nan"/"none"/NaN contam como vazio)."""
+    if v is None:
+        return ""
+    try:
+        if pd.isna(v):
+            return ""
+    except (TypeError, ValueError):
         pass
+    s = str(v).strip()
+    return "" if s.lower() in ("nan", "none") else s
 
 
-def tg_media(media: list[dict]) -> None:
-    """Envia grupo de mídias via Telegram."""
+def canon_id(x) -> str:
+    """Só os dígitos do ID (chave de lookup usada no painel)."""
+    return re.sub(r"[^0-9]", "", str(x or ""))
+
+
+def chave_produto(pid, nome) -> str:
+    """Chave canônica de produto: o ID; sem ID, "nm:<nome normalizado>"."""
+    p = _txt_prod(pid)
+    return p if p else f"nm:{norm_str(_txt_prod(nome))}"
+
+
+def chaves_produto(ids, nomes=None) -> np.ndarray:
+    """chave_produto para colunas inteiras (cada ID/nome distinto tratado uma vez)."""
+    n = len(ids) if ids is not None else len(nomes)
+    chaves = _fatorar(pd.Series(ids), _txt_prod) if ids is not None else np.full(n, "", dtype=object)
+    sem_id = chaves == ""
+    if sem_id.any():
+        alt = pd.Series(nomes).iloc[sem_id] if nomes is not None else pd.Series([""] * int(sem_id.sum()))
+        chaves[sem_id] = _fatorar(alt, lambda v: f"nm:{norm_str(_txt_prod(v))}")
+    return chaves
+
+
+def canon_ids(ids) -> np.ndarray:
+    """canon_id para uma coluna inteira."""
+    return _fatorar(pd.Series(ids), canon_id)
+
+
+def _primeira_posicao(valores) -> dict[str, int]:
+    """valor → posição da 1ª ocorrência (igual ao drop_duplicates keep="first")."""
+    out: dict[str, int] = {}
+    for i, v in enumerate(valores):
+        if v and v not in out:
+            out[v] = i
+    return out
+
+
+class RegistroProdutos:
+    """
+    Índices da aba Produtos, montados uma vez por versão da aba e compartilhados
+    entre sessões — somente leitura (não alterar reg.df nem os arrays).
+
+        reg = registro_produtos()
+        reg.pos("123") / reg.pos("nm:arroz 5kg") / reg.pos("Arroz 5kg")  → posição em reg.df
+        reg.linha("123")           → linha na planilha (para atualizar_celulas) ou None
+        reg.coluna("preco")        → nome da coluna; reg.posicao_coluna("preco") → nº 1-based
+        reg.mapa("custo")          → {chave: custo} com to_num já aplicado
+        reg.ids / reg.nomes / reg.chaves / reg.canon → arrays alinhados com reg.df
+    """
+
+    def __init__(self, df: pd.DataFrame, versao: int):
+        self.df = df
+        self.versao = versao
+        low = {str(c).lower(): c for c in df.columns}  # como first_col, mas vale com a aba sem linhas
+        self.colunas = {campo: next((c for c in cands if c in df.columns), None)
+                               or next((low[c.lower()] for c in cands if c.lower() in low), None)
+                        for campo, cands in _CAMPOS_PROD.items()}
+        self.posicoes = {str(c): i + 1 for i, c in enumerate(df.columns)}
+        n = len(df)
+        c_id, c_nome = self.colunas["id"], self.colunas["nome"]
+        self.ids = _fatorar(df[c_id], _txt_prod) if c_id and n else np.full(n, "", dtype=object)
+        self.nomes = _fatorar(df[c_nome], _txt_prod) if c_nome and n else np.full(n, "", dtype=object)
+        self.chaves = chaves_produto(self.ids, self.nomes)
+        self.canon = canon_ids(self.ids) if n else np.full(0, "", dtype=object)
+        linhas = df.attrs.get("linhas_planilha")
+        # só conhecida com certeza quando a aba veio do Sheets nesta versão
+        self.linhas = np.asarray(linhas, dtype=np.int64) if linhas is not None and len(linhas) == n else None
+        self.por_chave = _primeira_posicao(self.chaves)
+        self.por_canon = _primeira_posicao(self.canon)
+        self.por_nome = _primeira_posicao(_fatorar(pd.Series(self.nomes), norm_str) if n else [])
+        self._numeros: dict[str, np.ndarray] = {}
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    def pos(self, x) -> Optional[int]:
+        """Posição do produto por chave, ID, ID só com dígitos ou nome (nessa ordem)."""
+        s = _txt_prod(x)
+        if not s:
+            return None
+        if s in self.por_chave:
+            return self.por_chave[s]
+        if s.startswith("nm:"):
+            return self.por_nome.get(s[3:])
+        c = canon_id(s)
+        if c and c in self.por_canon:
+            return self.por_canon[c]
+        return self.por_nome.get(norm_str(s))
+
+    def linha(self, chave) -> Optional[int]:
+        """Linha na planilha do produto com essa chave/ID exata (None se não houver ou não for certa)."""
+        p = self.por_chave.get(_txt_prod(chave))
+        if p is None or self.linhas is None:
+            return None
+        return int(self.linhas[p])
+
+    def coluna(self, campo: str) -> Optional[str]:
+        """Nome real da coluna para um campo (id, nome, preco, custo, unidade, foto, emin…)."""
+        return self.colunas.get(campo)
+
+    def posicao_coluna(self, campo: str) -> Optional[int]:
+        """Número 1-based da coluna do campo no cabeçalho da aba."""
+        c = self.colunas.get(campo)
+        return self.posicoes.get(c) if c else None
+
+    def numeros(self, campo: str) -> np.ndarray:
+        """Coluna do campo já convertida com to_num (zeros se a coluna não existir)."""
+        arr = self._numeros.get(campo)
+        if arr is None:
+            c = self.colunas.get(campo)
+            arr = to_num_series(self.df[c]).to_numpy() if c else np.zeros(len(self.df))
+            arr.setflags(write=False)
+            self._numeros[campo] = arr
+        return arr
+
+    def valor(self, x, campo: str, default=""):
+        """Valor cru (texto) de um campo do produto x."""
+        p, c = self.pos(x), self.colunas.get(campo)
+        if p is None or not c:
+            return default
+        return self.df[c].iat[p]
+
+    def mapa(self, campo: str, por: str = "chave") -> dict:
+        """{chave → número} (ou {canon → número} com por="canon"); 1ª ocorrência vence."""
+        chaves = self.canon if por == "canon" else self.chaves
+        vals = self.numeros(campo)
+        return {k: float(vals[i]) for k, i in _primeira_posicao(chaves).items()}
+
+
+_reg_lock = threading.Lock()
+_reg_prod: Optional[RegistroProdutos] = None
+
+
+def registro_produtos() -> RegistroProdutos:
+    """Registro da aba Produtos em dia (remontado só quando a versão da aba muda)."""
+    global _reg_prod
+    df = _abas_em_dia([ABA_PROD])[ABA_PROD]
+    versao = versao_aba(ABA_PROD)
+    with _reg_lock:
+        reg = _reg_prod
+    if reg is not None and reg.versao == versao and reg.df is df:
+        return reg
+    reg = RegistroProdutos(df, versao)
+    with _reg_lock:
+        _reg_prod = reg
+    return reg
+
+
+# ─────────────────────────────────────────────────────────────
+#  TELEGRAM  (centralizado)
+# ─────────────────────────────────────────────────────────────
+def _destino_telegram() -> Optional[tuple[str, str, str]]:
+    """(api, token, chat_id) se TELEGRAM_ENABLED == '1' e houver token/chat; senão None."""
     try:
         if str(st.secrets.get("TELEGRAM_ENABLED", "0")) != "1":
-            return
+            return None
+        api     = str(st.secrets.get("TELEGRAM_API_URL", "") or API_TELEGRAM)
         token   = str(st.secrets.get("TELEGRAM_TOKEN", ""))
         chat_id = str(st.secrets.get("TELEGRAM_CHAT_ID_LOJINHA", "")
                       or st.secrets.get("TELEGRAM_CHAT_ID", ""))
-        if not token or not chat_id or not media:
-            return
-        import requests
-        requests.post(
-            f"https://api.telegram.org/bot{token}/sendMediaGroup",
-            json={"chat_id": chat_id, "media": media[:10]},
-            timeout=12,
-        )
     except Exception:
-        pass
+        return None
+    return (api, token, chat_id) if token and chat_id else None
+
+
+def tg_send(msg: str) -> None:
+    """
+    Agenda mensagem no Telegram se TELEGRAM_ENABLED == '1' e volta na hora.
+    O envio (com limite por chat, novas tentativas e resumo de rajadas) é feito
+    pela thread de utils.telegram — Telegram lento não trava o caixa.
+    """
+    dest = _destino_telegram()
+    if dest and msg:
+        _agendar_telegram("texto", str(msg), *dest)
+
+
+def tg_media(media: list[dict]) -> None:
+    """Agenda grupo de mídias no Telegram (até 10) e volta na hora."""
+    dest = _destino_telegram()
+    if dest and media:
+        _agendar_telegram("media", list(media[:10]), *dest)
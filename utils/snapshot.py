@@ -0,0 +1,101 @@
+# utils/snapshot.py — snapshots locais das abas do Sheets
+# -*- coding: utf-8 -*-
+"""
+Guarda em disco a última leitura de cada aba para que um cold start
+(container acordando) sirva dados na hora, sem esperar o Sheets.
+
+    <CACHE_DIR>/abas/<aba>.arrow   → DataFrame em Arrow IPC (feather v2)
+    <CACHE_DIR>/abas/<aba>.json    → metadados (salvo_em, linhas, colunas)
+
+Usado por utils.sheets.carregar_aba — as páginas não precisam importar daqui.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import time
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+# Versão do formato em disco — mudar invalida snapshots antigos
+FORMATO_SNAPSHOT = 2
+
+_COL_INDICE = "__indice__"
+
+
+def _dir_snapshots() -> Path:
+    base = Path(os.environ.get("EBENEZER_CACHE_DIR", ".cache"))
+    return base / "abas"
+
+
+def _arquivos(nome: str) -> tuple[Path, Path]:
+    seguro = re.sub(r"[^0-9A-Za-z_.-]", "_", str(nome))
+    d = _dir_snapshots()
+    return d / f"{seguro}.arrow", d / f"{seguro}.json"
+
+
+def salvar_snapshot(nome: str, df: pd.DataFrame, **meta) -> bool:
+    """
+    Grava o DataFrame da aba em disco (escrita atômica: tmp + rename).
+    Retorna False se não der para gravar (sem pyarrow, disco cheio, colunas duplicadas…).
+    """
+    try:
+        arq, arq_meta = _arquivos(nome)
+        arq.parent.mkdir(parents=True, exist_ok=True)
+        tmp = arq.with_suffix(".arrow.tmp")
+        # o índice (linha da planilha − 2) vai junto numa coluna reservada
+        df.rename_axis(_COL_INDICE).reset_index().to_feather(tmp)
+        os.replace(tmp, arq)
+        info = {
+            "aba": nome,
+            "formato": FORMATO_SNAPSHOT,
+            "salvo_em": time.time(),
+            "linhas": int(len(df)),
+            "colunas": [str(c) for c in df.columns],
+            **meta,
+        }
+        tmp_meta = arq_meta.with_suffix(".json.tmp")
+        tmp_meta.write_text(json.dumps(info, ensure_ascii=False), encoding="utf-8")
+        os.replace(tmp_meta, arq_meta)
+        return True
+    except Exception:
+        return False
+
+
+def info_snapshot(nome: str) -> Optional[dict]:
+    """Lê só o sidecar de metadados (barato). None se não houver snapshot válido."""
+    _, arq_meta = _arquivos(nome)
+    try:
+        info = json.loads(arq_meta.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+    if info.get("formato") != FORMATO_SNAPSHOT:
+        return None
+    return info
+
+
+def ler_snapshot(nome: str) -> Optional[tuple[pd.DataFrame, dict]]:
+    """Retorna (df, metadados) do último snapshot da aba, ou None."""
+    info = info_snapshot(nome)
+    if info is None:
+        return None
+    arq, _ = _arquivos(nome)
+    try:
+        df = pd.read_feather(arq)
+    except Exception:
+        return None
+    if _COL_INDICE in df.columns:
+        df = df.set_index(_COL_INDICE)
+        df.index.name = None
+    return df, info
+
+
+def apagar_snapshot(nome: str) -> None:
+    for arq in _arquivos(nome):
+        try:
+            arq.unlink()
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,191 @@
+# utils/telegram.py — envio assíncrono das notificações do Telegram
+# -*- coding: utf-8 -*-
+"""
+tg_send / tg_media (utils.sheets) só colocam o aviso numa fila em memória e
+voltam na hora; uma thread do processo ("ebenezer-telegram") faz o envio.
+
+    fila limitada (FILA_MAX) → cheia, o aviso mais antigo sai para o novo entrar
+    rajada → textos seguidos para o mesmo chat, dentro de JANELA_RESUMO,
+             viram uma mensagem só (até o limite de 4096 caracteres)
+    limite → balde por chat (LIMITE_POR_MINUTO); 429 respeita o retry_after
+    falha  → 5xx / rede repetem com espera exponencial; 400 não repete
+             (resumo recusado é reenviado parte por parte)
+
+A URL da API vem de TELEGRAM_API_URL (padrão api.telegram.org) — aponta para
+um servidor HTTP local para testar sem falar com o Telegram.
+Contadores: estatisticas_telegram().
+"""
+from __future__ import annotations
+
+import queue
+import random
+import threading
+import time
+from typing import Optional
+
+from utils.cota import Balde
+
+API_PADRAO        = "https://api.telegram.org"
+FILA_MAX          = 200    # avisos aguardando envio
+JANELA_RESUMO     = 2.0    # segundos esperando mais avisos para juntar numa mensagem
+LIMITE_POR_MINUTO = 20     # mensagens/min por chat (limite do Telegram para grupos)
+TENTATIVAS_MAX    = 5
+TAMANHO_MAX       = 4096   # caracteres por mensagem de texto
+TIMEOUT           = 10     # segundos por requisição
+SEPARADOR         = "\n\n➖➖➖\n\n"
+
+_fila: "queue.Queue[dict]" = queue.Queue(maxsize=FILA_MAX)
+_worker_lock = threading.Lock()
+_worker: Optional[threading.Thread] = None
+_baldes: dict[str, Balde] = {}
+
+_estat_lock = threading.Lock()
+_estat = {"agendados": 0, "mensagens": 0, "resumidos": 0, "descartados": 0,
+          "repeticoes": 0, "falhas": 0}
+
+
+def _contar(**inc) -> None:
+    with _estat_lock:
+        for k, v in inc.items():
+            _estat[k] += v
+
+
+# ─────────────────────────────────────────────────────────────
+#  API PÚBLICA
+# ─────────────────────────────────────────────────────────────
+def agendar(tipo: str, carga, api: str, token: str, chat_id: str) -> bool:
+    """
+    Põe um aviso na fila e volta na hora. tipo "texto" (carga = str) ou
+    "media" (carga = lista do sendMediaGroup). False se não coube na fila.
+    """
+    item = {"tipo": tipo, "carga": carga, "api": api.rstrip("/"), "token": token,
+            "chat_id": str(chat_id), "partes": [carga] if tipo == "texto" else None}
+    try:
+        _fila.put_nowait(item)
+    except queue.Full:
+        try:
+            _fila.get_nowait()  # o mais antigo sai
+            _contar(descartados=1)
+        except queue.Empty:
+            pass
+        try:
+            _fila.put_nowait(item)
+        except queue.Full:
+            _contar(descartados=1)
+            return False
+    _contar(agendados=1)
+    iniciar_worker()
+    return True
+
+
+def estatisticas_telegram() -> dict:
+    with _estat_lock:
+        out = dict(_estat)
+    out["na_fila"] = _fila.qsize()
+    return out
+
+
+def iniciar_worker() -> None:
+    """Sobe a thread de envio (uma por processo)."""
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_rodar_worker, name="ebenezer-telegram", daemon=True)
+        _worker.start()
+
+
+# ─────────────────────────────────────────────────────────────
+#  ENVIO (worker)
+# ─────────────────────────────────────────────────────────────
+def _mesmo_destino(a: dict, b: dict) -> bool:
+    return (a["api"], a["token"], a["chat_id"]) == (b["api"], b["token"], b["chat_id"])
+
+
+def _juntar(lote: list[dict]) -> list[dict]:
+    """Textos seguidos para o mesmo chat viram uma mensagem (ordem preservada)."""
+    out: list[dict] = []
+    for it in lote:
+        ant = out[-1] if out else None
+        if (ant is not None and it["tipo"] == ant["tipo"] == "texto" and _mesmo_destino(ant, it)
+                and len(ant["carga"]) + len(SEPARADOR) + len(it["carga"]) <= TAMANHO_MAX):
+            out[-1] = {**ant, "carga": ant["carga"] + SEPARADOR + it["carga"],
+                       "partes": ant["partes"] + it["partes"]}
+        else:
+            out.append(it)
+    return out
+
+
+def _balde(chat_id: str) -> Balde:
+    if chat_id not in _baldes:
+        _baldes[chat_id] = Balde(LIMITE_POR_MINUTO, capacidade=3)
+    return _baldes[chat_id]
+
+
+def _retry_after(resp) -> Optional[float]:
+    try:
+        return float(resp.json()["parameters"]["retry_after"])
+    except Exception:
+        return None
+
+
+def _postar(it: dict):
+    import requests
+
+    if it["tipo"] == "media":
+        metodo, corpo = "sendMediaGroup", {"chat_id": it["chat_id"], "media": it["carga"][:10]}
+    else:
+        metodo, corpo = "sendMessage", {"chat_id": it["chat_id"], "text": it["carga"],
+                                        "parse_mode": "HTML", "disable_web_page_preview": True}
+    return requests.post(f"{it['api']}/bot{it['token']}/{metodo}", json=corpo, timeout=TIMEOUT)
+
+
+def _enviar(it: dict) -> None:
+    """Envia um aviso (ou resumo) com limite por chat e novas tentativas."""
+    balde = _balde(it["chat_id"])
+    for tentativa in range(TENTATIVAS_MAX):
+        balde.tirar(0.0, prazo=3600)
+        espera = min(60.0, 2.0 ** tentativa) * random.uniform(0.5, 1.5)
+        try:
+            resp = _postar(it)
+        except Exception:
+            resp = None  # rede/timeout: tenta de novo
+        if resp is not None:
+            if resp.status_code == 200:
+                n = len(it["partes"] or [None])
+                _contar(mensagens=1, resumidos=n - 1 if n > 1 else 0)
+                return
+            if resp.status_code == 429:
+                espera = max(espera, _retry_after(resp) or 0.0)
+                balde.pausar(espera)
+            elif resp.status_code < 500:
+                if it["partes"] and len(it["partes"]) > 1:
+                    # um aviso com HTML inválido não derruba o resumo inteiro
+                    for p in it["partes"]:
+                        _enviar({**it, "carga": p, "partes": [p]})
+                else:
+                    _contar(falhas=1)
+                return
+        if tentativa < TENTATIVAS_MAX - 1:
+            _contar(repeticoes=1)
+            time.sleep(espera)
+    _contar(falhas=1)
+
+
+def _rodar_worker() -> None:
+    while True:
+        lote = [_fila.get()]
+        fim = time.monotonic() + JANELA_RESUMO
+        while True:
+            resto = fim - time.monotonic()
+            if resto <= 0:
+                break
+            try:
+                lote.append(_fila.get(timeout=resto))
+            except queue.Empty:
+                break
+        for it in _juntar(lote):
+            try:
+                _enviar(it)
+            except Exception:
+                _contar(falhas=1)
@@ -0,0 +1,107 @@
+# utils/xlsx.py — planilha exportada como XLSX → matrizes de valores da API
+# -*- coding: utf-8 -*-
+"""
+O Drive exporta a planilha inteira num arquivo só (files/{id}/export) e o
+openpyxl em modo read_only lê as abas em streaming, sem montar o workbook na
+memória. Cada aba vira a mesma matriz de textos que o values_get devolve
+(sem células vazias no fim da linha, sem linhas vazias no fim da aba) — dali
+o _df_de_valores de utils.sheets monta o mesmo DataFrame do carregar_aba.
+
+Texto de cada célula (a API manda o valor já formatado pela planilha):
+    número   → "12" / "2,5"   (vírgula decimal, sem milhar: to_num lê igual)
+    data     → "14/04/2026"   (com hora: "14/04/2026 08:30:00")
+    booleano → "TRUE" / "FALSE"
+Formato de exibição (R$, casas fixas, %) não vem junto: "R$ 12,00" chega como
+"12" — o número lido pelas páginas é o mesmo (porcentagem chegaria como fração;
+nenhuma aba do app usa esse formato).
+
+Abas lidas sem formatação (SHEETS_VALORES_CRUS) pedem crus=[...]: a matriz sai
+como a do UNFORMATTED_VALUE — números como números, datas como serial — e vai
+para o _df_de_crus.
+
+Usado por utils.sheets (_ler_abas_xlsx); benchmark: benchmarks/bench_xlsx.py.
+"""
+from __future__ import annotations
+
+import io
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+DIA_ZERO  = datetime(1899, 12, 30)  # serial 0 do Sheets
+
+
+def texto_celula(v) -> str:
+    """Valor do openpyxl → texto no formato que as páginas já sabem ler."""
+    if v is None:
+        return ""
+    t = type(v)
+    if t is str:
+        return v
+    if t is bool:
+        return "TRUE" if v else "FALSE"
+    if t is int:
+        return str(v)
+    if t is float:
+        if v.is_integer():
+            return str(int(v))
+        return f"{v:.10f}".rstrip("0").rstrip(".").replace(".", ",")
+    if t is datetime:
+        if v.hour == v.minute == v.second == 0 and not v.microsecond:
+            return v.strftime("%d/%m/%Y")
+        return v.strftime("%d/%m/%Y %H:%M:%S")
+    if t is date:
+        return v.strftime("%d/%m/%Y")
+    if t is time:
+        return v.strftime("%H:%M:%S")
+    return str(v)  # timedelta, erros de fórmula (#N/A) etc.
+
+
+def valor_cru(v):
+    """Valor do openpyxl → o que a API devolve com UNFORMATTED_VALUE / SERIAL_NUMBER."""
+    if v is None:
+        return ""
+    t = type(v)
+    if t in (str, bool, int, float):
+        return v
+    if t is datetime:
+        return (v - DIA_ZERO).total_seconds() / 86400
+    if t is date:
+        return float((v - DIA_ZERO.date()).days)
+    if t is time:
+        return (v.hour * 3600 + v.minute * 60 + v.second + v.microsecond / 1e6) / 86400
+    return str(v)
+
+
+def _valores_aba(ws, crus: bool = False) -> list[list]:
+    ws.reset_dimensions()  # não confia na <dimension> gravada no arquivo: lê até a última célula
+    celula = valor_cru if crus else texto_celula
+    linhas: list[list] = []
+    for r in ws.iter_rows(values_only=True):
+        linha = [celula(v) for v in r]
+        while linha and linha[-1] == "":
+            linha.pop()
+        linhas.append(linha)
+    while linhas and not linhas[-1]:
+        linhas.pop()
+    return linhas
+
+
+def ler_xlsx(conteudo: Union[bytes, str, Path], abas: Optional[Iterable[str]] = None,
+             crus: Iterable[str] = ()) -> dict[str, list[list]]:
+    """
+    {título da aba: matriz de textos} a partir do XLSX (bytes do export ou caminho).
+    abas = só estas (as outras nem são lidas); crus = estas saem sem formatação (valor_cru).
+    """
+    from openpyxl import load_workbook
+
+    fonte = io.BytesIO(conteudo) if isinstance(conteudo, (bytes, bytearray)) else conteudo
+    quero = set(abas) if abas is not None else None
+    crus = set(crus)
+    wb = load_workbook(fonte, read_only=True, data_only=True)
+    try:
+        return {ws.title: _valores_aba(ws, ws.title in crus) for ws in wb.worksheets
+                if quero is None or ws.title in quero}
+    finally:
+        wb.close()